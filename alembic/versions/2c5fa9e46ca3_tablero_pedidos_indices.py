@@ -0,0 +1,35 @@
+"""tablero pedidos indices
+
+Revision ID: 2c5fa9e46ca3
+Revises: 3d5b69b41c1e
+Create Date: 2026-10-19 10:04:17.532190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c5fa9e46ca3'
+down_revision: Union[str, None] = '3d5b69b41c1e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE orders SET updated_at = date")
+    op.create_index(op.f('ix_orders_updated_at'), 'orders', ['updated_at'], unique=False)
+    op.create_index('ix_orders_status_date', 'orders', ['status', 'date'], unique=False)
+    op.create_index('ix_orders_date', 'orders', ['date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_date', table_name='orders')
+    op.drop_index('ix_orders_status_date', table_name='orders')
+    op.drop_index(op.f('ix_orders_updated_at'), table_name='orders')
+    op.drop_column('orders', 'updated_at')
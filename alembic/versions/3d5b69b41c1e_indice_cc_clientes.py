@@ -0,0 +1,28 @@
+"""indice cc clientes
+
+Revision ID: 3d5b69b41c1e
+Revises: 9cf6d796257f
+Create Date: 2026-10-19 09:12:41.118502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d5b69b41c1e'
+down_revision: Union[str, None] = '9cf6d796257f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_customers_cc'), 'customers', ['cc'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_customers_cc'), table_name='customers')
@@ -0,0 +1,32 @@
+"""version concurrencia optimista
+
+Revision ID: 4b7e2d9a6c13
+Revises: e3a9f5b82c16
+Create Date: 2026-10-19 18:05:41.207315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2d9a6c13'
+down_revision: Union[str, None] = 'e3a9f5b82c16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('orders', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('debts', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('debts', 'version')
+    op.drop_column('orders', 'version')
+    op.drop_column('products', 'version')
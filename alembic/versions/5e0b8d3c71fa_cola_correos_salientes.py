@@ -0,0 +1,44 @@
+"""cola correos salientes
+
+Revision ID: 5e0b8d3c71fa
+Revises: a41f7c2d9e88
+Create Date: 2026-10-19 13:58:12.640219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b8d3c71fa'
+down_revision: Union[str, None] = 'a41f7c2d9e88'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbound_emails',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('recipient', sa.String(length=255), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbound_emails_id'), 'outbound_emails', ['id'], unique=False)
+    op.create_index('ix_outbound_emails_status_next_attempt', 'outbound_emails', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbound_emails_status_next_attempt', table_name='outbound_emails')
+    op.drop_index(op.f('ix_outbound_emails_id'), table_name='outbound_emails')
+    op.drop_table('outbound_emails')
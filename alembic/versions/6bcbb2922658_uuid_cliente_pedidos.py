@@ -0,0 +1,30 @@
+"""uuid cliente pedidos
+
+Revision ID: 6bcbb2922658
+Revises: 754958d04d39
+Create Date: 2026-10-19 12:41:08.226173
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6bcbb2922658'
+down_revision: Union[str, None] = '754958d04d39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('client_uuid', sa.String(length=36), nullable=True))
+    op.create_unique_constraint('uq_orders_client_uuid', 'orders', ['client_uuid'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_orders_client_uuid', 'orders', type_='unique')
+    op.drop_column('orders', 'client_uuid')
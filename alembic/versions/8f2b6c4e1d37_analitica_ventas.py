@@ -0,0 +1,35 @@
+"""analitica ventas
+
+Revision ID: 8f2b6c4e1d37
+Revises: 5e0b8d3c71fa
+Create Date: 2026-10-19 16:05:12.402817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2b6c4e1d37'
+down_revision: Union[str, None] = '5e0b8d3c71fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_sales_date', 'sales', ['date'], unique=False)
+    versions = sa.table(
+        'reference_data_versions',
+        sa.column('name', sa.String),
+        sa.column('version', sa.Integer)
+    )
+    op.bulk_insert(versions, [{'name': 'sales_history', 'version': 0}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM reference_data_versions WHERE name = 'sales_history'")
+    op.drop_index('ix_sales_date', table_name='sales')
@@ -0,0 +1,40 @@
+"""stock tres decimales
+
+Revision ID: 9a3c5e7f1b24
+Revises: 4b7e2d9a6c13
+Create Date: 2026-10-19 19:12:30.584107
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3c5e7f1b24'
+down_revision: Union[str, None] = '4b7e2d9a6c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Misma escala que stock_movements y order_items.quantity: una venta de
+    # 0.125 kg ya no se redondea en products.stock y el libro cuadra con él
+    op.alter_column(
+        'products', 'stock',
+        existing_type=sa.Numeric(precision=10, scale=2),
+        type_=sa.Numeric(precision=12, scale=3),
+        existing_nullable=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'products', 'stock',
+        existing_type=sa.Numeric(precision=12, scale=3),
+        type_=sa.Numeric(precision=10, scale=2),
+        existing_nullable=True
+    )
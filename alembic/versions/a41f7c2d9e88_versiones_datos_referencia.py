@@ -0,0 +1,37 @@
+"""versiones datos referencia
+
+Revision ID: a41f7c2d9e88
+Revises: 6bcbb2922658
+Create Date: 2026-10-19 13:20:47.118530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f7c2d9e88'
+down_revision: Union[str, None] = '6bcbb2922658'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    versions = op.create_table('reference_data_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(versions, [
+        {'name': 'categories', 'version': 0},
+        {'name': 'services', 'version': 0},
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('reference_data_versions')
@@ -0,0 +1,36 @@
+"""niveles reorden productos
+
+Revision ID: c7d41a9e2b50
+Revises: 8f2b6c4e1d37
+Create Date: 2026-10-19 16:48:31.905214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d41a9e2b50'
+down_revision: Union[str, None] = '8f2b6c4e1d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_stock_levels',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('daily_velocity', sa.Numeric(precision=12, scale=3), nullable=False),
+    sa.Column('reorder_point', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('target_stock', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('product_stock_levels')
@@ -0,0 +1,57 @@
+"""montos numeric
+
+Revision ID: ce3ec22f5fcf
+Revises: 2c5fa9e46ca3
+Create Date: 2026-10-19 11:20:55.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ce3ec22f5fcf'
+down_revision: Union[str, None] = '2c5fa9e46ca3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabla, columna, nullable)
+MONEY_COLUMNS = [
+    ('sales', 'total', True),
+    ('sales', 'balance', True),
+    ('sales', 'transfer_payment', True),
+    ('order_items', 'price_unit', False),
+    ('order_items', 'subtotal', False),
+    ('products', 'purchase_price', True),
+    ('products', 'sale_price', True),
+    ('debts', 'current_balance', False),
+    ('debt_movements', 'amount', False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, nullable in MONEY_COLUMNS:
+        # Backfill: redondear a centavos antes del cambio de tipo para que la
+        # conversión float -> decimal no arrastre errores de representación
+        op.execute(f"UPDATE {table} SET {column} = ROUND({column}, 2) WHERE {column} IS NOT NULL")
+        op.alter_column(
+            table, column,
+            existing_type=sa.Float(),
+            type_=sa.Numeric(precision=12, scale=2),
+            existing_nullable=nullable
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, nullable in reversed(MONEY_COLUMNS):
+        op.alter_column(
+            table, column,
+            existing_type=sa.Numeric(precision=12, scale=2),
+            type_=sa.Float(),
+            existing_nullable=nullable
+        )
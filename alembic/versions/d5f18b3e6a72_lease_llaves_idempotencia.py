@@ -0,0 +1,29 @@
+"""lease llaves idempotencia
+
+Revision ID: d5f18b3e6a72
+Revises: 9a3c5e7f1b24
+Create Date: 2026-10-19 19:40:12.903318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f18b3e6a72'
+down_revision: Union[str, None] = '9a3c5e7f1b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL en las llaves existentes: run_idempotent las trata como reservas vencidas
+    op.add_column('idempotency_keys', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('idempotency_keys', 'claimed_at')
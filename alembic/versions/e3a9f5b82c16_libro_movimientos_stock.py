@@ -0,0 +1,52 @@
+"""libro movimientos stock
+
+Revision ID: e3a9f5b82c16
+Revises: c7d41a9e2b50
+Create Date: 2026-10-19 17:22:04.518736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9f5b82c16'
+down_revision: Union[str, None] = 'c7d41a9e2b50'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_movements',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Numeric(precision=12, scale=3), nullable=False),
+    sa.Column('stock_after', sa.Numeric(precision=12, scale=3), nullable=True),
+    sa.Column('reason', sa.Enum('INITIAL', 'SALE', 'SALE_DELETED', 'RESTOCK', 'REMOVAL', 'ADJUSTMENT', name='stockmovementreason'), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_movements_product_created', 'stock_movements', ['product_id', 'created_at'], unique=False)
+    op.create_index('ix_stock_movements_created', 'stock_movements', ['created_at'], unique=False)
+    op.create_table('stock_snapshots',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('stock', sa.Numeric(precision=12, scale=3), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'day')
+    )
+    op.create_index('ix_stock_snapshots_day', 'stock_snapshots', ['day'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_snapshots_day', table_name='stock_snapshots')
+    op.drop_table('stock_snapshots')
+    op.drop_index('ix_stock_movements_created', table_name='stock_movements')
+    op.drop_index('ix_stock_movements_product_created', table_name='stock_movements')
+    op.drop_table('stock_movements')
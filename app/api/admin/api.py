@@ -0,0 +1,56 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.profiling import profile_store
+from app.core.security import get_current_admin_user
+from app.core.slow_queries import slow_query_log
+from app.models.users.users import User
+
+admin_router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@admin_router.get("/slow-queries", response_model=List[dict])
+def list_slow_queries(
+    limit: Optional[int] = Query(None, ge=1),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Últimas consultas que superaron SLOW_QUERY_THRESHOLD_MS (más recientes primero),
+    con parámetros redactados, la ruta que las originó y el EXPLAIN de la
+    primera ocurrencia cuando SLOW_QUERY_EXPLAIN está activo.
+    """
+    return slow_query_log.entries(limit)
+
+
+@admin_router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def clear_slow_queries(current_user: User = Depends(get_current_admin_user)):
+    slow_query_log.clear()
+
+
+@admin_router.get("/slow-queries/settings")
+def slow_query_settings(current_user: User = Depends(get_current_admin_user)):
+    return {
+        "threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+        "buffer_size": settings.SLOW_QUERY_LOG_SIZE,
+        "explain": settings.SLOW_QUERY_EXPLAIN,
+    }
+
+
+@admin_router.get("/profiles", response_model=List[dict])
+def list_profiles(current_user: User = Depends(get_current_admin_user)):
+    """Perfiles capturados con X-Profile: 1 (más recientes primero)."""
+    return profile_store.list()
+
+
+@admin_router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(
+    profile_id: int,
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls)$"),
+    limit: int = Query(60, ge=1, le=500),
+    current_user: User = Depends(get_current_admin_user)
+):
+    session = profile_store.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return session.report(sort=sort, limit=limit)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
@@ -21,19 +21,35 @@ from app.schemas.users.auth import (
 )
 from app.models.users.users import User
 from app.core.config import settings
+from app.core.rate_limit import RateLimit, client_ip, normalize_identifier
 from app.services.auth.services import (
-    generate_password_reset_token,
+    request_password_recovery,
     verify_password_reset_token
 )
-from app.services.auth.email import send_reset_password_email
 
 auth_router = APIRouter(prefix="/auth", tags=["Auth"])
 
+# Token buckets por IP y por cuenta: los intentos abusivos se rechazan antes de bcrypt, la BD o el SMTP.
+# El de login por cuenta va por (usuario, IP): agotarlo desde otra IP no bloquea al dueño de la cuenta
+login_ip_limit = RateLimit("login:ip", settings.LOGIN_RATE_LIMIT_PER_IP, settings.LOGIN_RATE_LIMIT_PERIOD_SECONDS)
+login_user_limit = RateLimit("login:user_ip", settings.LOGIN_RATE_LIMIT_PER_USER, settings.LOGIN_RATE_LIMIT_PERIOD_SECONDS)
+recovery_ip_limit = RateLimit("recovery:ip", settings.RECOVERY_RATE_LIMIT_PER_IP, settings.RECOVERY_RATE_LIMIT_PERIOD_SECONDS)
+recovery_email_limit = RateLimit("recovery:email", settings.RECOVERY_RATE_LIMIT_PER_EMAIL, settings.RECOVERY_RATE_LIMIT_PERIOD_SECONDS)
+reset_ip_limit = RateLimit("reset:ip", settings.RECOVERY_RATE_LIMIT_PER_IP, settings.RECOVERY_RATE_LIMIT_PERIOD_SECONDS)
+
+RECOVERY_MESSAGE = "If the email is registered, a password recovery email will be sent"
+
+# Síncrono a propósito: bcrypt bloquea y debe correr en el threadpool, no en el event loop
 @auth_router.post("/login", response_model=Token)
-async def login_for_access_token(
+def login_for_access_token(
     form_data: UserLogin,
+    request: Request,
     db: Session = Depends(get_db)
 ):
+    ip = client_ip(request)
+    login_ip_limit.check(ip)
+    login_user_limit.check(f"{normalize_identifier(form_data.full_name)}|{ip}")
+
     user = authenticate_user(db, form_data.full_name, form_data.password)
     if not user:
         raise HTTPException(
@@ -57,31 +73,31 @@ async def logout(
     return {"message": "Successfully logged out"}
 
 @auth_router.post("/password-recovery", status_code=status.HTTP_202_ACCEPTED)
-async def recover_password(
+def recover_password(
     password_recovery: PasswordResetRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    request: Request,
+    background_tasks: BackgroundTasks
 ):
-    user = db.query(User).filter(User.email == password_recovery.email).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="The user with this email does not exist in the system.",
-        )
-    
-    password_reset_token = generate_password_reset_token(email=user.email)
-    await send_reset_password_email(
-        email_to=user.email,
-        token=password_reset_token,
-        background_tasks=background_tasks
-    )
-    return {"message": "Password recovery email sent"}
+    recovery_ip_limit.check(client_ip(request))
+
+    # Por correo se descarta en silencio: la respuesta es la misma y no se le
+    # llena el buzón a la víctima
+    allowed, _ = recovery_email_limit.hit(normalize_identifier(password_recovery.email))
+    if allowed:
+        # La búsqueda del usuario y el encolado del correo se hacen después de
+        # responder: la respuesta no revela si el correo existe (ni por contenido ni por tiempo)
+        background_tasks.add_task(request_password_recovery, password_recovery.email)
+
+    return {"message": RECOVERY_MESSAGE}
 
 @auth_router.post("/reset-password", status_code=status.HTTP_200_OK)
-async def reset_password(
+def reset_password(
     body: PasswordReset,
+    request: Request,
     db: Session = Depends(get_db)
 ):
+    reset_ip_limit.check(client_ip(request))
+
     email = verify_password_reset_token(token=body.token)
     if not email:
         raise HTTPException(
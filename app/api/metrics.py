@@ -0,0 +1,25 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.metrics import metrics_registry
+
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Métricas en formato de exposición de Prometheus: latencia por ruta,
+    consultas SQL por petición y tiempo de BD.
+    Si METRICS_TOKEN está configurado se exige Authorization: Bearer <token>.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not authorization or not hmac.compare_digest(authorization, expected):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized")
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,10 +1,10 @@
 # api/customers.py
-from typing import List
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.schemas.store.customers.schemas import CustomerCreate, CustomerOut, CustomerUpdate
-from app.services.store.customers.services import create_customer, get_customer_by_id, get_all_customers, update_customer, delete_customer
+from app.schemas.store.customers.schemas import CustomerCreate, CustomerOut, CustomerUpdate, CustomerSummary
+from app.services.store.customers.services import create_customer, get_customer_by_id, get_all_customers, update_customer, delete_customer, get_customer_summary, search_customers
 
 customers_router = APIRouter(
     prefix="/customers",
@@ -19,11 +19,28 @@ def create_customer_endpoint(customer: CustomerCreate, db: Session = Depends(get
     return create_customer(db, customer)
 
 @customers_router.get("/", response_model=List[CustomerOut])
-def get_customers_endpoint(db: Session = Depends(get_db)):
+def get_customers_endpoint(
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
     """
-    Retorna una lista de todos los clientes.
+    Retorna una lista de clientes (paginada si se envía limit).
     """
-    return get_all_customers(db)
+    return get_all_customers(db, skip=skip, limit=limit)
+
+@customers_router.get("/search", response_model=List[CustomerOut])
+def search_customers_endpoint(
+    q: str = Query(..., min_length=1),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Autocompletado de clientes por nombre, alias, teléfono o cédula
+    (sin distinguir mayúsculas ni tildes y tolerante a errores de digitación).
+    """
+    return search_customers(db, q, skip=skip, limit=limit)
 
 @customers_router.get("/{customer_id}", response_model=CustomerOut)
 def get_customer_endpoint(customer_id: int, db: Session = Depends(get_db)):
@@ -32,6 +49,19 @@ def get_customer_endpoint(customer_id: int, db: Session = Depends(get_db)):
     """
     return get_customer_by_id(db, customer_id)
 
+@customers_router.get("/{customer_id}/summary", response_model=CustomerSummary)
+def get_customer_summary_endpoint(
+    customer_id: int,
+    last_sales: int = Query(5, ge=1, le=50),
+    top_products: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Retorna en una sola llamada el resumen del cliente: ingresos históricos,
+    últimas ventas, deuda actual y productos más comprados.
+    """
+    return get_customer_summary(db, customer_id, last_sales, top_products)
+
 @customers_router.patch("/{customer_id}", response_model=CustomerOut)
 def update_customer_endpoint(customer_id: int, customer: CustomerUpdate, db: Session = Depends(get_db)):
     """
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 from app.models.store.debt.models import DebtMovement
 from app.core.database import get_db
+from app.core.serialization import serialize_list
+from app.core.idempotency import run_idempotent
+from app.core.concurrency import if_match_versions, set_etag
 from app.schemas.store.debt.schemas import (
     DebtCreate,
     DebtOut,
@@ -28,7 +31,8 @@ def get_all_debts(
     db: Session = Depends(get_db)
 ):
     """Obtiene todas las deudas registradas"""
-    return DebtService(db).get_all_debts(with_movements)
+    debts = DebtService(db).get_all_debts(with_movements)
+    return serialize_list(DebtWithMovements if with_movements else DebtOut, debts)
 
 @debts_router.post("/", response_model=DebtOut, status_code=status.HTTP_201_CREATED)
 def create_debt(debt_data: DebtCreate, db: Session = Depends(get_db)):
@@ -39,11 +43,12 @@ def create_debt(debt_data: DebtCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @debts_router.get("/{debt_id}", response_model=DebtWithMovements)
-def get_debt(debt_id: int, db: Session = Depends(get_db)):
-    """Obtiene una deuda específica con sus movimientos"""
+def get_debt(debt_id: int, response: Response, db: Session = Depends(get_db)):
+    """Obtiene una deuda específica con sus movimientos (ETag = versión)"""
     debt = DebtService(db).get_debt(debt_id)
     if not debt:
         raise HTTPException(status_code=404, detail="Deuda no encontrada")
+    set_etag(response, debt)
     return debt
 
 @debts_router.get("/customer/{customer_id}", response_model=DebtWithMovements)
@@ -68,13 +73,26 @@ def delete_debt(debt_id: int, db: Session = Depends(get_db)):
 def register_movement(
     debt_id: int, 
     movement_data: MovementCreate, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Registra un nuevo movimiento (abono o nuevo saldo)"""
-    try:
-        return DebtService(db).register_movement(debt_id, movement_data)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    """Registra un nuevo movimiento (abono o nuevo saldo).
+    Con Idempotency-Key un reintento no vuelve a aplicar el abono."""
+    def register(commit: bool):
+        try:
+            return DebtService(db).register_movement(debt_id, movement_data, commit=commit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return run_idempotent(
+        db,
+        idempotency_key,
+        scope=f"debt_movements:{debt_id}",
+        payload=movement_data,
+        action=register,
+        schema=MovementResult,
+        status_code=status.HTTP_201_CREATED
+    )
 
 @debts_router.get("/movements/{movement_id}", response_model=MovementOut)
 def get_movement(movement_id: int, db: Session = Depends(get_db)):
@@ -120,10 +138,14 @@ def get_customer_balance_history(customer_id: int, db: Session = Depends(get_db)
 def update_debt(
     debt_id: int,
     update_data: DebtUpdate,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: Session = Depends(get_db),
+    expected_versions=Depends(if_match_versions)
 ):
-    """Actualiza una deuda existente (solo campos proporcionados)"""
+    """Actualiza una deuda existente (solo campos proporcionados; If-Match opcional)"""
     try:
-        return DebtService(db).update_debt(debt_id, update_data)
+        debt = DebtService(db).update_debt(debt_id, update_data, expected_versions=expected_versions)
+        set_etag(response, debt)
+        return debt
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,77 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.events import RESYNC_EVENT, Subscriber, event_broker
+from app.core.security import get_user_from_token, oauth2_scheme_optional
+
+events_router = APIRouter(prefix="/events", tags=["Events"])
+
+
+def _format_sse(event_id, event_type: str, data) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _event_stream(request: Request, subscriber: Subscriber):
+    try:
+        # Indica al cliente cuánto esperar antes de reconectarse
+        yield f"retry: {settings.EVENTS_HEARTBEAT_SECONDS * 1000}\n\n"
+        while True:
+            if await request.is_disconnected():
+                break
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(),
+                    timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Comentario SSE para mantener viva la conexión a través de proxies
+                yield ": ping\n\n"
+                continue
+
+            if subscriber.dropped:
+                # El cliente se atrasó: debe volver a consultar el tablero
+                yield _format_sse(event["id"], RESYNC_EVENT, {"dropped": subscriber.dropped})
+                subscriber.dropped = 0
+            yield _format_sse(event["id"], event["type"], event["data"])
+    finally:
+        event_broker.unsubscribe(subscriber)
+
+
+@events_router.get("/stream")
+async def stream_events(
+    request: Request,
+    token: Optional[str] = None,
+    header_token: Optional[str] = Depends(oauth2_scheme_optional)
+):
+    """
+    Stream SSE con los cambios de pedidos y ventas
+    (order.created, order.updated, order.completed, order.deleted,
+    sale.created, sale.deleted).
+    El token puede enviarse en el header Authorization o como ?token=
+    (EventSource del navegador no permite headers personalizados).
+    """
+    # Sesión corta solo para autenticar: el stream no retiene conexiones a la BD
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(db, token or header_token)
+    finally:
+        db.close()
+
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # Los usuarios que no son admin solo reciben eventos de sus pedidos
+    subscriber = event_broker.subscribe(user_id=None if user.rol == "admin" else user.id)
+    return StreamingResponse(
+        _event_stream(request, subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,22 +1,37 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.security import get_current_active_user
+from app.core.serialization import serialize_list
+from app.core.idempotency import run_idempotent
+from app.core.concurrency import if_match_versions, set_etag
 from app.models.users.users import User
-from typing import List
-from app.schemas.store.orders.schemas import OrderCreate, OrderUpdate, OrderOut
-from app.services.store.orders.orders import create_order,patch_order, get_all_orders, get_orders_today, get_order_by_id, update_order, delete_order
+from typing import List, Optional
+from datetime import datetime
+from app.schemas.store.orders.schemas import OrderCreate, OrderUpdate, OrderOut, OrderItemPatch, OrderItemOut, OrderBoard
+from app.services.store.orders.orders import create_order,patch_order, get_all_orders, get_orders_today, get_order_by_id, update_order, delete_order, patch_order_item, get_orders_board
 
 orders_router = APIRouter(prefix="/orders", tags=["Orders"])
 
 @orders_router.post("/", response_model=OrderOut)
 def create_new_order(
     order: OrderCreate, 
+    validate_stock: bool = False,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     # Guardamos el ID del usuario logueado en el pedido
-    return create_order(db, order, user_id=current_user.id)
+    # validate_stock=True rechaza el pedido si algún producto no tiene stock suficiente
+    # Con Idempotency-Key los reintentos reciben el pedido ya creado
+    return run_idempotent(
+        db,
+        idempotency_key,
+        scope=f"orders:{current_user.id}",
+        payload=order,
+        action=lambda commit: create_order(db, order, user_id=current_user.id, validate_stock=validate_stock, commit=commit),
+        schema=OrderOut
+    )
 
 @orders_router.get("/", response_model=List[OrderOut])
 def get_orders(
@@ -24,9 +39,9 @@ def get_orders(
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.rol == "admin":
-        return get_all_orders(db)
+        return serialize_list(OrderOut, get_all_orders(db))
 
-    return get_all_orders(db, user_id=current_user.id)
+    return serialize_list(OrderOut, get_all_orders(db, user_id=current_user.id))
 
 @orders_router.get("/today", response_model=List[OrderOut])
 def get_orders_today_endpoint(
@@ -38,25 +53,72 @@ def get_orders_today_endpoint(
 
     return get_orders_today(db, user_id=current_user.id)
 
+@orders_router.get("/board", response_model=OrderBoard)
+def get_orders_board_endpoint(
+    since: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Tablero liviano: conteos por estado + pedidos modificados desde "since"
+    if current_user.rol == "admin":
+        return get_orders_board(db, since=since)
+
+    return get_orders_board(db, since=since, user_id=current_user.id)
+
 @orders_router.get("/{order_id}", response_model=OrderOut)
 def get_order(
     order_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.rol == "admin":
-        return get_order_by_id(db, order_id)
-
-    return get_order_by_id(db, order_id, user_id=current_user.id)
+        order = get_order_by_id(db, order_id)
+    else:
+        order = get_order_by_id(db, order_id, user_id=current_user.id)
+    # El ETag es la versión del pedido: se manda en If-Match al editarlo
+    set_etag(response, order)
+    return order
 
 
 @orders_router.put("/{order_id}", response_model=OrderOut)
-def update_order_details(order_id: int, order_update: OrderUpdate, db: Session = Depends(get_db)):
-    return update_order(db, order_id, order_update)
+def update_order_details(
+    order_id: int,
+    order_update: OrderUpdate,
+    response: Response,
+    db: Session = Depends(get_db),
+    expected_versions=Depends(if_match_versions)
+):
+    order = update_order(db, order_id, order_update, expected_versions)
+    set_etag(response, order)
+    return order
 
 @orders_router.patch("/{order_id}", response_model=OrderOut)
-def patch_order_details(order_id: int, order_patch: OrderUpdate, db: Session = Depends(get_db)):
-    return patch_order(db, order_id, order_patch)
+def patch_order_details(
+    order_id: int,
+    order_patch: OrderUpdate,
+    response: Response,
+    db: Session = Depends(get_db),
+    expected_versions=Depends(if_match_versions)
+):
+    order = patch_order(db, order_id, order_patch, expected_versions)
+    set_etag(response, order)
+    return order
+
+@orders_router.patch("/{order_id}/items/{item_id}", response_model=OrderItemOut)
+def patch_order_item_details(
+    order_id: int,
+    item_id: int,
+    item_patch: OrderItemPatch,
+    response: Response,
+    db: Session = Depends(get_db),
+    expected_versions=Depends(if_match_versions)
+):
+    # Edita una sola línea del pedido sin reescribir los demás items;
+    # If-Match y el ETag de la respuesta son los del pedido
+    item = patch_order_item(db, order_id, item_id, item_patch, expected_versions)
+    set_etag(response, item.order)
+    return item
 
 @orders_router.delete("/{order_id}")
 def delete_order_details(order_id: int, db: Session = Depends(get_db)):
@@ -1,9 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta
+import pytz
 from sqlalchemy.orm import Session
 import os
 from app.models.store.products.models import Product
+from app.models.users.users import User
 from app.core.database import get_db
+from app.core.security import get_current_active_user
+from app.core.serialization import FastJSONResponse, serialize_list
+from app.core.concurrency import if_match_versions, set_etag
+from app.services.store.products.analytics import top_products, abc_classification
+from app.services.store.products.stock_levels import low_stock_products
+from app.services.store.products.stock_movements import stock_history
 from app.services.store.products.products import create_product, get_product_by_id, delete_product_by_id, add_to_stock,remove_from_stock,patch_product, get_all_products
 from app.schemas.store.products.products import CreateProduct, ResponseProduct, UpdateProduct, ProductOut
 
@@ -16,7 +25,7 @@ def get_all_products_endpoint(db: Session = Depends(get_db)):
     Obtiene todos los productos.
     """
     products = get_all_products(db)
-    return products
+    return serialize_list(ProductOut, products)
 
 @products_router.post("/", response_model=ResponseProduct)
 async def register_product(product: CreateProduct, db: Session = Depends(get_db)):
@@ -41,26 +50,87 @@ def remove_stock_endpoint(
 ):
     return remove_from_stock(db, product_id, quantity, allow_negative)
 
+# Productos en o bajo su punto de reorden (debe ir antes de /{product_id})
+@products_router.get("/low-stock", response_class=FastJSONResponse)
+def get_low_stock_products(db: Session = Depends(get_db)):
+    return low_stock_products(db)
+
+def _check_range(start: date, end: date):
+    if start > end:
+        raise HTTPException(
+            status_code=400,
+            detail="La fecha de inicio no puede ser posterior a la fecha de fin"
+        )
+
+# Productos que más venden en el rango (por ingresos, cantidad o ganancia)
+@products_router.get("/analytics/top", response_class=FastJSONResponse)
+def get_top_products(
+    start: date,
+    end: date,
+    by: Literal["revenue", "quantity", "profit"] = "revenue",
+    n: int = Query(10, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    _check_range(start, end)
+    return top_products(db, start, end, by, n)
+
+# Clasificación ABC del inventario según los ingresos del rango
+@products_router.get("/analytics/abc", response_class=FastJSONResponse)
+def get_abc_classification(
+    start: date,
+    end: date,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    _check_range(start, end)
+    return abc_classification(db, start, end)
+
 # Ruta para obtener un producto específico
 @products_router.get("/{product_id}", response_model=ResponseProduct)
-def read_product(product_id: int, db: Session = Depends(get_db)):
+def read_product(product_id: int, response: Response, db: Session = Depends(get_db)):
     """
-    Obtiene un producto por su ID.
+    Obtiene un producto por su ID. El ETag es su versión.
     """
     product = get_product_by_id(product_id, db)
     if not product:
         raise HTTPException(status_code=404, detail="Product not Found")
+    set_etag(response, product)
     return product
 
+# Historial de stock: snapshot diario más los movimientos del rango (por defecto los últimos 30 días)
+@products_router.get("/{product_id}/stock-history", response_class=FastJSONResponse)
+def get_stock_history(
+    product_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    product = db.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not Found")
+    end_date = end_date or datetime.now(pytz.timezone('America/Bogota')).date()
+    start_date = start_date or end_date - timedelta(days=30)
+    _check_range(start_date, end_date)
+    return stock_history(db, product, start_date, end_date)
+
 # Ruta para actualizar un producto
 @products_router.patch("/{product_id}", response_model=ResponseProduct)
-def update_product(product_id: int, product_data: UpdateProduct, db: Session = Depends(get_db)):
+def update_product(
+    product_id: int,
+    product_data: UpdateProduct,
+    response: Response,
+    db: Session = Depends(get_db),
+    expected_versions=Depends(if_match_versions)
+):
     """
-    Actualiza un producto existente.
+    Actualiza un producto existente. Con If-Match responde 412 si el
+    producto cambió desde que el cliente lo leyó.
     """
-    product = patch_product(product_id, product_data, db)
+    product = patch_product(product_id, product_data, db, expected_versions)
     if not product:
         raise HTTPException(status_code=404, detail="Product not Found")
+    set_etag(response, product)
     return product
 
 # Ruta para eliminar un producto
@@ -1,10 +1,12 @@
 from typing import Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import date
 from app.core.database import get_db
 from app.core.security import get_current_active_user
+from app.core.serialization import FastJSONResponse, serialize_list
+from app.core.idempotency import run_idempotent
 from app.models.users.users import User
 from app.schemas.store.sales.schemas import SaleCreate, SaleOut
 from decimal import Decimal
@@ -20,6 +22,7 @@ from app.services.store.sales.services import (
     earnings_per_day,
     earnings_by_date_range
 )
+from app.services.store.sales.analytics import sales_analytics
 
 sales_router = APIRouter(
     prefix="/sales",
@@ -49,15 +52,23 @@ class SalesMetrics(BaseModel):
 def create_sale_endpoint(
     sale_data: SaleCreate, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     # Guardamos el ID del usuario logueado en el pedido cuando se factura
-    sale = create_sale(db, sale_data, user_id=current_user.id)
-    return sale
+    # Con Idempotency-Key los reintentos reciben la venta ya creada
+    return run_idempotent(
+        db,
+        idempotency_key,
+        scope=f"sales:{current_user.id}",
+        payload=sale_data,
+        action=lambda commit: create_sale(db, sale_data, user_id=current_user.id, commit=commit),
+        schema=SaleOut
+    )
 
 @sales_router.get("/", response_model=List[SaleOut])
 def get_all_sales_endpoint(db: Session = Depends(get_db)):
-    return get_all_sales(db)
+    return serialize_list(SaleOut, get_all_sales(db))
 
 @sales_router.get("/{sale_id}", response_model=SaleOut)
 def get_sale_by_id_endpoint(sale_id: int, db: Session = Depends(get_db)):
@@ -80,7 +91,7 @@ def get_sales_for_day(day: date, db: Session = Depends(get_db)):
     return [SaleOut.model_validate(s) for s in sales]
 
 # ------------------ Rango de Fechas y Ganancias con Seguridad ------------------
-@sales_router.get("/range/earnings/")
+@sales_router.get("/range/earnings/", response_class=FastJSONResponse)
 def get_earnings_by_date_range(
     start_date: date,
     end_date: date,
@@ -101,6 +112,28 @@ def get_earnings_by_date_range(
 
     return earnings_by_date_range(db, start_date, end_date, user_id)
 
+# ------------------ Analítica por Rango ------------------
+
+@sales_router.get("/analytics/", response_class=FastJSONResponse)
+def get_sales_analytics(
+    start_date: date,
+    end_date: date,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400,
+            detail="La fecha de inicio no puede ser posterior a la fecha de fin"
+        )
+
+    # Igual que en ganancias: quien no es admin solo ve sus propias ventas
+    if current_user.rol != "admin":
+        user_id = current_user.id
+
+    return sales_analytics(db, start_date, end_date, user_id)
+
 # ------------------ Métricas por Día ------------------
 
 @sales_router.get("/day/metrics/", response_model=SalesMetrics)
@@ -109,7 +142,7 @@ def get_sales_metrics_for_day(day: date, db: Session = Depends(get_db)):
 
     # Inicializar todas las métricas con valores por defecto
     metrics = {
-        "total_sales": 0.0,
+        "total_sales": Decimal(0),
         "total_quantity": Decimal(0),
         "most_sold_product": None,
         "sales_by_customer": {},
@@ -124,16 +157,23 @@ def get_sales_metrics_for_day(day: date, db: Session = Depends(get_db)):
         return SalesMetrics(**metrics)
 
     product_sales: Dict[str, int] = {}  # Definir product_sales aquí
+    sales_count_by_customer: Dict[str, int] = {}
 
     # Procesar las ventas
     for sale in sales:
         metrics["total_sales"] += sale.total
         metrics["orders_count"] += 1
         hour = sale.date.hour
-        metrics["sales_by_hour"][hour] = metrics["sales_by_hour"].get(hour, 0.0) + sale.total
+        metrics["sales_by_hour"][hour] = metrics["sales_by_hour"].get(hour, Decimal(0)) + sale.total
 
         # Verificar si sale.order no es None antes de acceder a sus elementos
         if sale.order:
+            # Ventas por cliente: el total de la venta se suma una sola vez
+            if sale.order.customer:
+                cust = sale.order.customer.name
+                metrics["sales_by_customer"][cust] = metrics["sales_by_customer"].get(cust, Decimal(0)) + sale.total
+                sales_count_by_customer[cust] = sales_count_by_customer.get(cust, 0) + 1
+
             for item in sale.order.items:
                 name = item.product.name
                 qty = item.quantity
@@ -141,15 +181,11 @@ def get_sales_metrics_for_day(day: date, db: Session = Depends(get_db)):
                 # Actualizar cantidad por producto
                 product_sales[name] = product_sales.get(name, 0) + qty
                 
-                metrics["total_quantity"] += Decimal(str(qty))
-
-                # Actualizar ventas por cliente
-                cust = sale.order.customer.name
-                metrics["sales_by_customer"][cust] = metrics["sales_by_customer"].get(cust, 0.0) + sale.total
+                metrics["total_quantity"] += qty
 
-                # Actualizar ventas por categoría
+                # Ventas por categoría: cada línea aporta su subtotal
                 cat = item.product.category.name
-                metrics["sales_by_category"][cat] = metrics["sales_by_category"].get(cat, 0.0) + sale.total
+                metrics["sales_by_category"][cat] = metrics["sales_by_category"].get(cat, Decimal(0)) + item.subtotal
 
                 # Agregar margen de ganancia
                 metrics["profit_margin_products"].append(ProfitMarginOut(
@@ -165,13 +201,8 @@ def get_sales_metrics_for_day(day: date, db: Session = Depends(get_db)):
     metrics["profit_margin_products"].sort(key=lambda x: x.margin, reverse=True)
 
     # Calcular promedio por cliente
-    for cust in metrics["sales_by_customer"]:
-        customer_sales_count = len([
-    s for s in sales if s.order and s.order.customer and s.order.customer.name == cust
-])
-
-        if customer_sales_count > 0:
-            metrics["avg_purchase_per_customer"][cust] = metrics["sales_by_customer"][cust] / customer_sales_count
+    for cust, customer_sales_count in sales_count_by_customer.items():
+        metrics["avg_purchase_per_customer"][cust] = metrics["sales_by_customer"][cust] / customer_sales_count
 
     return SalesMetrics(**metrics)
 
@@ -181,12 +212,17 @@ def get_sales_metrics_for_day(day: date, db: Session = Depends(get_db)):
 def get_sales_between_dates(start_date: date, end_date: date, db: Session = Depends(get_db)):
     return sales_between_dates(db, start_date, end_date)
 
-@sales_router.get("/day/earnings/")
+@sales_router.get("/day/earnings/", response_class=FastJSONResponse)
 def get_earnings_per_day(day: date, db: Session = Depends(get_db)):
     return earnings_per_day(day, db)
 
 # ------------------ Historial por Cliente ------------------
 
 @sales_router.get("/history/{customer_id}", response_model=List[SaleOut])
-def get_sales_history(customer_id: int, db: Session = Depends(get_db)):
-    return get_sales_by_customer(db, customer_id)
+def get_sales_history(
+    customer_id: int,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    return get_sales_by_customer(db, customer_id, skip=skip, limit=limit)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.security import get_current_active_user
+from app.models.users.users import User
+from app.schemas.store.orders.schemas import SyncOrdersRequest, SyncOrdersResponse
+from app.services.store.orders.orders import sync_orders
+
+sync_router = APIRouter(prefix="/sync", tags=["Sync"])
+
+@sync_router.post("/orders", response_model=SyncOrdersResponse)
+def sync_orders_endpoint(
+    payload: SyncOrdersRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Sube en una sola petición los pedidos tomados sin conexión.
+    # Reenviar el mismo lote es seguro: los client_uuid ya sincronizados se
+    # devuelven como duplicados con su ID existente.
+    return sync_orders(db, payload, user_id=current_user.id)
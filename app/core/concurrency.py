@@ -0,0 +1,56 @@
+from typing import Any, FrozenSet, Optional
+from fastapi import Header, HTTPException, Response, status
+
+ETAG_HEADER = "ETag"
+
+# Conjunto vacío = If-Match: * (cualquier versión sirve)
+ANY_VERSION: FrozenSet[int] = frozenset()
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def if_match_versions(if_match: Optional[str] = Header(None, alias="If-Match")) -> Optional[FrozenSet[int]]:
+    """
+    Dependencia que interpreta If-Match como el conjunto de versiones
+    aceptadas. Sin el header retorna None (la edición no se condiciona, como
+    antes); con "*" retorna ANY_VERSION.
+    """
+    if if_match is None or not if_match.strip():
+        return None
+    if if_match.strip() == "*":
+        return ANY_VERSION
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        try:
+            versions.add(int(tag.strip('"')))
+        except ValueError:
+            # Un ETag que no emitimos nunca coincide
+            continue
+    return frozenset(versions) if versions else frozenset({-1})
+
+
+def check_version(entity: Any, expected: Optional[FrozenSet[int]]) -> None:
+    """
+    Lanza 412 si la versión cargada no es la que el cliente editó. La carrera
+    entre esta revisión y el commit la cubre version_id_col: el UPDATE lleva
+    WHERE version = <cargada> y si otra petición ganó, SQLAlchemy lanza
+    StaleDataError (que main.py también responde con 412).
+    """
+    if expected is None or expected is ANY_VERSION or entity.version in expected:
+        return
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="El registro fue modificado por otra persona; recarga e intenta de nuevo",
+        headers={ETAG_HEADER: etag(entity.version)}
+    )
+
+
+def set_etag(response: Response, entity: Any) -> None:
+    version = getattr(entity, "version", None)
+    if version is not None:
+        response.headers[ETAG_HEADER] = etag(version)
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Optional
 
 class Settings(BaseSettings):
     SECRET_KEY: str
@@ -13,9 +14,53 @@ class Settings(BaseSettings):
     MAIL_FROM_NAME: str
     SERVER_HOST: str 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 24
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    RATE_LIMIT_TRUST_PROXY: bool = False
+    RATE_LIMIT_PROXY_HOPS: int = 1  # Proxies de confianza que agregan su entrada a X-Forwarded-For
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_PER_USER: int = 5
+    LOGIN_RATE_LIMIT_PERIOD_SECONDS: int = 300
+    RECOVERY_RATE_LIMIT_PER_IP: int = 5
+    RECOVERY_RATE_LIMIT_PER_EMAIL: int = 3
+    RECOVERY_RATE_LIMIT_PERIOD_SECONDS: int = 3600
+    MAIL_QUEUE_ENABLED: bool = True
+    MAIL_QUEUE_BATCH_SIZE: int = 20
+    MAIL_MAX_ATTEMPTS: int = 5
+    MAIL_RETRY_BASE_SECONDS: int = 30
+    MAIL_SMTP_IDLE_SECONDS: int = 60
+    MAIL_SEND_TIMEOUT_SECONDS: int = 300
     database_url: str
     WEBHOOK_SECRET: str
     FRONTEND_URL:str
+    CUSTOMER_SEARCH_INDEX_TTL_SECONDS: int = 300
+    REFERENCE_DATA_CHECK_SECONDS: int = 5
+    SALES_ANALYTICS_CACHE_DAYS: int = 730
+    PRODUCT_ANALYTICS_CACHE_SIZE: int = 64
+    PRODUCT_ANALYTICS_TTL_SECONDS: int = 60
+    LOW_STOCK_JOB_ENABLED: bool = True
+    LOW_STOCK_REFRESH_SECONDS: int = 3600
+    LOW_STOCK_VELOCITY_DAYS: int = 30
+    LOW_STOCK_LEAD_TIME_DAYS: int = 3
+    LOW_STOCK_SAFETY_DAYS: int = 2
+    LOW_STOCK_COVER_DAYS: int = 14
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: int = 15
+    FAST_SERIALIZATION: bool = False  # Opt-in: listados serializados con pydantic-core en vez de jsonable_encoder
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    IDEMPOTENCY_LEASE_MINUTES: int = 5  # Tras este tiempo sin respuesta guardada, un reintento retoma la llave
+    METRICS_TOKEN: Optional[str] = None
+    SLOW_QUERY_THRESHOLD_MS: int = 500
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN: bool = False
+    DEBUG: bool = False
+    SQL_ECHO: bool = False
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""
+    LOG_JSON: bool = True
+    PROFILING_ENABLED: bool = True
+    PROFILING_MIN_INTERVAL_SECONDS: int = 30
+    PROFILING_STORE_SIZE: int = 20
     model_config = SettingsConfigDict(
         env_file=Path(__file__).resolve().parent.parent.parent / ".env"
     )
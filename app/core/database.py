@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session,sessionmaker,declarative_base
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from app.core.config import settings
 
 # Load enviroment variables
 load_dotenv()
@@ -10,7 +11,8 @@ load_dotenv()
 DATABASE_URL=os.getenv("DATABASE_URL")
 
 # Create Engine
-engine=create_engine(DATABASE_URL,echo=True)
+# El SQL solo se escribe al log con SQL_ECHO=true (o LOG_LEVELS=sqlalchemy.engine=INFO)
+engine=create_engine(DATABASE_URL,echo=settings.SQL_ECHO)
 
 # Create sessions factory
 SessionLocal = sessionmaker(bind=engine,class_=Session,expire_on_commit=False)
@@ -0,0 +1,109 @@
+import asyncio
+import itertools
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+import pytz
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Evento especial que se envía cuando un cliente se atrasó y perdió eventos
+RESYNC_EVENT = "resync"
+
+# Llave de Session.info con los eventos que esperan el commit diferido (ver run_idempotent)
+PENDING_EVENTS = "pending_events"
+
+
+class Subscriber:
+    """
+    Cliente suscrito al stream de eventos.
+    Cada suscriptor tiene su propia cola acotada: si el cliente consume más lento
+    de lo que se publican eventos, se descartan los más antiguos y se le pide
+    resincronizar en lugar de acumular memoria sin límite.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int, user_id: Optional[int] = None):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.user_id = user_id  # None = ve todos los eventos (admin)
+        self.dropped = 0
+
+    def accepts(self, event: Dict[str, Any]) -> bool:
+        if self.user_id is None:
+            return True
+        return event["data"].get("user_id") == self.user_id
+
+    def _offer(self, event: Dict[str, Any]) -> None:
+        # Se ejecuta dentro del event loop del suscriptor
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class EventBroker:
+    """
+    Pub/sub en proceso para notificar cambios de pedidos y ventas.
+    publish() es seguro desde los hilos del threadpool donde corren los
+    endpoints síncronos; la entrega se hace en el loop de cada suscriptor.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscriber] = set()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, user_id: Optional[int] = None) -> Subscriber:
+        subscriber = Subscriber(asyncio.get_running_loop(), self.max_queue, user_id=user_id)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        event = {
+            "id": next(self._ids),
+            "type": event_type,
+            "data": data,
+            "timestamp": datetime.now(pytz.timezone('America/Bogota')).isoformat()
+        }
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if not subscriber.accepts(event):
+                continue
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber._offer, event)
+            except RuntimeError:
+                # El loop del suscriptor ya se cerró
+                self.unsubscribe(subscriber)
+            except Exception as exc:
+                logger.warning(f"No se pudo entregar el evento {event_type}: {exc}")
+
+    def publish_after_commit(self, db, event_type: str, data: Dict[str, Any]) -> None:
+        """
+        Como publish(), para servicios que pueden correr con el commit
+        diferido: si la sesión lo está, el evento espera a que el llamador
+        confirme la transacción (y se descarta si hace rollback).
+        """
+        pending = db.info.get(PENDING_EVENTS)
+        if pending is None:
+            self.publish(event_type, data)
+        else:
+            pending.append((event_type, data))
+
+
+event_broker = EventBroker(max_queue=settings.EVENTS_QUEUE_SIZE)
@@ -0,0 +1,179 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, Type
+import pytz
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.events import PENDING_EVENTS, event_broker
+from app.models.idempotency.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def _now() -> datetime:
+    # Las fechas se guardan en hora de Colombia sin zona horaria. Sin microsegundos:
+    # claimed_at se compara por igualdad y DATETIME de MySQL no los guarda
+    return datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None, microsecond=0)
+
+
+def _request_hash(payload: Any) -> str:
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _lease_expired(record: IdempotencyKey, now: datetime) -> bool:
+    # Llaves anteriores al lease (claimed_at NULL) se tratan como vencidas
+    return record.claimed_at is None or record.claimed_at + timedelta(minutes=settings.IDEMPOTENCY_LEASE_MINUTES) <= now
+
+
+def _in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="La petición original con esta Idempotency-Key aún está en proceso"
+    )
+
+
+def _owned(db: Session, record_id: int, claim: datetime):
+    # La llave sin respuesta con la reserva que tomó esta petición
+    return db.query(IdempotencyKey).filter(
+        IdempotencyKey.id == record_id,
+        IdempotencyKey.claimed_at == claim,
+        IdempotencyKey.response_body.is_(None)
+    )
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    return Response(
+        content=record.response_body,
+        status_code=record.status_code,
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"}
+    )
+
+
+def run_idempotent(
+    db: Session,
+    key: Optional[str],
+    scope: str,
+    payload: Any,
+    action: Callable[[bool], Any],
+    schema: Type[BaseModel],
+    status_code: int = status.HTTP_200_OK
+):
+    """
+    Ejecuta la operación una sola vez por (Idempotency-Key, scope).
+    Un reintento con la misma llave y el mismo cuerpo recibe la respuesta
+    guardada sin volver a ejecutar la operación (ni descontar stock o abonos
+    dos veces). Sin llave se comporta como una llamada normal.
+
+    action(commit) recibe commit=False cuando hay llave: el servicio solo
+    hace flush y la respuesta se guarda en la misma transacción que la
+    operación, así que una llave sin respuesta siempre corresponde a una
+    operación que no se confirmó. Por eso se puede liberar si falla y, si
+    el worker murió, retomar al vencer la reserva (IDEMPOTENCY_LEASE_MINUTES).
+    Los eventos publicados con publish_after_commit salen después del commit.
+    """
+    if not key:
+        return action(True)
+
+    if len(key) > 255:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Idempotency-Key demasiado larga")
+
+    request_hash = _request_hash(payload)
+    now = _now()
+
+    record = db.query(IdempotencyKey).filter(
+        IdempotencyKey.key == key,
+        IdempotencyKey.scope == scope
+    ).first()
+
+    if record and record.expires_at <= now:
+        db.delete(record)
+        db.commit()
+        record = None
+
+    if record:
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="La Idempotency-Key ya se usó con una petición diferente"
+            )
+        if record.response_body is not None:
+            return _replay(record)
+        if not _lease_expired(record, now):
+            raise _in_progress()
+
+        # Retomamos la reserva vencida con un UPDATE condicionado al claimed_at
+        # leído: si dos reintentos llegan a la vez, solo uno lo actualiza
+        previous_claim = (
+            IdempotencyKey.claimed_at.is_(None) if record.claimed_at is None
+            else IdempotencyKey.claimed_at == record.claimed_at
+        )
+        taken = db.query(IdempotencyKey).filter(
+            IdempotencyKey.id == record.id,
+            IdempotencyKey.response_body.is_(None),
+            previous_claim
+        ).update({IdempotencyKey.claimed_at: now}, synchronize_session=False)
+        db.commit()
+        if not taken:
+            raise _in_progress()
+        record.claimed_at = now
+    else:
+        # Reservamos la llave antes de ejecutar: la restricción única evita que dos
+        # reintentos simultáneos ejecuten la operación a la vez
+        db.query(IdempotencyKey).filter(IdempotencyKey.expires_at <= now).delete(synchronize_session=False)
+        record = IdempotencyKey(
+            key=key,
+            scope=scope,
+            request_hash=request_hash,
+            claimed_at=now,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+        )
+        db.add(record)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise _in_progress()
+
+    claim = record.claimed_at
+    pending_events = db.info[PENDING_EVENTS] = []
+    try:
+        result = action(False)
+        content = schema.model_validate(result, from_attributes=True).model_dump(mode="json", by_alias=True)
+        response_body = json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+        # Solo se guarda si la reserva sigue siendo nuestra; si un reintento la
+        # retomó (lease vencido) esta ejecución se deshace con el rollback
+        stored = _owned(db, record.id, claim).update({
+            IdempotencyKey.status_code: status_code,
+            IdempotencyKey.response_body: response_body
+        }, synchronize_session=False)
+        if stored:
+            db.commit()
+    except Exception:
+        # Nada se confirmó: se libera la llave para que el cliente pueda reintentar.
+        # Si la liberación también falla, la reserva vence sola con el lease
+        db.rollback()
+        try:
+            _owned(db, record.id, claim).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+        raise
+    finally:
+        db.info.pop(PENDING_EVENTS, None)
+
+    if not stored:
+        db.rollback()
+        raise _in_progress()
+
+    for event_type, data in pending_events:
+        event_broker.publish(event_type, data)
+    return Response(content=response_body, status_code=status_code, media_type="application/json")
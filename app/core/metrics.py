@@ -0,0 +1,198 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.slow_queries import slow_query_log
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class RequestStats:
+    """Consultas SQL y tiempo de BD acumulados durante una petición."""
+
+    __slots__ = ("query_count", "db_time", "method", "scope")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.scope = scope or {}
+        self.method = self.scope.get("method", "")
+
+    @property
+    def route(self) -> str:
+        # Plantilla de la ruta (ej: /orders/{order_id}) para no crear una serie por cada ID;
+        # FastAPI la deja en el scope al resolver el endpoint
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+# Estadísticas de la petición en curso (se propaga al threadpool de los endpoints síncronos)
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # El último es +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _labels(**labels) -> str:
+    pairs = ",".join(f'{key}="{str(value).replace(chr(34), chr(39))}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+class MetricsRegistry:
+    """Métricas por ruta en memoria con exposición en formato Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self._queries: Dict[Tuple[str, str], Histogram] = {}
+        self._db_seconds: Dict[Tuple[str, str], float] = {}
+        self.queries_total = 0
+        self.db_seconds_total = 0.0
+
+    def record_query(self, duration: float) -> None:
+        with self._lock:
+            self.queries_total += 1
+            self.db_seconds_total += duration
+
+    def record_request(self, method: str, route: str, status: int, duration: float, stats: RequestStats) -> None:
+        with self._lock:
+            latency = self._latency.get((method, route, str(status)))
+            if latency is None:
+                latency = self._latency[(method, route, str(status))] = Histogram(LATENCY_BUCKETS)
+            latency.observe(duration)
+
+            queries = self._queries.get((method, route))
+            if queries is None:
+                queries = self._queries[(method, route)] = Histogram(QUERY_COUNT_BUCKETS)
+            queries.observe(stats.query_count)
+            self._db_seconds[(method, route)] = self._db_seconds.get((method, route), 0.0) + stats.db_time
+
+    def _render_histogram(self, lines: list, name: str, histogram: Histogram, labels: dict) -> None:
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {histogram.total}")
+        lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines.append("# HELP http_request_duration_seconds Latencia de las peticiones HTTP por ruta")
+            lines.append("# TYPE http_request_duration_seconds histogram")
+            for (method, route, status), histogram in sorted(self._latency.items()):
+                self._render_histogram(
+                    lines, "http_request_duration_seconds", histogram,
+                    {"method": method, "route": route, "status": status}
+                )
+
+            lines.append("# HELP http_request_db_queries Consultas SQL ejecutadas por petición")
+            lines.append("# TYPE http_request_db_queries histogram")
+            for (method, route), histogram in sorted(self._queries.items()):
+                self._render_histogram(lines, "http_request_db_queries", histogram, {"method": method, "route": route})
+
+            lines.append("# HELP http_request_db_seconds_total Tiempo total en la BD por ruta")
+            lines.append("# TYPE http_request_db_seconds_total counter")
+            for (method, route), seconds in sorted(self._db_seconds.items()):
+                lines.append(f"http_request_db_seconds_total{_labels(method=method, route=route)} {seconds}")
+
+            lines.append("# HELP db_queries_total Consultas SQL ejecutadas por el proceso")
+            lines.append("# TYPE db_queries_total counter")
+            lines.append(f"db_queries_total {self.queries_total}")
+            lines.append("# HELP db_query_seconds_total Tiempo total de consultas SQL del proceso")
+            lines.append("# TYPE db_query_seconds_total counter")
+            lines.append(f"db_query_seconds_total {self.db_seconds_total}")
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Cuenta consultas y tiempo de BD por petición usando los eventos del engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start_time"].pop()
+        duration = time.perf_counter() - started
+        metrics_registry.record_query(duration)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.query_count += 1
+            stats.db_time += duration
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            slow_query_log.record(conn, statement, parameters, executemany, duration, stats)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        # Una consulta fallida no llega a after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide latencia, número de consultas y tiempo de BD por
+    petición, los registra por plantilla de ruta (ej: /orders/{order_id}) y
+    agrega el header Server-Timing a la respuesta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                server_timing = (
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.query_count} queries", '
+                    f"app;dur={total_ms:.1f}"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_stats.reset(token)
+            metrics_registry.record_request(
+                stats.method,
+                stats.route,
+                status_code,
+                time.perf_counter() - started,
+                stats
+            )
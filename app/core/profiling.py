@@ -0,0 +1,222 @@
+import cProfile
+import functools
+import io
+import inspect
+import itertools
+import logging
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+from urllib.parse import parse_qs
+import pytz
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.security import get_user_from_token
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+PROFILE_STATUS_HEADER = b"x-profile-status"
+
+
+class ProfileSession:
+    def __init__(self, profile_id: int, method: str, path: str, user_id: int):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.user_id = user_id
+        self.profiler = cProfile.Profile()
+        self.created_at = datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None)
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "user_id": self.user_id,
+            "created_at": self.created_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "status_code": self.status_code,
+        }
+
+    def report(self, sort: str = "cumulative", limit: int = 60) -> str:
+        output = io.StringIO()
+        try:
+            stats = pstats.Stats(self.profiler, stream=output)
+        except TypeError:
+            # El endpoint no alcanzó a ejecutarse (ej: falló la validación)
+            return "Sin datos de perfil"
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+# Perfil activo de la petición en curso (se propaga al threadpool)
+current_profile: ContextVar[Optional[ProfileSession]] = ContextVar("current_profile", default=None)
+
+
+class ProfileStore:
+    """Últimos perfiles capturados y límite de frecuencia de captura."""
+
+    def __init__(self, maxlen: int):
+        self._lock = threading.Lock()
+        self._profiles: "OrderedDict[int, ProfileSession]" = OrderedDict()
+        self._maxlen = maxlen
+        self._ids = itertools.count(1)
+        self._last_started = 0.0
+        self._active = False
+
+    def try_start(self, method: str, path: str, user_id: int) -> Optional[ProfileSession]:
+        # Un solo perfil a la vez y como máximo uno cada PROFILING_MIN_INTERVAL_SECONDS
+        with self._lock:
+            now = time.monotonic()
+            if self._active or now - self._last_started < settings.PROFILING_MIN_INTERVAL_SECONDS:
+                return None
+            self._active = True
+            self._last_started = now
+            return ProfileSession(next(self._ids), method, path, user_id)
+
+    def finish(self, session: ProfileSession) -> None:
+        with self._lock:
+            self._active = False
+            self._profiles[session.id] = session
+            while len(self._profiles) > self._maxlen:
+                self._profiles.popitem(last=False)
+
+    def list(self):
+        with self._lock:
+            return [session.summary() for session in reversed(self._profiles.values())]
+
+    def get(self, profile_id: int) -> Optional[ProfileSession]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+profile_store = ProfileStore(settings.PROFILING_STORE_SIZE)
+
+
+def _profiled(call):
+    """
+    Envuelve el endpoint para perfilarlo en el hilo donde realmente corre:
+    cProfile solo ve el hilo en el que se activa y los endpoints síncronos
+    se ejecutan en el threadpool, no en el hilo del middleware.
+    """
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            session = current_profile.get()
+            if session is None:
+                return await call(*args, **kwargs)
+            # En endpoints async el perfil incluye otras tareas del event loop
+            session.profiler.enable()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                session.profiler.disable()
+        return async_wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        session = current_profile.get()
+        if session is None:
+            return call(*args, **kwargs)
+        return session.profiler.runcall(call, *args, **kwargs)
+    return wrapper
+
+
+def install_endpoint_profiling(app) -> None:
+    """Prepara todos los endpoints registrados para poder perfilarse bajo demanda."""
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(route.dependant.call, "__profiled__", False):
+            route.dependant.call = _profiled(route.dependant.call)
+            route.dependant.call.__profiled__ = True
+
+
+def _wants_profile(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_HEADER:
+            return value.strip().lower() in (b"1", b"true")
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("profile", [""])[0].lower() in ("1", "true")
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" else None
+    return None
+
+
+def _admin_user_id(token: Optional[str]) -> Optional[int]:
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(db, token)
+        if user is None or not user.is_active or user.rol != "admin":
+            return None
+        return user.id
+    finally:
+        db.close()
+
+
+class ProfilingMiddleware:
+    """
+    Perfila la petición con cProfile cuando un admin envía X-Profile: 1 (o
+    ?profile=1). El perfil se guarda en memoria y su id se retorna en el
+    header X-Profile-Id; se consulta en /admin/profiles/{id}.
+    Para cualquier otra petición el costo es revisar los headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        user_id = await run_in_threadpool(_admin_user_id, _bearer_token(scope))
+        if user_id is None:
+            # No se revela la existencia del perfilador a usuarios que no son admin
+            await self.app(scope, receive, send)
+            return
+
+        session = profile_store.try_start(scope.get("method", ""), scope.get("path", ""), user_id)
+        if session is None:
+            await self.app(scope, receive, self._with_headers(send, [(PROFILE_STATUS_HEADER, b"rate-limited")]))
+            return
+
+        token = current_profile.set(session)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                session.status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, self._with_headers(send_wrapper, [
+                (PROFILE_ID_HEADER, str(session.id).encode("latin-1")),
+                (PROFILE_STATUS_HEADER, b"captured"),
+            ]))
+        finally:
+            current_profile.reset(token)
+            session.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            profile_store.finish(session)
+            logger.info("Perfil %s capturado para %s %s", session.id, session.method, session.path)
+
+    @staticmethod
+    def _with_headers(send, extra_headers):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + extra_headers}
+            await send(message)
+        return send_wrapper
@@ -0,0 +1,144 @@
+import logging
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from app.core.config import settings
+
+try:
+    import redis
+except ImportError:  # redis es opcional: sin él solo se usa el backend en memoria
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryBucketBackend:
+    """Token buckets en memoria del proceso (cada worker lleva su propia cuenta)."""
+
+    # Cada cuántas llamadas se limpian los buckets que ya se rellenaron
+    CLEANUP_EVERY = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> (tokens, última actualización, momento en que el bucket vuelve a estar lleno)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._calls = 0
+
+    def consume(self, key: str, capacity: int, refill_per_second: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill_per_second)
+
+            self._calls += 1
+            if self._calls >= self.CLEANUP_EVERY:
+                self._calls = 0
+                # Un bucket que ya se rellenó equivale a uno nuevo: se descarta
+                for stale in [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+                    del self._buckets[stale]
+
+        retry_after = 0.0 if allowed else (1 - tokens) / refill_per_second
+        return allowed, retry_after
+
+
+class RedisBucketBackend:
+    """Token buckets compartidos entre workers/servidores (script atómico en Redis)."""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def consume(self, key: str, capacity: int, refill_per_second: float) -> Tuple[bool, float]:
+        allowed, tokens = self._script(
+            keys=[f"ratelimit:{key}"],
+            args=[capacity, refill_per_second, time.time()]
+        )
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (1 - tokens) / refill_per_second
+
+
+def _create_backend():
+    if settings.RATE_LIMIT_REDIS_URL:
+        if redis is None:
+            logger.warning("RATE_LIMIT_REDIS_URL está configurado pero redis no está instalado; se usa memoria")
+        else:
+            return RedisBucketBackend(settings.RATE_LIMIT_REDIS_URL)
+    return InMemoryBucketBackend()
+
+
+_backend = _create_backend()
+
+
+class RateLimit:
+    """
+    Límite de token bucket: hasta `capacity` intentos seguidos, que se
+    recuperan de forma continua a lo largo de `period_seconds`.
+    """
+
+    def __init__(self, name: str, capacity: int, period_seconds: int):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = capacity / period_seconds
+
+    def hit(self, identifier: str) -> Tuple[bool, float]:
+        if not settings.RATE_LIMIT_ENABLED:
+            return True, 0.0
+        try:
+            return _backend.consume(f"{self.name}:{identifier}", self.capacity, self.refill_per_second)
+        except Exception as exc:
+            # Si el backend compartido falla no se bloquea el login
+            logger.warning("Rate limiter no disponible (%s): %s", self.name, exc)
+            return True, 0.0
+
+    def check(self, identifier: str) -> None:
+        """Lanza 429 con Retry-After si se agotó el bucket de este identificador."""
+        allowed, retry_after = self.hit(identifier)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Demasiados intentos, intenta de nuevo más tarde",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+
+def client_ip(request: Request) -> str:
+    """
+    IP del cliente. Detrás de proxies, cada uno agrega al final de
+    X-Forwarded-For la IP que le habló: la entrada que agregó el proxy de
+    confianza más externo es la N-ésima desde la derecha (N =
+    RATE_LIMIT_PROXY_HOPS). Las de más a la izquierda las manda el cliente
+    y no se usan, porque puede inventarlas en cada intento.
+    """
+    if settings.RATE_LIMIT_TRUST_PROXY and settings.RATE_LIMIT_PROXY_HOPS > 0:
+        forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if len(forwarded) >= settings.RATE_LIMIT_PROXY_HOPS:
+            return forwarded[-settings.RATE_LIMIT_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+def normalize_identifier(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
+from sqlalchemy import inspect, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.reference_data.models import ReferenceDataVersion
+
+logger = logging.getLogger(__name__)
+
+
+def read_version(db: Session, name: str) -> int:
+    return db.query(ReferenceDataVersion.version).filter(ReferenceDataVersion.name == name).scalar() or 0
+
+
+def bump_version(db: Session, name: str) -> None:
+    """Incrementa la versión dentro de la transacción del llamador (no hace commit)."""
+    bumped = db.execute(
+        update(ReferenceDataVersion)
+        .where(ReferenceDataVersion.name == name)
+        .values(version=ReferenceDataVersion.version + 1)
+    ).rowcount
+    if not bumped:
+        db.add(ReferenceDataVersion(name=name, version=1))
+
+
+class ReferenceSnapshot:
+    """Copia inmutable de una tabla de referencia en una versión dada."""
+
+    __slots__ = ("version", "items", "by_id")
+
+    def __init__(self, version: int, items):
+        self.version = version
+        self.items: Tuple[Any, ...] = tuple(items)
+        self.by_id: Mapping[int, Any] = MappingProxyType({item.id: item for item in self.items})
+
+
+class ReferenceData:
+    """
+    Tabla pequeña y casi estática (categorías, servicios) servida desde memoria.
+
+    Las lecturas usan el snapshot actual sin consultar la BD; como máximo cada
+    REFERENCE_DATA_CHECK_SECONDS se lee la fila de reference_data_versions
+    para detectar cambios hechos por otros workers. Las escrituras deben
+    confirmarse con commit(db), que incrementa la versión en la misma
+    transacción y reemplaza el snapshot de este proceso.
+
+    Los objetos del snapshot están desligados de cualquier sesión y son
+    compartidos entre hilos: no se deben modificar.
+    """
+
+    def __init__(self, name: str, model):
+        self.name = name
+        self.model = model
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._checked_at = 0.0
+
+    def _fresh(self) -> bool:
+        return (
+            self._snapshot is not None
+            and time.monotonic() - self._checked_at < settings.REFERENCE_DATA_CHECK_SECONDS
+        )
+
+    def snapshot(self, db: Session) -> ReferenceSnapshot:
+        if self._fresh():
+            return self._snapshot
+        with self._lock:
+            if not self._fresh():
+                self._reload(db)
+            return self._snapshot
+
+    def _reload(self, db: Session, force: bool = False) -> None:
+        # Sesión propia sobre el mismo engine: los objetos quedan desligados y
+        # no se mezclan con los de la petición
+        with Session(bind=db.get_bind()) as loader:
+            version = read_version(loader, self.name)
+            # La versión se lee antes que los datos: si cambian en medio, la
+            # siguiente revisión verá una versión nueva y volverá a cargar
+            if force or self._snapshot is None or self._snapshot.version != version:
+                items = loader.query(self.model).order_by(self.model.id).all()
+                # Swap atómico: los lectores ven el snapshot anterior o el nuevo, nunca uno a medias
+                self._snapshot = ReferenceSnapshot(version, items)
+                logger.info("Datos de referencia '%s' cargados (versión %s, %s registros)", self.name, version, len(items))
+        self._checked_at = time.monotonic()
+
+    def load(self, db: Session) -> None:
+        """Carga inicial (al arrancar la app)."""
+        with self._lock:
+            self._reload(db, force=True)
+
+    def commit(self, db: Session) -> None:
+        """Confirma un cambio sobre la tabla e invalida los snapshots de todos los workers."""
+        bump_version(db, self.name)
+        db.commit()
+        with self._lock:
+            self._reload(db, force=True)
+
+    def all(self, db: Session):
+        return list(self.snapshot(db).items)
+
+    def get(self, db: Session, item_id: int):
+        return self.snapshot(db).by_id.get(item_id)
+
+    def prime(self, db: Session) -> None:
+        """
+        Agrega los objetos del snapshot a la sesión sin consultar la BD, para
+        que las relaciones muchos-a-uno hacia esta tabla se resuelvan desde el
+        identity map (ej: Product.category).
+        """
+        for item in self.snapshot(db).items:
+            if inspect(item).key in db.identity_map:
+                continue
+            db.merge(item, load=False)
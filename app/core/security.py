@@ -24,6 +24,7 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Esquema OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
 # Almacenamiento en memoria para tokens invalidados (solo para desarrollo)
 invalidated_tokens = set()
@@ -60,6 +61,22 @@ def authenticate_user(db: Session, full_name: str, password: str):
         return False
     return user
 
+def get_user_from_token(db: Session, token: Optional[str]) -> Optional[User]:
+    """Retorna el usuario dueño del token o None si el token no es válido"""
+    # Verificar si el token está invalidado
+    if not token or is_token_invalidated(token):
+        return None
+    
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        full_name: str = payload.get("sub")
+        if full_name is None:
+            return None
+    except JWTError:
+        return None
+    
+    return db.query(User).filter(User.full_name == full_name).first()
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -70,19 +87,7 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    # Verificar si el token está invalidado
-    if is_token_invalidated(token):
-        raise credentials_exception
-    
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        full_name: str = payload.get("sub")
-        if full_name is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.full_name == full_name).first()
+    user = get_user_from_token(db, token)
     if user is None:
         raise credentials_exception
     return user
@@ -92,4 +97,11 @@ async def get_current_active_user(
 ):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.rol != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return current_user
@@ -0,0 +1,52 @@
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa el encoder estándar
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Respuesta JSON que usa orjson cuando está instalado.
+    Útil para endpoints que retornan diccionarios grandes (reportes).
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS, default=_orjson_default)
+
+
+def _orjson_default(value: Any):
+    # Decimal y modelos de Pydantic no son nativos de orjson
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter de List[schema] compilado una sola vez por esquema."""
+    return TypeAdapter(List[schema])
+
+
+def serialize_list(schema: Type[BaseModel], items: Iterable[Any]):
+    """
+    Camino rápido para listas grandes: convierte cada objeto ORM al esquema
+    una sola vez y lo serializa directamente a JSON (pydantic-core), evitando
+    la validación del response_model + jsonable + json.dumps de FastAPI.
+    El response_model del endpoint se mantiene para la documentación.
+    """
+    if not settings.FAST_SERIALIZATION:
+        return items
+    adapter = list_adapter(schema)
+    models = adapter.validate_python(list(items), from_attributes=True)
+    return Response(content=adapter.dump_json(models), media_type="application/json")
@@ -0,0 +1,115 @@
+import logging
+import threading
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+import pytz
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_STATEMENT_LENGTH = 4000
+MAX_EXPLAINED_STATEMENTS = 500
+
+
+def _redact_value(value: Any) -> Any:
+    # Números y fechas ayudan a reproducir el plan; los textos pueden ser
+    # correos, hashes o nombres de clientes y nunca se guardan
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: _redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_parameters(value) if isinstance(value, (dict, list, tuple)) else _redact_value(value)
+                for value in parameters]
+    return _redact_value(parameters)
+
+
+class SlowQueryLog:
+    """
+    Registro en memoria de las consultas que superan SLOW_QUERY_THRESHOLD_MS.
+    Guarda las últimas SLOW_QUERY_LOG_SIZE en un buffer circular con la ruta
+    que las originó y, si SLOW_QUERY_EXPLAIN está activo, el plan de EXPLAIN
+    de la primera vez que aparece cada sentencia.
+    """
+
+    def __init__(self, maxlen: int):
+        self._lock = threading.Lock()
+        self._entries: deque = deque(maxlen=maxlen)
+        self._plans: Dict[str, Optional[List[Any]]] = {}
+
+    def record(self, conn, statement: str, parameters: Any, executemany: bool, duration: float, stats=None) -> None:
+        with self._lock:
+            first_seen = statement not in self._plans
+            if first_seen:
+                if len(self._plans) >= MAX_EXPLAINED_STATEMENTS:
+                    self._plans.clear()
+                # Se reserva antes de ejecutar EXPLAIN para no repetirlo en paralelo
+                self._plans[statement] = None
+
+        plan = None
+        if first_seen and settings.SLOW_QUERY_EXPLAIN and not executemany:
+            plan = self._explain(conn, statement, parameters)
+            with self._lock:
+                self._plans[statement] = plan
+
+        entry = {
+            "timestamp": datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None).isoformat(),
+            "duration_ms": round(duration * 1000, 2),
+            "statement": statement[:MAX_STATEMENT_LENGTH],
+            "parameters": redact_parameters(parameters),
+            "method": stats.method if stats is not None else None,
+            "route": stats.route if stats is not None else None,
+            "first_seen": first_seen,
+            "explain": plan,
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+        logger.warning(
+            "Consulta lenta (%.1f ms) en %s %s: %s",
+            entry["duration_ms"], entry["method"] or "-", entry["route"] or "-",
+            entry["statement"][:200]
+        )
+
+    @staticmethod
+    def _explain(conn, statement: str, parameters: Any) -> Optional[List[Any]]:
+        if not statement.lstrip().upper().startswith("SELECT"):
+            return None
+        # Cursor DBAPI directo: no pasa por los eventos del engine ni por la sesión
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN {statement}", parameters)
+            columns = [column[0] for column in cursor.description or []]
+            return [dict(zip(columns, [str(value) if value is not None else None for value in row]))
+                    for row in cursor.fetchall()]
+        except Exception as exc:
+            logger.warning("No se pudo ejecutar EXPLAIN sobre la consulta lenta: %s", exc)
+            return None
+        finally:
+            cursor.close()
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()  # Más recientes primero
+        return entries[:limit] if limit else entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_LOG_SIZE)
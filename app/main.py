@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.responses import JSONResponse
+from sqlalchemy.orm.exc import StaleDataError
 import logging
 
 from app.api.auth.routers import auth_router
@@ -14,7 +15,20 @@ from app.api.store.debt.api import debts_router
 from app.api.store.orders.orders import orders_router
 from app.api.store.returns.api import returns_router
 from app.api.store.services.router import services_router
+from app.api.store.events.api import events_router
+from app.api.store.sync.api import sync_router
 from app.api.github_deploy import webhook_router
+from app.api.metrics import metrics_router
+from app.api.admin.api import admin_router
+from app.core.database import SessionLocal, engine
+from app.core.config import settings
+from app.core.logging_config import RequestIdMiddleware, setup_logging
+from app.core.metrics import MetricsMiddleware, instrument_engine
+from app.core.profiling import ProfilingMiddleware, install_endpoint_profiling
+from app.services.store.products.categories import category_cache
+from app.services.store.services.services import services_data
+from app.services.auth.mail_queue import mail_worker
+from app.services.store.products.stock_levels import stock_levels_job
 
 # Middleware para evitar el cache en Swagger y ReDoc
 class NoCacheMiddleware(BaseHTTPMiddleware):
@@ -25,15 +39,12 @@ class NoCacheMiddleware(BaseHTTPMiddleware):
         response.headers['Expires'] = '0'
         return response
 
-# Configuración de logging detallada
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Logging estructurado: niveles desde settings y escritura fuera del camino de la petición
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Crear la aplicación FastAPI
-app = FastAPI(title="Tienda Online API", debug=True)
+app = FastAPI(title="Tienda Online API", debug=settings.DEBUG)
 
 # 🌍 CORS
 ALLOWED_ORIGINS = [
@@ -47,17 +58,69 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
     allow_methods=["*"],
-    allow_headers=["Authorization", "Content-Type"],
+    allow_headers=["Authorization", "Content-Type", "Idempotency-Key", "If-Match", "X-Request-ID"],
+    expose_headers=["Idempotent-Replayed", "ETag", "X-Request-ID", "Server-Timing"],
     allow_credentials=True
 )
 
 # Middleware para evitar cache
 app.add_middleware(NoCacheMiddleware)
 
+# Métricas de latencia y consultas SQL por ruta (se agrega al final para envolver a los demás)
+instrument_engine(engine)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
+# Perfilado bajo demanda para admins (X-Profile: 1 o ?profile=1)
+app.add_middleware(ProfilingMiddleware)
+
+# Precarga de las tablas de referencia (categorías y servicios) en memoria
+@app.on_event("startup")
+def load_reference_data():
+    db = SessionLocal()
+    try:
+        for reference in (category_cache, services_data):
+            try:
+                reference.load(db)
+            except Exception as exc:
+                # Sin BD al arrancar se cargan en la primera lectura
+                logger.warning("No se pudieron precargar los datos de referencia '%s': %s", reference.name, exc)
+    finally:
+        db.close()
+
+# Worker de la cola de correos salientes
+@app.on_event("startup")
+async def start_mail_worker():
+    if settings.MAIL_QUEUE_ENABLED:
+        mail_worker.start()
+
+@app.on_event("shutdown")
+async def stop_mail_worker():
+    await mail_worker.stop()
+
+# Recalculo periódico de los niveles de reorden (stock bajo)
+@app.on_event("startup")
+async def start_stock_levels_job():
+    if settings.LOW_STOCK_JOB_ENABLED:
+        stock_levels_job.start()
+
+@app.on_event("shutdown")
+async def stop_stock_levels_job():
+    await stock_levels_job.stop()
+
+# Otra petición guardó el registro entre la lectura y el UPDATE (version_id_col)
+@app.exception_handler(StaleDataError)
+async def stale_data_exception_handler(request, exc):
+    logger.info("Conflicto de versión: %s", exc)
+    return JSONResponse(
+        status_code=412,
+        content={"detail": "El registro fue modificado por otra persona; recarga e intenta de nuevo"}
+    )
+
 # Manejador de excepciones global
 @app.exception_handler(Exception)
 async def validation_exception_handler(request, exc):
-    logger.error(f"Error al procesar la solicitud: {exc}")
+    logger.error("Error al procesar la solicitud: %s", exc, exc_info=exc)
     return JSONResponse(
         status_code=500,
         content={"message": "Internal server error"}
@@ -75,4 +138,11 @@ app.include_router(sales_router)
 app.include_router(debts_router)
 app.include_router(returns_router)
 app.include_router(services_router)
+app.include_router(events_router)
+app.include_router(sync_router)
 app.include_router(webhook_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
+
+# Debe ir después de registrar todos los routers
+install_endpoint_profiling(app)
@@ -1,5 +1,9 @@
+from app.models.idempotency import IdempotencyKey
+from app.models.mail import OutboundEmail
+from app.models.reference_data import ReferenceDataVersion
 from app.models.store.customers import Customer
 from app.models.store.debt import Debt
+from app.models.store.inventory import ProductStockLevel, StockMovement, StockSnapshot
 from app.models.store.orders import Order, OrderItem
 from app.models.store.products import Product
 from app.models.store.returns import Return
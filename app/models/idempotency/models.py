@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from datetime import datetime
+from app.core.database import Base
+import pytz
+
+
+# 🔁 Respuestas guardadas para reintentos con Idempotency-Key
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(255), nullable=False)
+    scope = Column(String(100), nullable=False)  # Endpoint + dueño de la llave (ej: "sales:3")
+    request_hash = Column(String(64), nullable=False)  # SHA-256 del cuerpo de la petición
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)  # None mientras la petición original está en proceso
+    created_at = Column(DateTime, default=lambda: datetime.now(pytz.timezone('America/Bogota')))
+    claimed_at = Column(DateTime, nullable=True)  # Inicio de la reserva vigente (lease de IDEMPOTENCY_LEASE_MINUTES)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("key", "scope", name="uq_idempotency_keys_key_scope"),
+    )
@@ -0,0 +1 @@
+from .models import OutboundEmail
\ No newline at end of file
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from app.core.database import Base
+import pytz
+
+
+# ✉️ Cola persistente de correos salientes (la envía el worker de app.services.auth.mail_queue)
+class OutboundEmail(Base):
+    __tablename__ = "outbound_emails"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)  # HTML ya renderizado
+    status = Column(String(20), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)  # Próximo intento (o vencimiento del envío en curso)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(pytz.timezone('America/Bogota')))
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbound_emails_status_next_attempt", "status", "next_attempt_at"),
+    )
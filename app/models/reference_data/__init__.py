@@ -0,0 +1 @@
+from .models import ReferenceDataVersion
\ No newline at end of file
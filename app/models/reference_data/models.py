@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+import pytz
+
+
+# 🗂 Versión de cada tabla de referencia (categorías, servicios) para invalidar los snapshots en memoria de todos los workers
+class ReferenceDataVersion(Base):
+    __tablename__ = "reference_data_versions"
+
+    name = Column(String(50), primary_key=True)  # Ej: "categories"
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime,
+        default=lambda: datetime.now(pytz.timezone('America/Bogota')),
+        onupdate=lambda: datetime.now(pytz.timezone('America/Bogota'))
+    )
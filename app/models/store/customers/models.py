@@ -8,7 +8,7 @@ class Customer(Base):
 
     id= Column(Integer(),primary_key=True,index=True)
     name=Column(String(50),nullable=False,index=True)
-    cc = Column(Integer(),nullable=False)
+    cc = Column(Integer(),nullable=False,index=True)
     alias = Column(String(50),nullable=True,index=True)
     avatar=Column(String(50),nullable=True,index=True)
     phone = Column(String(20), nullable=True)  # Cambiado a String
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Text, Enum, String
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, DateTime, Text, Enum, String
 from datetime import datetime
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -14,9 +14,12 @@ class Debt(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, unique=True)
-    current_balance = Column(Float, default=0.0, nullable=False)  # Saldo actual
+    current_balance = Column(Numeric(12, 2), default=0, nullable=False)  # Saldo actual
     created_at = Column(DateTime, default=lambda: datetime.now(pytz.timezone('America/Bogota')))
     updated_at = Column(DateTime, default=lambda: datetime.now(pytz.timezone('America/Bogota')))
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Control de concurrencia optimista (ETag)
+
+    __mapper_args__ = {"version_id_col": version}
     
     # Relación con movimientos
     movements = relationship("DebtMovement", back_populates="debt", order_by="DebtMovement.movement_date.desc()")
@@ -27,7 +30,7 @@ class DebtMovement(Base):
     id = Column(Integer, primary_key=True, index=True)
     debt_id = Column(Integer, ForeignKey("debts.id"), nullable=False)
     movement_type = Column(Enum(MovementType), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
     movement_date = Column(DateTime, default=lambda: datetime.now(pytz.timezone('America/Bogota')))
     description = Column(String(255))
     notes = Column(Text)
@@ -0,0 +1 @@
+from .models import ProductStockLevel, StockMovement, StockMovementReason, StockSnapshot
@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, DateTime, Date, Enum, Index
+from enum import Enum as PyEnum
+from datetime import datetime
+from app.core.database import Base
+import pytz
+
+
+# 📉 Nivel de reorden por producto (lo recalcula el job de app.services.store.products.stock_levels)
+class ProductStockLevel(Base):
+    __tablename__ = "product_stock_levels"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    daily_velocity = Column(Numeric(12, 3), nullable=False, default=0)  # Unidades vendidas por día en la ventana
+    reorder_point = Column(Numeric(12, 2), nullable=False, default=0)  # Stock con el que hay que pedir
+    target_stock = Column(Numeric(12, 2), nullable=False, default=0)  # Stock al que se debe reponer
+    computed_at = Column(DateTime, nullable=False)
+
+
+class StockMovementReason(PyEnum):
+    INITIAL = "INITIAL"            # Stock con el que se creó el producto
+    SALE = "SALE"                  # Descuento al facturar un pedido
+    SALE_DELETED = "SALE_DELETED"  # Devolución al stock al borrar una venta
+    RESTOCK = "RESTOCK"            # add-stock
+    REMOVAL = "REMOVAL"            # remove-stock
+    ADJUSTMENT = "ADJUSTMENT"      # Stock sobrescrito al editar el producto
+
+
+# 📒 Libro de movimientos de stock (solo se insertan filas, en la misma transacción que el cambio)
+class StockMovement(Base):
+    __tablename__ = "stock_movements"
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Numeric(12, 3), nullable=False)  # Positivo entra, negativo sale
+    stock_after = Column(Numeric(12, 3), nullable=True)  # Stock resultante, cuando se conoce
+    reason = Column(Enum(StockMovementReason), nullable=False)
+    order_id = Column(Integer, nullable=True)  # Pedido de la venta (sin FK: el pedido se puede borrar)
+    created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(pytz.timezone('America/Bogota')))
+
+    __table_args__ = (
+        Index("ix_stock_movements_product_created", "product_id", "created_at"),
+        Index("ix_stock_movements_created", "created_at"),
+    )
+
+
+# 📸 Stock de cada producto al cierre de un día (punto de partida para reconstruir el historial)
+class StockSnapshot(Base):
+    __tablename__ = "stock_snapshots"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    stock = Column(Numeric(12, 3), nullable=False)
+
+    __table_args__ = (
+        Index("ix_stock_snapshots_day", "day"),
+    )
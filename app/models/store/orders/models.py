@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime,Numeric
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime,Numeric, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
@@ -15,6 +15,21 @@ class Order(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # ID del usuario que creó el pedido
     date = Column(DateTime, default=lambda: datetime.now(pytz.timezone('America/Bogota')))  # Fecha de la devolución ajustada a Colombia
     status = Column(String(20), default="pending")  # Puede ser: "pending", "confirmed", "canceled"
+    updated_at = Column(
+        DateTime,
+        default=lambda: datetime.now(pytz.timezone('America/Bogota')),
+        onupdate=lambda: datetime.now(pytz.timezone('America/Bogota')),
+        index=True
+    )  # Última modificación (usado para el polling del tablero)
+    client_uuid = Column(String(36), nullable=True)  # UUID generado por la app móvil (sincronización offline)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Control de concurrencia optimista (ETag)
+
+    __table_args__ = (
+        Index("ix_orders_status_date", "status", "date"),
+        Index("ix_orders_date", "date"),
+        UniqueConstraint("client_uuid", name="uq_orders_client_uuid"),
+    )
+    __mapper_args__ = {"version_id_col": version}
 
     # Relaciones
     customer = relationship(Customer, backref="orders")  # Relación con Customer
@@ -29,8 +44,8 @@ class OrderItem(Base):
     order_id = Column(Integer, ForeignKey("orders.id"))
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Numeric(7,3), nullable=False)
-    price_unit = Column(Float, nullable=False)
-    subtotal = Column(Float, nullable=False)
+    price_unit = Column(Numeric(12, 2), nullable=False)
+    subtotal = Column(Numeric(12, 2), nullable=False)
 
     # Relaciones
     order = relationship("Order", back_populates="items")  # Relación con Order
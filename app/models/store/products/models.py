@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, Float, ForeignKey, Boolean, Numeric
+from sqlalchemy import Column, String, Integer, Text, ForeignKey, Boolean, Numeric
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from sqlalchemy import Enum
@@ -28,9 +28,9 @@ class Product(Base):
     id = Column(Integer(), primary_key=True, index=True)
     name = Column(String(255), nullable=True, index=True)
     state = Column(Boolean(), default=True)
-    purchase_price = Column(Float(), nullable=True)
-    stock = Column(Numeric(10, 2), nullable=True, default=0)    
-    sale_price = Column(Float(), nullable=True)
+    purchase_price = Column(Numeric(12, 2), nullable=True)
+    stock = Column(Numeric(12, 3), nullable=True, default=0)  # Misma escala que el libro de movimientos y las cantidades de los pedidos
+    sale_price = Column(Numeric(12, 2), nullable=True)
     profit_percentage = Column(Numeric(5,2), nullable=True, default=30.00)
     image_url = Column(String(255), nullable=True)  # 🖼 Aquí se guarda la URL de la imagen
     category_id = Column(Integer(), ForeignKey("categories.id"))
@@ -38,3 +38,6 @@ class Product(Base):
     # Relación
     category = relationship("Category", backref="products")
     unit = Column(Enum(UnidadMedidaEnum), nullable=False, default=UnidadMedidaEnum.und)
+    version = Column(Integer(), nullable=False, default=1, server_default="1")  # Control de concurrencia optimista (ETag)
+
+    __mapper_args__ = {"version_id_col": version}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
@@ -13,9 +13,13 @@ class Sale(Base):
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"), unique=True)
     date = Column(DateTime, default=lambda: datetime.now(pytz.timezone('America/Bogota')))  # Fecha de la devolución ajustada a Colombia
-    transfer_payment = Column(Float, default=0.0, nullable=True)
-    total = Column(Float, default=0.0)
-    balance = Column(Float, default=0.0)
+    transfer_payment = Column(Numeric(12, 2), default=0, nullable=True)
+    total = Column(Numeric(12, 2), default=0)
+    balance = Column(Numeric(12, 2), default=0)
+
+    __table_args__ = (
+        Index("ix_sales_date", "date"),  # Consultas y analítica por rango de fechas
+    )
 
     # Relaciones
     order = relationship(Order, backref="sale")
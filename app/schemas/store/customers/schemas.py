@@ -1,5 +1,7 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
+from datetime import datetime
+from decimal import Decimal
 
 # Esquema base con los campos comunes
 class CustomerBase(BaseModel):
@@ -34,3 +36,39 @@ class CustomerOut(CustomerBase):
 
     class Config:
         from_attributes = True
+
+
+# Esquemas para el resumen 360 del cliente
+class CustomerSaleBrief(BaseModel):
+    id: int
+    order_id: Optional[int] = None
+    date: datetime
+    total: float
+    transfer_payment: Optional[float] = 0.0
+    balance: Optional[float] = 0.0
+
+    class Config:
+        from_attributes = True
+
+class CustomerTopProduct(BaseModel):
+    product_id: int
+    product_name: Optional[str] = None
+    quantity: Decimal
+    revenue: float
+
+class CustomerDebtBrief(BaseModel):
+    debt_id: int
+    current_balance: float
+    updated_at: Optional[datetime] = None
+    last_movement_date: Optional[datetime] = None
+
+class CustomerSummary(BaseModel):
+    customer: CustomerOut
+    lifetime_revenue: float = 0.0
+    lifetime_balance: float = 0.0
+    sales_count: int = 0
+    last_sale_date: Optional[datetime] = None
+    orders_by_status: Dict[str, int] = {}
+    last_sales: List[CustomerSaleBrief] = []
+    top_products: List[CustomerTopProduct] = []
+    debt: Optional[CustomerDebtBrief] = None
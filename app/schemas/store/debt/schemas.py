@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
 from typing import Optional, List
+from decimal import Decimal
 from enum import Enum
 from app.models.store.debt.models import Debt,DebtMovement
 
@@ -17,7 +18,7 @@ class DebtBase(BaseModel):
 
 class DebtCreate(DebtBase):
     """Esquema para creación de deudas"""
-    initial_balance: float = Field(0.0, ge=0, description="Saldo inicial de la deuda")
+    initial_balance: Decimal = Field(Decimal("0"), ge=0, decimal_places=2, description="Saldo inicial de la deuda")
     
     model_config = ConfigDict(json_schema_extra={
         "example": {
@@ -29,9 +30,10 @@ class DebtCreate(DebtBase):
 # Añadir este esquema para actualización de deuda
 class DebtUpdate(BaseModel):
     """Esquema para actualización parcial de deuda"""
-    current_balance: Optional[float] = Field(
+    current_balance: Optional[Decimal] = Field(
         None, 
         ge=0, 
+        decimal_places=2,
         description="Nuevo saldo actual. Usar solo para correcciones"
     )
     description: Optional[str] = Field(
@@ -58,6 +60,7 @@ class DebtOut(DebtBase):
         None,
         description="Fecha del último movimiento registrado"
     )
+    version: Optional[int] = Field(None, description="Versión de la deuda (valor del ETag)")
     
     model_config = ConfigDict(from_attributes=True)
 # -------------------------
@@ -72,6 +75,8 @@ class MovementBase(BaseModel):
 
 class MovementCreate(MovementBase):
     """Esquema para creación de movimientos"""
+    amount: Decimal = Field(..., gt=0, decimal_places=2, description="Monto del movimiento")
+
     model_config = ConfigDict(json_schema_extra={
         "example": {
             "amount": 500.00,
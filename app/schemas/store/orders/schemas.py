@@ -1,7 +1,8 @@
 from decimal import Decimal
 from pydantic import BaseModel,Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from uuid import UUID
 from app.schemas.store.customers.schemas import CustomerOut
 from app.schemas.store.products.products import ProductOut
 from app.schemas.users.users import UserOut
@@ -10,18 +11,26 @@ from app.schemas.users.users import UserOut
 class OrderItemCreate(BaseModel):
     product_id: int
     quantity: Decimal = Field(max_digits=7, decimal_places=3)
-    price_unit: float
+    price_unit: Decimal
 
     class Config:
         from_attributes = True  # Esto permite que Pydantic use los datos del modelo ORM (SQLAlchemy)
 
 class OrderItemUpdate(BaseModel):
+    id: Optional[int] = None  # ID del item existente (si no se envía se empareja por product_id)
     product_id: Optional[int]
     quantity: Decimal = Field(max_digits=7, decimal_places=3)
-    price_unit: Optional[float]
+    price_unit: Optional[Decimal]
+
+# Esquema para editar un solo item del pedido
+class OrderItemPatch(BaseModel):
+    quantity: Optional[Decimal] = Field(None, max_digits=7, decimal_places=3)
+    price_unit: Optional[Decimal] = None
 
 # Esquema para Item del Pedido (OrderItem) en la respuesta
 class OrderItemOut(OrderItemCreate):
+    id: Optional[int] = None
+    price_unit: float
     subtotal: float  # Calculamos el subtotal del item
     product: ProductOut
     class Config:
@@ -44,6 +53,7 @@ class OrderOut(BaseModel):
     date: datetime  # Fecha del pedido (en formato string ISO)
     status: str  # Estado del pedido (puede ser: "pending", "confirmed", "canceled")
     items: List[OrderItemOut]  # Lista de items del pedido
+    version: Optional[int] = None  # Versión del pedido (valor del ETag)
 
     class Config:
         from_attributes = True  # Permite que se use la base de datos como fuente de datos
@@ -55,4 +65,39 @@ class OrderUpdate(BaseModel):
     items: Optional[List[OrderItemUpdate]] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+# Esquemas para el tablero de pedidos del día (proyección compacta)
+class OrderBoardItem(BaseModel):
+    id: int
+    status: Optional[str] = None
+    date: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    customer_name: Optional[str] = None
+    item_count: int = 0
+    total: float = 0.0
+
+class OrderBoard(BaseModel):
+    server_time: datetime  # Enviar como "since" en la siguiente consulta
+    counts: Dict[str, int]  # Pedidos del tablero por estado
+    orders: List[OrderBoardItem]  # Solo los modificados desde "since" (o todos)
+    order_ids: Optional[List[int]] = None  # IDs vigentes en el tablero (solo con "since", para detectar borrados)
+
+# Esquemas para la sincronización de pedidos creados sin conexión
+class SyncOrder(BaseModel):
+    client_uuid: UUID  # Generado en el dispositivo, se usa para descartar duplicados
+    customer_id: int
+    date: Optional[datetime] = None  # Fecha en que se tomó el pedido en el dispositivo
+    items: List[OrderItemCreate]
+
+class SyncOrdersRequest(BaseModel):
+    orders: List[SyncOrder] = Field(..., min_length=1, max_length=500)
+
+class SyncOrderResult(BaseModel):
+    client_uuid: UUID
+    id: int
+    duplicate: bool = False  # True si ya se había sincronizado antes
+
+class SyncOrdersResponse(BaseModel):
+    created: int
+    duplicates: int
+    orders: List[SyncOrderResult]
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from decimal import Decimal
 from app.models.store.products.models import UnidadMedidaEnum
 
 # 💕 CATEGORÍA (se mantiene igual)
@@ -23,10 +24,10 @@ class ResponseCategory(BaseModel):
 class CreateProduct(BaseModel):
     name: Optional[str] = None
     state: Optional[bool] = True
-    purchase_price: Optional[float] = None
+    purchase_price: Optional[Decimal] = None
     stock:  Optional[float] = None
-    sale_price: Optional[float] = None
-    profit_percentage: Optional[float] = 30.00
+    sale_price: Optional[Decimal] = None
+    profit_percentage: Optional[Decimal] = Decimal("30.00")
     image_url: Optional[str] = None
     category_id: Optional[int] = None
     unit: Optional[UnidadMedidaEnum] = UnidadMedidaEnum.und
@@ -37,10 +38,10 @@ class CreateProduct(BaseModel):
 class UpdateProduct(BaseModel):
     name: Optional[str] = None
     state: Optional[bool] = None
-    purchase_price: Optional[float] = None
+    purchase_price: Optional[Decimal] = None
     stock: Optional[float] = None  # Nuevo campo
-    sale_price: Optional[float] = None
-    profit_percentage: Optional[float] = None
+    sale_price: Optional[Decimal] = None
+    profit_percentage: Optional[Decimal] = None
     category_id: Optional[int] = None
     image_url: Optional[str] = None
     unit: Optional[UnidadMedidaEnum] = None
@@ -57,6 +58,7 @@ class ResponseProduct(BaseModel):
     unit: Optional[UnidadMedidaEnum] = None
     category_id: Optional[int] = None
     category: Optional[ResponseCategory] = None
+    version: Optional[int] = None  # Valor del ETag
 
     class Config:
         from_attributes = True
@@ -74,6 +76,7 @@ class ProductOut(BaseModel):
     category_id: Optional[int]
     category: Optional[ResponseCategory]
     unit: UnidadMedidaEnum
+    version: Optional[int] = None  # Valor del ETag
 
     class Config:
         from_attributes = True
@@ -1,13 +1,14 @@
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
+from decimal import Decimal
 from app.schemas.store.orders.schemas import OrderOut
 
 # 💸 VENTA (SALE)
 class SaleCreate(BaseModel):
     order_id: int
-    transfer_payment: Optional[float] = 0.0
-    balance: Optional[float] = 0.0
+    transfer_payment: Optional[Decimal] = Decimal("0")
+    balance: Optional[Decimal] = Decimal("0")
 
     class Config:
         from_attributes = True
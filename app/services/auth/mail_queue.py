@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import List, Optional
+import aiosmtplib
+import pytz
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.mail.models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    # Las fechas se guardan en hora de Colombia sin zona horaria
+    return datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    # Backoff exponencial: 30s, 1m, 2m, 4m... con tope de una hora
+    return timedelta(seconds=min(settings.MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600))
+
+
+class MailQueueWorker:
+    """
+    Worker asyncio que envía los correos de outbound_emails.
+
+    Reutiliza una sola conexión SMTP entre mensajes (se cierra tras
+    MAIL_SMTP_IDLE_SECONDS sin envíos), reintenta con backoff exponencial
+    hasta MAIL_MAX_ATTEMPTS y reclama los correos con SKIP LOCKED, así que
+    puede correr en todos los workers de uvicorn a la vez. Un correo que
+    queda en "sending" por una caída se reintenta cuando vence su plazo.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._disconnect()
+
+    def notify(self) -> None:
+        """Despierta al worker; se puede llamar desde el threadpool."""
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # El loop ya se cerró
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                batch = await run_in_threadpool(self._claim_batch)
+            except Exception as exc:
+                logger.error("No se pudo leer la cola de correos: %s", exc)
+                batch = []
+
+            for email in batch:
+                await self._deliver(email)
+
+            if len(batch) == settings.MAIL_QUEUE_BATCH_SIZE:
+                continue  # Hay más correos pendientes
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.MAIL_SMTP_IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                # Sin actividad: se libera la conexión SMTP y se revisan reintentos vencidos
+                await self._disconnect()
+            self._wakeup.clear()
+
+    def _claim_batch(self) -> List[dict]:
+        db: Session = SessionLocal()
+        try:
+            now = _now()
+            emails = (
+                db.query(OutboundEmail)
+                .filter(
+                    OutboundEmail.status.in_(("pending", "sending")),
+                    OutboundEmail.next_attempt_at <= now
+                )
+                .order_by(OutboundEmail.next_attempt_at)
+                .limit(settings.MAIL_QUEUE_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            claimed = []
+            for email in emails:
+                email.status = "sending"
+                email.attempts += 1
+                # Plazo del envío: si el proceso muere, el correo vuelve a la cola al vencer
+                email.next_attempt_at = now + timedelta(seconds=settings.MAIL_SEND_TIMEOUT_SECONDS)
+                claimed.append({
+                    "id": email.id,
+                    "recipient": email.recipient,
+                    "subject": email.subject,
+                    "body": email.body,
+                    "attempts": email.attempts
+                })
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _mark(self, email_id: int, error: Optional[str], attempts: int) -> None:
+        db: Session = SessionLocal()
+        try:
+            email = db.get(OutboundEmail, email_id)
+            if email is None:
+                return
+            if error is None:
+                email.status = "sent"
+                email.sent_at = _now()
+                email.last_error = None
+            elif attempts >= settings.MAIL_MAX_ATTEMPTS:
+                email.status = "failed"
+                email.last_error = error
+            else:
+                email.status = "pending"
+                email.next_attempt_at = _now() + _retry_delay(attempts)
+                email.last_error = error
+            db.commit()
+        finally:
+            db.close()
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = aiosmtplib.SMTP(
+                hostname=settings.MAIL_SERVER,
+                port=settings.MAIL_PORT,
+                username=settings.MAIL_USERNAME,
+                password=settings.MAIL_PASSWORD,
+                start_tls=True,
+                validate_certs=True,
+                timeout=30
+            )
+            await self._smtp.connect()
+        return self._smtp
+
+    async def _disconnect(self) -> None:
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+        self._smtp = None
+
+    async def _deliver(self, email: dict) -> None:
+        message = EmailMessage()
+        message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+        message["To"] = email["recipient"]
+        message["Subject"] = email["subject"]
+        message.set_content(email["body"], subtype="html")
+
+        error = None
+        try:
+            smtp = await self._connection()
+            await smtp.send_message(message)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            logger.warning("Falló el envío del correo %s (intento %s): %s", email["id"], email["attempts"], error)
+            # La conexión puede haber quedado en mal estado: se abre una nueva en el siguiente envío
+            await self._disconnect()
+
+        try:
+            await run_in_threadpool(self._mark, email["id"], error, email["attempts"])
+        except Exception as exc:
+            logger.error("No se pudo actualizar el estado del correo %s: %s", email["id"], exc)
+
+
+mail_worker = MailQueueWorker()
+
+
+def enqueue_email(db: Session, email_to: str, subject: str, body: str) -> OutboundEmail:
+    """Guarda el correo en la cola (persistente) y despierta al worker."""
+    email = OutboundEmail(
+        recipient=email_to,
+        subject=subject,
+        body=body,
+        status="pending",
+        attempts=0,
+        next_attempt_at=_now()
+    )
+    db.add(email)
+    db.commit()
+    mail_worker.notify()
+    return email
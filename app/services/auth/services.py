@@ -1,14 +1,18 @@
+import logging
 from datetime import datetime, timedelta,timezone
 from typing import Optional
 from jose import jwt
 from sqlalchemy.orm import Session
 from app.models.users.users import User
 from app.core.security import get_password_hash, verify_password, create_access_token
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.core.config import settings
+from app.services.auth.email import send_reset_password_email
 import secrets
 import string
 
+logger = logging.getLogger(__name__)
+
 def generate_password_reset_token(email: str):
     delta = timedelta(hours=settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS)
     now = datetime.now(timezone.utc)
@@ -31,4 +35,22 @@ def verify_password_reset_token(token: str) -> Optional[str]:
 def generate_random_password(length: int = 8):
     alphabet = string.ascii_letters + string.digits
     password = "".join(secrets.choice(alphabet) for _ in range(length))
-    return password
\ No newline at end of file
+    return password
+
+def request_password_recovery(email: str) -> None:
+    """
+    Genera el token y encola el correo de recuperación si el correo está
+    registrado. Corre como tarea de fondo, con su propia sesión.
+    """
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).first()
+        if not user or not user.is_active:
+            return
+        token = generate_password_reset_token(email=user.email)
+        send_reset_password_email(db, email_to=user.email, token=token)
+    except Exception as exc:
+        # La respuesta ya se envió: el error solo se registra
+        logger.error("No se pudo encolar la recuperación de contraseña: %s", exc)
+    finally:
+        db.close()
@@ -0,0 +1,170 @@
+# services/customers/search.py
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.store.customers.models import Customer
+
+SEARCH_FIELDS = ("name", "alias", "phone", "cc")
+MIN_TRIGRAM_SIMILARITY = 0.5
+
+
+def normalize(value) -> str:
+    """Minúsculas, sin tildes y solo caracteres alfanuméricos separados por espacio."""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text.lower()).split())
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CustomerSearchIndex:
+    """
+    Índice en memoria de clientes para autocompletado.
+    Combina búsqueda por prefijo de palabra con similitud por trigramas para
+    tolerar errores de digitación. Se actualiza de forma incremental al crear,
+    editar o borrar clientes y se reconstruye completo cuando expira el TTL
+    (otros workers pueden haber modificado la tabla).
+    """
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._doc_tokens: Dict[int, Set[str]] = {}
+        self._doc_names: Dict[int, str] = {}
+        self._token_ids: Dict[str, Set[int]] = defaultdict(set)
+        self._sorted_tokens: List[str] = []
+        self._trigram_tokens: Dict[str, Set[str]] = defaultdict(set)
+
+    # ---------- Mantenimiento ----------
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    def rebuild(self, db: Session) -> None:
+        rows = db.query(Customer.id, Customer.name, Customer.alias, Customer.phone, Customer.cc).all()
+        with self._lock:
+            self._doc_tokens.clear()
+            self._doc_names.clear()
+            self._token_ids.clear()
+            self._sorted_tokens.clear()
+            self._trigram_tokens.clear()
+            for row in rows:
+                self._add(row.id, dict(zip(SEARCH_FIELDS, row[1:])))
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self.is_stale():
+            self.rebuild(db)
+
+    def upsert(self, customer: Customer) -> None:
+        with self._lock:
+            if self._loaded_at is None:
+                return  # Se indexará completo en la primera búsqueda
+            self._remove(customer.id)
+            self._add(customer.id, {field: getattr(customer, field) for field in SEARCH_FIELDS})
+
+    def remove(self, customer_id: int) -> None:
+        with self._lock:
+            self._remove(customer_id)
+
+    def _add(self, customer_id: int, fields: Dict[str, object]) -> None:
+        tokens = set()
+        for field in SEARCH_FIELDS:
+            tokens.update(normalize(fields.get(field)).split())
+        self._doc_tokens[customer_id] = tokens
+        self._doc_names[customer_id] = normalize(fields.get("name"))
+        for token in tokens:
+            ids = self._token_ids[token]
+            if not ids:
+                insort(self._sorted_tokens, token)
+                for gram in trigrams(token):
+                    self._trigram_tokens[gram].add(token)
+            ids.add(customer_id)
+
+    def _remove(self, customer_id: int) -> None:
+        tokens = self._doc_tokens.pop(customer_id, None)
+        self._doc_names.pop(customer_id, None)
+        if not tokens:
+            return
+        for token in tokens:
+            ids = self._token_ids.get(token)
+            if ids is None:
+                continue
+            ids.discard(customer_id)
+            if ids:
+                continue
+            del self._token_ids[token]
+            pos = bisect_left(self._sorted_tokens, token)
+            if pos < len(self._sorted_tokens) and self._sorted_tokens[pos] == token:
+                self._sorted_tokens.pop(pos)
+            for gram in trigrams(token):
+                grams = self._trigram_tokens.get(gram)
+                if grams is not None:
+                    grams.discard(token)
+                    if not grams:
+                        del self._trigram_tokens[gram]
+
+    # ---------- Consulta ----------
+
+    def _token_scores(self, query_token: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+
+        # Coincidencia por prefijo (puntaje completo)
+        pos = bisect_left(self._sorted_tokens, query_token)
+        while pos < len(self._sorted_tokens) and self._sorted_tokens[pos].startswith(query_token):
+            for customer_id in self._token_ids[self._sorted_tokens[pos]]:
+                scores[customer_id] = 1.0
+            pos += 1
+
+        # Coincidencia aproximada por trigramas
+        if len(query_token) >= 3:
+            query_grams = trigrams(query_token)
+            shared: Dict[str, int] = defaultdict(int)
+            for gram in query_grams:
+                for token in self._trigram_tokens.get(gram, ()):
+                    shared[token] += 1
+            for token, count in shared.items():
+                similarity = count / len(query_grams | trigrams(token))
+                if similarity < MIN_TRIGRAM_SIMILARITY:
+                    continue
+                for customer_id in self._token_ids[token]:
+                    if scores.get(customer_id, 0.0) < similarity:
+                        scores[customer_id] = similarity
+        return scores
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[int]:
+        """Retorna los IDs de clientes ordenados por relevancia."""
+        query_tokens = normalize(query).split()
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            totals: Optional[Dict[int, float]] = None
+            for query_token in query_tokens:
+                scores = self._token_scores(query_token)
+                if totals is None:
+                    totals = scores
+                else:
+                    # Todas las palabras de la búsqueda deben coincidir
+                    totals = {cid: totals[cid] + score for cid, score in scores.items() if cid in totals}
+                if not totals:
+                    return []
+            names = self._doc_names
+            ranked = sorted(totals.items(), key=lambda item: (-item[1], names.get(item[0], ""), item[0]))
+
+        return [customer_id for customer_id, _ in ranked[offset:offset + limit]]
+
+
+customer_index = CustomerSearchIndex(ttl_seconds=settings.CUSTOMER_SEARCH_INDEX_TTL_SECONDS)
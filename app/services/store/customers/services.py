@@ -1,8 +1,22 @@
 # services/customers.py
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from fastapi import HTTPException
 from app.models.store.customers.models import Customer
-from app.schemas.store.customers.schemas import CustomerCreate, CustomerUpdate
+from app.models.store.orders.models import Order, OrderItem
+from app.models.store.products.models import Product
+from app.models.store.sales.models import Sale
+from app.models.store.debt.models import Debt, DebtMovement
+from app.schemas.store.customers.schemas import (
+    CustomerCreate,
+    CustomerUpdate,
+    CustomerOut,
+    CustomerSummary,
+    CustomerSaleBrief,
+    CustomerTopProduct,
+    CustomerDebtBrief
+)
+from app.services.store.customers.search import customer_index
 
 def create_customer(db: Session, customer_data: CustomerCreate) -> Customer:
     customer = Customer(
@@ -16,6 +30,7 @@ def create_customer(db: Session, customer_data: CustomerCreate) -> Customer:
     db.add(customer)
     db.commit()
     db.refresh(customer)
+    customer_index.upsert(customer)
     return customer
 
 def get_customer_by_id(db: Session, customer_id: int) -> Customer:
@@ -24,8 +39,23 @@ def get_customer_by_id(db: Session, customer_id: int) -> Customer:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
     return customer
 
-def get_all_customers(db: Session):
-    return db.query(Customer).all()
+def get_all_customers(db: Session, skip: int = 0, limit: int = None):
+    query = db.query(Customer).order_by(Customer.id).offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def search_customers(db: Session, q: str, skip: int = 0, limit: int = 20):
+    """
+    Busca clientes por nombre, alias, teléfono o cédula usando el índice en
+    memoria; solo se consulta la BD para traer los clientes encontrados.
+    """
+    customer_index.ensure_loaded(db)
+    ids = customer_index.search(q, limit=limit, offset=skip)
+    if not ids:
+        return []
+    customers = {c.id: c for c in db.query(Customer).filter(Customer.id.in_(ids)).all()}
+    return [customers[customer_id] for customer_id in ids if customer_id in customers]
 
 def update_customer(db: Session, customer_id: int, customer_data: CustomerUpdate) -> Customer:
     customer = db.query(Customer).filter(Customer.id == customer_id).first()
@@ -38,6 +68,7 @@ def update_customer(db: Session, customer_id: int, customer_data: CustomerUpdate
     
     db.commit()
     db.refresh(customer)
+    customer_index.upsert(customer)
     return customer
 
 def delete_customer(db: Session, customer_id: int) -> Customer:
@@ -46,4 +77,98 @@ def delete_customer(db: Session, customer_id: int) -> Customer:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
     db.delete(customer)
     db.commit()
+    customer_index.remove(customer_id)
     return customer
+
+
+def get_customer_summary(db: Session, customer_id: int, last_sales: int = 5, top_products: int = 5) -> CustomerSummary:
+    """
+    Vista 360 del cliente: ingresos históricos, últimas ventas, deuda actual
+    y productos más comprados. Usa un número fijo de consultas agregadas sin
+    importar cuántas ventas tenga el cliente.
+    """
+    customer = get_customer_by_id(db, customer_id)
+
+    # 1. Totales históricos de ventas
+    revenue, balance, sales_count, last_sale_date = (
+        db.query(
+            func.coalesce(func.sum(Sale.total), 0),
+            func.coalesce(func.sum(Sale.balance), 0),
+            func.count(Sale.id),
+            func.max(Sale.date)
+        )
+        .join(Order, Sale.order_id == Order.id)
+        .filter(Order.customer_id == customer_id)
+        .one()
+    )
+
+    # 2. Conteo de pedidos por estado
+    orders_by_status = dict(
+        db.query(Order.status, func.count(Order.id))
+        .filter(Order.customer_id == customer_id)
+        .group_by(Order.status)
+        .all()
+    )
+
+    # 3. Últimas N ventas (sin cargar el grafo del pedido)
+    recent_sales = (
+        db.query(Sale)
+        .join(Order, Sale.order_id == Order.id)
+        .filter(Order.customer_id == customer_id)
+        .order_by(Sale.date.desc())
+        .limit(last_sales)
+        .all()
+    )
+
+    # 4. Productos más comprados (solo pedidos facturados)
+    revenue_col = func.sum(OrderItem.subtotal).label("revenue")
+    top_rows = (
+        db.query(
+            OrderItem.product_id,
+            Product.name,
+            func.sum(OrderItem.quantity),
+            revenue_col
+        )
+        .join(Order, OrderItem.order_id == Order.id)
+        .join(Sale, Sale.order_id == Order.id)
+        .outerjoin(Product, OrderItem.product_id == Product.id)
+        .filter(Order.customer_id == customer_id)
+        .group_by(OrderItem.product_id, Product.name)
+        .order_by(revenue_col.desc())
+        .limit(top_products)
+        .all()
+    )
+
+    # 5. Deuda actual con la fecha del último movimiento
+    debt_row = (
+        db.query(Debt.id, Debt.current_balance, Debt.updated_at, func.max(DebtMovement.movement_date))
+        .outerjoin(DebtMovement, DebtMovement.debt_id == Debt.id)
+        .filter(Debt.customer_id == customer_id)
+        .group_by(Debt.id, Debt.current_balance, Debt.updated_at)
+        .first()
+    )
+
+    return CustomerSummary(
+        customer=CustomerOut.model_validate(customer),
+        lifetime_revenue=float(revenue),
+        lifetime_balance=float(balance),
+        sales_count=sales_count,
+        last_sale_date=last_sale_date,
+        orders_by_status={status or "unknown": count for status, count in orders_by_status.items()},
+        last_sales=[CustomerSaleBrief.model_validate(sale) for sale in recent_sales],
+        top_products=[
+            CustomerTopProduct(
+                product_id=product_id,
+                product_name=name,
+                quantity=quantity or 0,
+                revenue=float(total or 0)
+            )
+            for product_id, name, quantity, total in top_rows
+        ],
+        debt=CustomerDebtBrief(
+            debt_id=debt_row[0],
+            current_balance=float(debt_row[1]),
+            updated_at=debt_row[2],
+            last_movement_date=debt_row[3]
+        ) if debt_row else None
+    )
@@ -1,8 +1,10 @@
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy.orm import Session
+from decimal import Decimal
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import func, and_
 from app.schemas.store.debt.schemas import MovementType
+from app.core.concurrency import check_version
 from app.models.store.debt.models import Debt, DebtMovement
 from app.schemas.store.debt.schemas import (
     DebtCreate,
@@ -22,7 +24,11 @@ class DebtService:
 
     def get_all_debts(self, with_movements: bool = False) -> List[DebtOut]:
             """Obtiene todas las deudas registradas"""
-            debts = self.db.query(Debt).order_by(Debt.updated_at.desc()).all()
+            query = self.db.query(Debt).order_by(Debt.updated_at.desc())
+            if with_movements:
+                # Un solo SELECT para todos los movimientos en lugar de uno por deuda
+                query = query.options(selectinload(Debt.movements))
+            debts = query.all()
             
             if with_movements:
                 return [DebtWithMovements.model_validate(debt) for debt in debts]
@@ -76,7 +82,8 @@ class DebtService:
         return True
 
     def _create_movement(self, debt_id: int, movement_type: MovementType, 
-                        amount: float, description: str = None, notes: str = None) -> MovementOut:
+                        amount: Decimal, description: str = None, notes: str = None,
+                        commit: bool = True) -> MovementOut:
         """Crea un movimiento y actualiza el saldo de la deuda"""
         debt = self.db.query(Debt).filter(Debt.id == debt_id).with_for_update().first()
         if not debt:
@@ -100,13 +107,16 @@ class DebtService:
             debt.current_balance += amount
         
         debt.updated_at = datetime.now()
-        self.db.commit()
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
         self.db.refresh(new_movement)
         
         return MovementOut.model_validate(new_movement)
 
-    def register_movement(self, debt_id: int, movement_data: MovementCreate) -> MovementResult:
-        """Registra un nuevo movimiento para una deuda"""
+    def register_movement(self, debt_id: int, movement_data: MovementCreate, commit: bool = True) -> MovementResult:
+        """Registra un nuevo movimiento para una deuda (commit=False: solo flush, confirma el llamador)"""
         # Validar el tipo de movimiento
         if movement_data.movement_type == MovementType.PAYMENT:
             debt = self.db.query(Debt).filter(Debt.id == debt_id).first()
@@ -120,7 +130,8 @@ class DebtService:
             movement_type=movement_data.movement_type,
             amount=movement_data.amount,
             description=movement_data.description,
-            notes=movement_data.notes
+            notes=movement_data.notes,
+            commit=commit
         )
         
         debt = self.db.query(Debt).filter(Debt.id == debt_id).first()
@@ -208,7 +219,7 @@ class DebtService:
         ).order_by(DebtMovement.movement_date).all()
         
         history = []
-        current_balance = 0.0
+        current_balance = Decimal("0")
         
         # Reconstruir el historial
         for mov in movements:
@@ -230,12 +241,14 @@ class DebtService:
         self, 
         debt_id: int, 
         update_data: DebtUpdate,
-        adjustment_description: str = "Ajuste manual de saldo"
+        adjustment_description: str = "Ajuste manual de saldo",
+        expected_versions=None
     ) -> DebtOut:
         """Actualiza una deuda existente (PATCH)"""
         debt = self.db.query(Debt).filter(Debt.id == debt_id).with_for_update().first()
         if not debt:
             raise ValueError("Deuda no encontrada")
+        check_version(debt, expected_versions)
         
         # Si se está modificando el saldo directamente
         if update_data.current_balance is not None:
@@ -1,54 +1,141 @@
 from sqlalchemy.orm import Session,joinedload
 from fastapi import HTTPException, status
 from app.models.store.orders.models import Order, OrderItem
-from app.schemas.store.orders.schemas import OrderCreate, OrderUpdate, OrderOut, OrderItemCreate
+from app.schemas.store.orders.schemas import OrderCreate, OrderUpdate, OrderOut, OrderItemCreate, OrderItemPatch, OrderBoard, OrderBoardItem, SyncOrdersRequest, SyncOrdersResponse, SyncOrderResult
 from app.models.store.sales.models import Sale
-from sqlalchemy import select
-from decimal import Decimal
+from app.models.store.customers.models import Customer
+from app.models.store.products.models import Product
+from app.models.users.users import User
+from app.core.events import event_broker
+from app.core.concurrency import check_version
+from app.services.store.products.categories import category_cache
+from app.services.store.products.products import PRODUCT_LOAD_OPTIONS, products_query
+from app.services.store.sales.analytics import invalidate_sales_history
+from sqlalchemy import select, insert, update, delete, union, func
+from sqlalchemy.exc import IntegrityError
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict
 from datetime import datetime, date
 import pytz
 
+CENTS = Decimal("0.01")
+COLOMBIA_TZ = pytz.timezone('America/Bogota')
+
+# Relaciones que serializa OrderOut (items -> producto -> categoría, cliente y usuario)
+ORDER_LOAD_OPTIONS = (
+    joinedload(Order.items).joinedload(OrderItem.product).options(*PRODUCT_LOAD_OPTIONS),
+    joinedload(Order.customer),
+    joinedload(Order.user)
+)
+
+# Consulta base de pedidos con todo lo que necesita OrderOut
+def _orders_query(db: Session):
+    category_cache.prime(db)
+    return db.query(Order).options(*ORDER_LOAD_OPTIONS)
+
+# Datos mínimos de un pedido para los eventos en tiempo real
+def _order_event_data(order: Order) -> dict:
+    return {
+        "id": order.id,
+        "status": order.status,
+        "customer_id": order.customer_id,
+        "user_id": order.user_id
+    }
+
+# Publica el cambio de un pedido (order.completed si quedó facturado)
+def _publish_order_change(order: Order, event_type: str = "order.updated", db: Session = None):
+    if order.status == "completed" and event_type == "order.updated":
+        event_type = "order.completed"
+    if db is not None:
+        event_broker.publish_after_commit(db, event_type, _order_event_data(order))
+    else:
+        event_broker.publish(event_type, _order_event_data(order))
+
+# Carga en una sola consulta los productos referenciados por los items
+def _load_order_products(db: Session, items, lock: bool = False) -> Dict[int, Product]:
+    product_ids = {item.product_id for item in items}
+    if not product_ids:
+        return {}
+
+    # La categoría se carga aparte (selectin): con un JOIN el FOR UPDATE también bloquearía las categorías
+    query = products_query(db).filter(Product.id.in_(product_ids))
+    if lock:
+        query = query.with_for_update()
+    products = {product.id: product for product in query.all()}
+
+    missing = sorted(product_ids - products.keys())
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Productos no encontrados: {', '.join(str(pid) for pid in missing)}"
+        )
+    return products
+
+# Subtotal exacto de un item (cantidad x precio unitario, redondeado a centavos)
+def _item_subtotal(quantity: Decimal, price_unit: Decimal) -> Decimal:
+    return (quantity * price_unit).quantize(CENTS, rounding=ROUND_HALF_UP)
+
 # Servicio para crear un pedido (Order)
-def create_order(db: Session, order: OrderCreate, user_id: int = None):
-    # Primero creamos los items de pedido (OrderItems)
-    order_items = []
-    for item in order.items:
-        subtotal = item.quantity * Decimal(str(item.price_unit))
-        order_item = OrderItem(
+# commit=False (run_idempotent) solo hace flush: el llamador confirma la transacción
+def create_order(db: Session, order: OrderCreate, user_id: int = None, validate_stock: bool = False, commit: bool = True):
+    customer = db.get(Customer, order.customer_id)
+    if not customer:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente no encontrado")
+
+    # Validamos todos los productos en una sola consulta (bloqueándolos si se valida stock)
+    products = _load_order_products(db, order.items, lock=validate_stock)
+
+    if validate_stock:
+        requested: Dict[int, Decimal] = {}
+        for item in order.items:
+            requested[item.product_id] = requested.get(item.product_id, Decimal("0")) + item.quantity
+        short = [
+            products[pid].name or str(pid)
+            for pid, quantity in requested.items()
+            if (products[pid].stock or Decimal("0")) < quantity
+        ]
+        if short:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Stock insuficiente para: {', '.join(short)}"
+            )
+
+    # Creamos los items con el producto ya asociado (queda disponible para la respuesta)
+    order_items = [
+        OrderItem(
             product_id=item.product_id,
+            product=products[item.product_id],
             quantity=item.quantity,
             price_unit=item.price_unit,
-            subtotal=subtotal
+            subtotal=_item_subtotal(item.quantity, item.price_unit)
         )
-        order_items.append(order_item)
+        for item in order.items
+    ]
 
     # Creamos el pedido (Order) y asociamos los items
     db_order = Order(
-        customer_id=order.customer_id,
+        customer_id=customer.id,
+        customer=customer,
         user_id=user_id,  # Guardamos el ID del usuario que creó el pedido
+        user=db.get(User, user_id) if user_id else None,  # Ya está en el identity map por la autenticación
         status="pending",  # Por defecto el estado será "pending"
         items=order_items
     )
 
     db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
-    
-    # Retornar el pedido con las relaciones cargadas
-    return db.query(Order).options(
-        joinedload(Order.items),
-        joinedload(Order.customer),
-        joinedload(Order.user)
-    ).filter(Order.id == db_order.id).first()
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+    _publish_order_change(db_order, "order.created", db)
+
+    # expire_on_commit=False: el pedido y sus relaciones siguen cargados, no hace falta volver a consultarlos
+    return db_order
 
 
 # Servicio para obtener todos los pedidos (Order)
 def get_all_orders(db: Session, user_id: int = None):
-    query = db.query(Order).options(
-        joinedload(Order.items),
-        joinedload(Order.customer),
-        joinedload(Order.user)
-    )
+    query = _orders_query(db)
 
     # Si no es admin, filtramos por usuario
     if user_id is not None:
@@ -67,11 +154,7 @@ def get_orders_today(db: Session, user_id: int = None):
 
     from sqlalchemy import or_, and_
 
-    query = db.query(Order).options(
-        joinedload(Order.items),
-        joinedload(Order.customer),
-        joinedload(Order.user)
-    ).filter(
+    query = _orders_query(db).filter(
         or_(
             (Order.date >= start_of_day) & (Order.date <= end_of_day),
             Order.status == "pending"
@@ -85,13 +168,75 @@ def get_orders_today(db: Session, user_id: int = None):
     return query.all()
 
 
+# Servicio para el tablero del día: proyección compacta de los pedidos de hoy + pendientes.
+# Cada rama de la unión usa su propio índice ((status, date) y date) en lugar de un OR.
+def get_orders_board(db: Session, since: datetime = None, user_id: int = None):
+    now = datetime.now(COLOMBIA_TZ)
+    start_of_day = COLOMBIA_TZ.localize(datetime.combine(now.date(), datetime.min.time()))
+    end_of_day = COLOMBIA_TZ.localize(datetime.combine(now.date(), datetime.max.time()))
+
+    pending_ids = select(Order.id).where(Order.status == "pending")
+    today_ids = select(Order.id).where(Order.date >= start_of_day, Order.date <= end_of_day)
+
+    # Si no es admin, filtrar por usuario
+    if user_id is not None:
+        pending_ids = pending_ids.where(Order.user_id == user_id)
+        today_ids = today_ids.where(Order.user_id == user_id)
+
+    board_ids = union(pending_ids, today_ids).subquery()
+    in_board = Order.id.in_(select(board_ids.c.id))
+
+    counts = dict(
+        db.query(Order.status, func.count(Order.id))
+        .filter(in_board)
+        .group_by(Order.status)
+        .all()
+    )
+
+    query = db.query(
+        Order.id,
+        Order.status,
+        Order.date,
+        Order.updated_at,
+        Customer.name,
+        func.count(OrderItem.id),
+        func.coalesce(func.sum(OrderItem.subtotal), 0)
+    ).outerjoin(Customer, Order.customer_id == Customer.id).outerjoin(
+        OrderItem, OrderItem.order_id == Order.id
+    ).filter(in_board)
+
+    if since is not None:
+        # Las fechas se guardan en hora de Colombia sin zona horaria
+        if since.tzinfo is not None:
+            since = since.astimezone(COLOMBIA_TZ).replace(tzinfo=None)
+        query = query.filter(Order.updated_at > since)
+
+    rows = query.group_by(
+        Order.id, Order.status, Order.date, Order.updated_at, Customer.name
+    ).order_by(Order.date).all()
+
+    return OrderBoard(
+        server_time=now,
+        counts={status or "unknown": count for status, count in counts.items()},
+        orders=[
+            OrderBoardItem(
+                id=order_id,
+                status=order_status,
+                date=order_date,
+                updated_at=updated_at,
+                customer_name=customer_name,
+                item_count=item_count,
+                total=float(total)
+            )
+            for order_id, order_status, order_date, updated_at, customer_name, item_count, total in rows
+        ],
+        order_ids=[row[0] for row in db.query(board_ids.c.id).all()] if since is not None else None
+    )
+
+
 # Servicio para obtener un pedido específico (Order)
 def get_order_by_id(db: Session, order_id: int, user_id: int = None):
-    query = db.query(Order).options(
-        joinedload(Order.items),
-        joinedload(Order.customer),
-        joinedload(Order.user)
-    ).filter(Order.id == order_id)
+    query = _orders_query(db).filter(Order.id == order_id)
 
     # Si no es admin, solo puede ver su orden
     if user_id is not None:
@@ -107,13 +252,106 @@ def get_order_by_id(db: Session, order_id: int, user_id: int = None):
 
     return db_order
 
+# Pedido con sus relaciones cargadas (refresca lo que haya en la sesión)
+def _get_order_with_relations(db: Session, order_id: int):
+    return _orders_query(db).populate_existing().filter(Order.id == order_id).first()
+
+# Aplica los items enviados como diferencia contra los existentes:
+# actualiza solo las líneas que cambiaron, inserta las nuevas y borra las removidas,
+# cada grupo en una sola sentencia.
+def _apply_item_changes(db: Session, order_id: int, items):
+    existing = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+    by_id = {item.id: item for item in existing}
+    by_product: Dict[int, list] = {}
+    for item in existing:
+        by_product.setdefault(item.product_id, []).append(item)
+
+    # Una sola consulta para validar productos nuevos y obtener precios por defecto
+    known_products = {item.product_id for item in existing}
+    products = _load_order_products(db, [
+        item for item in items
+        if item.product_id is not None and (item.product_id not in known_products or item.price_unit is None)
+    ])
+
+    matched = set()
+    to_update, to_insert = [], []
+    for item in items:
+        current = None
+        if item.id is not None:
+            current = by_id.get(item.id)
+            if current is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Item {item.id} no pertenece al pedido"
+                )
+        elif item.product_id is not None:
+            candidates = [c for c in by_product.get(item.product_id, []) if c.id not in matched]
+            current = candidates[0] if candidates else None
+
+        if current is not None:
+            if current.id in matched:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Item {current.id} enviado más de una vez"
+                )
+            matched.add(current.id)
+            product_id = item.product_id if item.product_id is not None else current.product_id
+            price_unit = item.price_unit if item.price_unit is not None else current.price_unit
+            if (
+                product_id != current.product_id
+                or item.quantity != current.quantity
+                or price_unit != current.price_unit
+            ):
+                to_update.append({
+                    "id": current.id,
+                    "product_id": product_id,
+                    "quantity": item.quantity,
+                    "price_unit": price_unit,
+                    "subtotal": _item_subtotal(item.quantity, price_unit)
+                })
+            continue
+
+        if item.product_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Los items nuevos requieren product_id"
+            )
+        price_unit = item.price_unit
+        if price_unit is None:
+            product = products[item.product_id]
+            if product.sale_price is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Producto {product.name} no tiene precio de venta; envía price_unit"
+                )
+            price_unit = product.sale_price
+        to_insert.append({
+            "order_id": order_id,
+            "product_id": item.product_id,
+            "quantity": item.quantity,
+            "price_unit": price_unit,
+            "subtotal": _item_subtotal(item.quantity, price_unit)
+        })
+
+    to_delete = [item.id for item in existing if item.id not in matched]
+
+    if to_delete:
+        db.execute(delete(OrderItem).where(OrderItem.id.in_(to_delete)))
+    if to_update:
+        db.execute(update(OrderItem), to_update)
+    if to_insert:
+        db.execute(insert(OrderItem), to_insert)
+
 # Servicio para actualizar un pedido (Order)
-def update_order(db: Session, order_id: int, order_update: OrderUpdate):
+def update_order(db: Session, order_id: int, order_update: OrderUpdate, expected_versions=None):
     # Obtenemos el pedido actual para actualizarlo
     db_order = db.query(Order).filter(Order.id == order_id).first()
 
     if not db_order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    check_version(db_order, expected_versions)
+    # Antes de cambiar el estado: si ya estaba facturado, su venta sigue en la analítica
+    was_completed = db_order.status == "completed"
 
     # Actualizamos los campos del pedido
     if order_update.customer_id:
@@ -121,35 +359,28 @@ def update_order(db: Session, order_id: int, order_update: OrderUpdate):
     if order_update.status:
         db_order.status = order_update.status
     if order_update.items:
-        # Primero eliminamos los items existentes y agregamos los nuevos
-        db.query(OrderItem).filter(OrderItem.order_id == order_id).delete()
-        for item in order_update.items:
-            subtotal = item.quantity * Decimal(str(item.price_unit))
-            order_item = OrderItem(
-                product_id=item.product_id,
-                quantity=item.quantity,
-                price_unit=item.price_unit,
-                subtotal=subtotal,
-                order_id=db_order.id
-            )
-            db.add(order_item)
+        _apply_item_changes(db, db_order.id, order_update.items)
+        db_order.updated_at = datetime.now(COLOMBIA_TZ)
+
+    # Editar un pedido ya facturado cambia la analítica de ventas ya registradas
+    if was_completed and (order_update.items or order_update.customer_id):
+        invalidate_sales_history(db, db_order.date)
 
     db.commit()
-    db.refresh(db_order)
+    _publish_order_change(db_order)
     
     # Retornar el pedido con las relaciones cargadas
-    return db.query(Order).options(
-        joinedload(Order.items),
-        joinedload(Order.customer),
-        joinedload(Order.user)
-    ).filter(Order.id == order_id).first()
+    return _get_order_with_relations(db, order_id)
 
 # Servicio para hacer un patch (actualización parcial) de un pedido (Order)
-def patch_order(db: Session, order_id: int, order_patch: OrderUpdate):
+def patch_order(db: Session, order_id: int, order_patch: OrderUpdate, expected_versions=None):
     db_order = db.query(Order).filter(Order.id == order_id).first()
 
     if not db_order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    check_version(db_order, expected_versions)
+    # Antes de cambiar el estado: si ya estaba facturado, su venta sigue en la analítica
+    was_completed = db_order.status == "completed"
 
     # Solo actualizamos los campos que vengan en el request
     if order_patch.customer_id is not None:
@@ -157,28 +388,155 @@ def patch_order(db: Session, order_id: int, order_patch: OrderUpdate):
     if order_patch.status is not None:
         db_order.status = order_patch.status
     if order_patch.items is not None:
-        # Eliminamos los items anteriores
-        db.query(OrderItem).filter(OrderItem.order_id == order_id).delete()
-        for item in order_patch.items:
-            subtotal = item.quantity * Decimal(str(item.price_unit))
-            order_item = OrderItem(
-                product_id=item.product_id,
-                quantity=item.quantity,
-                price_unit=item.price_unit,
-                subtotal=subtotal,
-                order_id=db_order.id
-            )
-            db.add(order_item)
+        _apply_item_changes(db, db_order.id, order_patch.items)
+        db_order.updated_at = datetime.now(COLOMBIA_TZ)
+
+    # Editar un pedido ya facturado cambia la analítica de ventas ya registradas
+    if was_completed and (order_patch.items is not None or order_patch.customer_id is not None):
+        invalidate_sales_history(db, db_order.date)
 
     db.commit()
-    db.refresh(db_order)
+    _publish_order_change(db_order)
     
     # Retornar el pedido con las relaciones cargadas
-    return db.query(Order).options(
-        joinedload(Order.items),
-        joinedload(Order.customer),
-        joinedload(Order.user)
-    ).filter(Order.id == order_id).first()
+    return _get_order_with_relations(db, order_id)
+
+# Servicio para editar una sola línea del pedido
+def patch_order_item(db: Session, order_id: int, item_id: int, item_patch: OrderItemPatch, expected_versions=None):
+    db_item = db.query(OrderItem).options(
+        joinedload(OrderItem.product).options(*PRODUCT_LOAD_OPTIONS),
+        joinedload(OrderItem.order)
+    ).filter(OrderItem.id == item_id, OrderItem.order_id == order_id).first()
+
+    if not db_item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order item not found")
+    # La línea no tiene versión propia: se condiciona a la del pedido
+    check_version(db_item.order, expected_versions)
+
+    if item_patch.quantity is not None:
+        db_item.quantity = item_patch.quantity
+    if item_patch.price_unit is not None:
+        db_item.price_unit = item_patch.price_unit
+    db_item.subtotal = _item_subtotal(db_item.quantity, db_item.price_unit)
+    # Editar una línea cambia el pedido: sube su versión en el mismo UPDATE,
+    # condicionado a la versión leída (si otra edición ganó, no actualiza nada)
+    bumped = db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.version == db_item.order.version)
+        .values(updated_at=datetime.now(COLOMBIA_TZ), version=Order.version + 1)
+    ).rowcount
+    if not bumped:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="El registro fue modificado por otra persona; recarga e intenta de nuevo"
+        )
+    if db_item.order.status == "completed":
+        invalidate_sales_history(db, db_item.order.date)
+
+    db.commit()
+    event_broker.publish("order.updated", {"id": order_id, "item_id": item_id, "user_id": db_item.order.user_id})
+    return db_item
+
+
+# Servicio para sincronizar en lote pedidos creados sin conexión.
+# Todo el lote se valida y se inserta en una sola transacción con un número fijo
+# de sentencias (sin importar cuántos pedidos traiga).
+# Fecha reportada por el dispositivo en hora de Colombia sin zona horaria, como se guardan
+# las demás; un reloj adelantado no puede dejar el pedido en el futuro (se acota a `now`)
+def _device_date(value, now: datetime) -> datetime:
+    if value is None:
+        return now
+    if value.tzinfo is not None:
+        value = value.astimezone(COLOMBIA_TZ).replace(tzinfo=None)
+    return min(value, now)
+
+def sync_orders(db: Session, payload: SyncOrdersRequest, user_id: int = None) -> SyncOrdersResponse:
+    # Descartamos duplicados dentro del mismo lote (se queda el primero)
+    batch = {}
+    for order in payload.orders:
+        batch.setdefault(str(order.client_uuid), order)
+
+    # Pedidos que ya se sincronizaron en un intento anterior
+    existing = dict(
+        db.query(Order.client_uuid, Order.id)
+        .filter(Order.client_uuid.in_(batch.keys()))
+        .all()
+    )
+    pending = [order for uuid, order in batch.items() if uuid not in existing]
+
+    if pending:
+        # Validamos clientes y productos del lote en dos consultas
+        customer_ids = {order.customer_id for order in pending}
+        found_customers = {cid for (cid,) in db.query(Customer.id).filter(Customer.id.in_(customer_ids)).all()}
+        missing_customers = sorted(customer_ids - found_customers)
+        if missing_customers:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Clientes no encontrados: {', '.join(str(cid) for cid in missing_customers)}"
+            )
+        _load_order_products(db, [item for order in pending for item in order.items])
+
+        now = datetime.now(COLOMBIA_TZ).replace(tzinfo=None)
+        try:
+            db.execute(insert(Order), [
+                {
+                    "client_uuid": str(order.client_uuid),
+                    "customer_id": order.customer_id,
+                    "user_id": user_id,
+                    "status": "pending",
+                    "date": _device_date(order.date, now),
+                    "updated_at": now
+                }
+                for order in pending
+            ])
+        except IntegrityError:
+            # Otro envío del mismo lote se está sincronizando en paralelo
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="El lote ya se está sincronizando, reintente en unos segundos"
+            )
+        created_ids = dict(
+            db.query(Order.client_uuid, Order.id)
+            .filter(Order.client_uuid.in_([str(order.client_uuid) for order in pending]))
+            .all()
+        )
+        items = [
+            {
+                "order_id": created_ids[str(order.client_uuid)],
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "price_unit": item.price_unit,
+                "subtotal": _item_subtotal(item.quantity, item.price_unit)
+            }
+            for order in pending
+            for item in order.items
+        ]
+        if items:
+            db.execute(insert(OrderItem), items)
+    else:
+        created_ids = {}
+
+    db.commit()
+
+    for uuid, order_id in created_ids.items():
+        event_broker.publish("order.created", {
+            "id": order_id,
+            "status": "pending",
+            "customer_id": batch[uuid].customer_id,
+            "user_id": user_id
+        })
+
+    results = [
+        SyncOrderResult(
+            client_uuid=order.client_uuid,
+            id=existing.get(uuid) or created_ids[uuid],
+            duplicate=uuid in existing
+        )
+        for uuid, order in batch.items()
+    ]
+    return SyncOrdersResponse(created=len(created_ids), duplicates=len(existing), orders=results)
 
 
 # Servicio para borrar un pedido (Order)
@@ -193,7 +551,11 @@ def delete_order(db: Session, order_id: int):
     db.query(OrderItem).filter(OrderItem.order_id == order_id).delete()
     
     # Borramos el pedido
+    event_data = _order_event_data(db_order)
+    if db_order.status == "completed":
+        invalidate_sales_history(db, db_order.date)
     db.delete(db_order)
     db.commit()
+    event_broker.publish("order.deleted", event_data)
     
     return {"message": "Order deleted successfully"}
@@ -0,0 +1,231 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Optional, Tuple
+import pytz
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.reference_data import read_version
+from app.models.store.orders.models import OrderItem
+from app.models.store.products.models import Product
+from app.models.store.sales.models import Sale
+from app.services.store.sales.analytics import SALES_HISTORY
+
+ZERO = Decimal("0")
+CENTS = Decimal("0.01")
+
+# Participación acumulada en ingresos hasta la que un producto es clase A y B
+ABC_THRESHOLDS = (Decimal("0.80"), Decimal("0.95"))
+
+RANKING_CRITERIA = ("revenue", "quantity", "profit")
+
+# product_id -> (cantidad, ingresos)
+ProductTotals = Dict[int, Tuple[Decimal, Decimal]]
+
+
+def _today() -> date:
+    return datetime.now(pytz.timezone('America/Bogota')).date()
+
+
+def _money(value: Decimal) -> float:
+    return float(value.quantize(CENTS, rounding=ROUND_HALF_UP))
+
+
+def _query_totals(db: Session, start: date, end: date) -> ProductTotals:
+    rows = (
+        db.query(OrderItem.product_id, func.sum(OrderItem.quantity), func.sum(OrderItem.subtotal))
+        .select_from(Sale)
+        .join(OrderItem, OrderItem.order_id == Sale.order_id)
+        .filter(
+            Sale.date >= datetime.combine(start, datetime.min.time()),
+            Sale.date < datetime.combine(end + timedelta(days=1), datetime.min.time())
+        )
+        .group_by(OrderItem.product_id)
+        .all()
+    )
+    return {
+        product_id: (quantity or ZERO, revenue or ZERO)
+        for product_id, quantity, revenue in rows
+        if product_id is not None
+    }
+
+
+class ProductSalesCache:
+    """
+    Cantidad e ingresos por producto de un rango de fechas, en memoria.
+
+    La ganancia no se guarda: depende del precio de compra actual (igual que
+    en earnings_by_date_range) y se calcula al responder. Un rango cerrado
+    vale hasta que cambia la versión "sales_history" (ver
+    invalidate_sales_history); uno que incluye hoy expira a los
+    PRODUCT_ANALYTICS_TTL_SECONDS.
+    """
+
+    def __init__(self, max_ranges: int, ttl_seconds: int):
+        self.max_ranges = max_ranges
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # (inicio, fin) -> (totales, vence en; None si el rango está cerrado)
+        self._ranges: "OrderedDict[Tuple[date, date], Tuple[ProductTotals, Optional[float]]]" = OrderedDict()
+        self._version: Optional[int] = None
+
+    def totals(self, db: Session, start: date, end: date) -> ProductTotals:
+        version = read_version(db, SALES_HISTORY)
+        key = (start, end)
+        with self._lock:
+            if version != self._version:
+                self._ranges.clear()
+                self._version = version
+            cached = self._ranges.get(key)
+            if cached is not None and (cached[1] is None or cached[1] > time.monotonic()):
+                self._ranges.move_to_end(key)
+                return cached[0]
+
+        totals = _query_totals(db, start, end)
+        expires_at = None if end < _today() else time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if self._version == version:
+                self._ranges[key] = (totals, expires_at)
+                self._ranges.move_to_end(key)
+                while len(self._ranges) > self.max_ranges:
+                    self._ranges.popitem(last=False)
+        return totals
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ranges.clear()
+            self._version = None
+
+
+product_sales_cache = ProductSalesCache(
+    settings.PRODUCT_ANALYTICS_CACHE_SIZE,
+    settings.PRODUCT_ANALYTICS_TTL_SECONDS
+)
+
+
+def _product_rows(db: Session, product_ids=None):
+    query = db.query(
+        Product.id, Product.name, Product.category_id, Product.purchase_price, Product.stock, Product.state
+    )
+    if product_ids is not None:
+        query = query.filter(Product.id.in_(product_ids))
+    return {row.id: row for row in query.all()}
+
+
+def _profit(quantity: Decimal, revenue: Decimal, purchase_price: Optional[Decimal]) -> Decimal:
+    # Mismo criterio que _calculate_earnings: (precio real - precio de compra) * cantidad;
+    # una línea regalada (precio 0) resta su costo completo
+    return revenue - quantity * (purchase_price or ZERO)
+
+
+def top_products(db: Session, start_date: date, end_date: date, by: str = "revenue", n: int = 10) -> Dict[str, Any]:
+    """Los n productos con más ingresos, cantidad o ganancia en el rango."""
+    totals = product_sales_cache.totals(db, start_date, end_date)
+
+    if by == "profit":
+        # La ganancia necesita el precio de compra de todos los productos vendidos
+        products = _product_rows(db, list(totals)) if totals else {}
+        scored = [
+            (product_id, _profit(quantity, revenue, products[product_id].purchase_price))
+            for product_id, (quantity, revenue) in totals.items()
+            if product_id in products
+        ]
+        top = heapq.nlargest(n, scored, key=lambda item: item[1])
+    else:
+        index = 0 if by == "quantity" else 1
+        top = heapq.nlargest(n, ((product_id, values[index]) for product_id, values in totals.items()), key=lambda item: item[1])
+        # Solo se consultan los n productos que salen en la respuesta
+        products = _product_rows(db, [product_id for product_id, _ in top]) if top else {}
+
+    items = []
+    for rank, (product_id, _) in enumerate(top, start=1):
+        product = products.get(product_id)
+        quantity, revenue = totals[product_id]
+        items.append({
+            "rank": rank,
+            "product_id": product_id,
+            "name": product.name if product else None,
+            "category_id": product.category_id if product else None,
+            "quantity": float(quantity),
+            "revenue": _money(revenue),
+            "profit": _money(_profit(quantity, revenue, product.purchase_price)) if product else None
+        })
+
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "by": by,
+        "n": n,
+        "products": items
+    }
+
+
+def abc_classification(db: Session, start_date: date, end_date: date) -> Dict[str, Any]:
+    """
+    Clasificación ABC por ingresos del rango: A concentra el primer 80% de
+    los ingresos, B hasta el 95% y C el resto, incluidos los productos activos
+    sin ventas. El valor del inventario (stock * precio de compra) de cada
+    clase muestra cuánto capital está quieto en productos que venden poco.
+    """
+    totals = product_sales_cache.totals(db, start_date, end_date)
+    products = _product_rows(db)
+
+    candidates = [
+        product for product in products.values()
+        if product.state or product.id in totals
+    ]
+    candidates.sort(key=lambda product: totals.get(product.id, (ZERO, ZERO))[1], reverse=True)
+    total_revenue = sum((values[1] for product_id, values in totals.items() if product_id in products), ZERO)
+
+    classes = {label: {"products": 0, "revenue": ZERO, "stock_value": ZERO} for label in "ABC"}
+    items = []
+    cumulative = ZERO
+    for product in candidates:
+        quantity, revenue = totals.get(product.id, (ZERO, ZERO))
+        # El producto que cruza el umbral queda en la clase que lo cruza
+        share_before = cumulative / total_revenue if total_revenue else Decimal(1)
+        cumulative += revenue
+        if revenue > 0 and share_before < ABC_THRESHOLDS[0]:
+            label = "A"
+        elif revenue > 0 and share_before < ABC_THRESHOLDS[1]:
+            label = "B"
+        else:
+            label = "C"
+
+        stock = product.stock or ZERO
+        stock_value = stock * (product.purchase_price or ZERO)
+        classes[label]["products"] += 1
+        classes[label]["revenue"] += revenue
+        classes[label]["stock_value"] += stock_value
+        items.append({
+            "product_id": product.id,
+            "name": product.name,
+            "category_id": product.category_id,
+            "class": label,
+            "quantity": float(quantity),
+            "revenue": _money(revenue),
+            "revenue_share": round(float(revenue / total_revenue), 4) if total_revenue else 0.0,
+            "cumulative_share": round(float(cumulative / total_revenue), 4) if total_revenue else 0.0,
+            "stock": float(stock),
+            "stock_value": _money(stock_value)
+        })
+
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "total_revenue": _money(total_revenue),
+        "summary": {
+            label: {
+                "products": data["products"],
+                "revenue": _money(data["revenue"]),
+                "revenue_share": round(float(data["revenue"] / total_revenue), 4) if total_revenue else 0.0,
+                "stock_value": _money(data["stock_value"])
+            }
+            for label, data in classes.items()
+        },
+        "products": items
+    }
@@ -1,25 +1,27 @@
 from sqlalchemy.orm import Session
-from sqlalchemy.future import select
+from app.core.reference_data import ReferenceData
 from app.models.store.products.models import Category
 from app.schemas.store.products.products import CreateCategory, UpdateCategory
 
+# Las categorías casi nunca cambian y se anidan en cada producto serializado:
+# se sirven desde memoria y category_cache.prime(db) evita el SELECT de Product.category
+category_cache = ReferenceData("categories", Category)
+
 def create_category(category: CreateCategory, db: Session):
     new_category = Category(
         name=category.name,
         description=category.description
     )
     db.add(new_category)
-    db.commit()
+    category_cache.commit(db)
     db.refresh(new_category)
     return new_category
 
 def get_all_categories(db: Session):
-    categories = db.query(Category).all()
-    return categories
+    return category_cache.all(db)
 
 def get_category_by_id(category_id: int, db: Session):
-    result = db.execute(select(Category).where(Category.id == category_id))
-    return result.scalars().first()
+    return category_cache.get(db, category_id)
 
 def update_category(category_id: int, category_data: UpdateCategory, db: Session):
     category = db.get(Category, category_id)
@@ -29,7 +31,7 @@ def update_category(category_id: int, category_data: UpdateCategory, db: Session
     for key, value in category_data.model_dump(exclude_unset=True).items():
         setattr(category, key, value)
 
-    db.commit()
+    category_cache.commit(db)
     db.refresh(category)
     return category
 
@@ -39,5 +41,5 @@ def delete_category_by_id(category_id: int, db: Session):
         return None
     
     db.delete(category)
-    db.commit()
+    category_cache.commit(db)
     return category
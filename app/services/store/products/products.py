@@ -1,10 +1,26 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy.future import select
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session, selectinload
 from app.schemas.store.products.products import UpdateProduct, CreateProduct
 from app.models.store.products.models import Product
+from app.models.store.inventory.models import StockMovementReason
+from app.core.concurrency import check_version
+from app.services.store.products.categories import category_cache
+from app.services.store.sales.analytics import invalidate_sales_history
+from app.services.store.products.stock_movements import quantize_stock, record_stock_movement
 from decimal import Decimal
 
+# Relaciones que se serializan con cada producto (ProductOut/ResponseProduct.category).
+# Toda consulta que retorne productos, directa o anidada (ej: OrderItem.product),
+# debe aplicarlas para no hacer un SELECT de categoría por producto.
+PRODUCT_LOAD_OPTIONS = (selectinload(Product.category),)
+
+
+def products_query(db: Session):
+    """Consulta base de productos con la categoría resuelta desde el caché."""
+    category_cache.prime(db)
+    return db.query(Product).options(*PRODUCT_LOAD_OPTIONS)
+
 
 
 def create_product(product: CreateProduct, db: Session):
@@ -16,6 +32,8 @@ def create_product(product: CreateProduct, db: Session):
     sale_price = product.sale_price
     profit_percentage = product.profit_percentage
     stock = product.stock if hasattr(product, 'stock') else 0  # Manejo seguro del stock
+    if stock is not None:
+        stock = quantize_stock(stock)
 
     if (sale_price is None or sale_price == 0) and profit_percentage is not None:
         sale_price = round(purchase_price * (1 + profit_percentage / 100), 2)
@@ -38,72 +56,110 @@ def create_product(product: CreateProduct, db: Session):
     )
 
     db.add(new_product)
+    db.flush()
+    record_stock_movement(db, new_product.id, stock or 0, StockMovementReason.INITIAL, stock_after=stock)
     db.commit()
     db.refresh(new_product)
+    category_cache.prime(db)
     return new_product
 
 
+def _apply_stock_delta(db: Session, product_id: int, delta: Decimal, minimum: Decimal = None):
+    """
+    Suma `delta` al stock en un solo UPDATE atómico (sin leer-modificar-escribir
+    en Python, así dos peticiones simultáneas no se pisan). Con `minimum` solo
+    se aplica si el stock actual es al menos ese valor.
+
+    Retorna el producto con el stock resultante, o None si no se aplicó. La
+    lectura va en la misma transacción, con la fila ya bloqueada por el UPDATE
+    hasta el commit, así que ve exactamente el valor que dejó esta operación.
+    """
+    stock = func.coalesce(Product.stock, 0)
+    # La versión también sube: patch_product puede sobrescribir el stock y no debe pisar este cambio
+    statement = update(Product).where(Product.id == product_id).values(stock=stock + delta, version=Product.version + 1)
+    if minimum is not None:
+        statement = statement.where(stock >= minimum)
+    if db.execute(statement.execution_options(synchronize_session=False)).rowcount == 0:
+        return None
+    return products_query(db).populate_existing().filter(Product.id == product_id).first()
+
+
 def add_to_stock(db: Session, product_id: int, quantity: float):
     """Suma cantidad al stock actual"""
-    product = db.get(Product, product_id)
+    # Convertir float a Decimal en la escala de la columna (el libro registra lo mismo)
+    quantity_decimal = quantize_stock(quantity)
+    product = _apply_stock_delta(db, product_id, quantity_decimal)
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
-    
-    # Convertir float a Decimal
-    quantity_decimal = Decimal(str(quantity))
-    product.stock = (product.stock or Decimal('0')) + quantity_decimal
+
+    record_stock_movement(db, product.id, quantity_decimal, StockMovementReason.RESTOCK, stock_after=product.stock)
     db.commit()
-    db.refresh(product)
     return product
 
 def remove_from_stock(db: Session, product_id: int, quantity: float, allow_negative: bool = False):
     """Resta cantidad al stock actual"""
-    product = db.get(Product, product_id)
+    # Convertir float a Decimal en la escala de la columna (el libro registra lo mismo)
+    quantity_decimal = quantize_stock(quantity)
+
+    # La validación de stock suficiente va en el WHERE del UPDATE
+    product = _apply_stock_delta(
+        db, product_id, -quantity_decimal,
+        minimum=None if allow_negative else quantity_decimal
+    )
     if not product:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    
-    # Convertir float a Decimal
-    quantity_decimal = Decimal(str(quantity))
-    current_stock = product.stock or Decimal('0')
-    
-    if not allow_negative and current_stock < quantity_decimal:
+        exists = db.query(Product.id).filter(Product.id == product_id).first()
+        db.rollback()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
         raise HTTPException(status_code=400, detail="Stock insuficiente")
-    
-    product.stock = current_stock - quantity_decimal
+
+    record_stock_movement(db, product.id, -quantity_decimal, StockMovementReason.REMOVAL, stock_after=product.stock)
     db.commit()
-    db.refresh(product)
     return product
 
 def get_all_products(db: Session):
     """
     Obtiene todos los productos de la base de datos.
     """
-    return db.query(Product).all()
+    return products_query(db).all()
 
 
 def get_product_by_id(product_id: int, db: Session):
     """
     Obtiene un producto por su ID.
     """
-    product = db.execute(select(Product).where(Product.id == product_id))
-    return product.scalars().first()
+    return products_query(db).filter(Product.id == product_id).first()
 
 
-def patch_product(product_id: int, product_data: UpdateProduct, db: Session):
+def patch_product(product_id: int, product_data: UpdateProduct, db: Session, expected_versions=None):
     """
     Actualiza un producto parcialmente.
     Calcula automáticamente sale_price o profit_percentage si falta alguno.
+    Con expected_versions (If-Match) responde 412 si el producto cambió.
     """
     product = db.get(Product, product_id)
     if not product:
         return None
+    check_version(product, expected_versions)
 
     # Solo actualiza campos que han sido enviados en la petición
     update_data = product_data.model_dump(exclude_unset=True)
 
+    # La analítica agrupa por la categoría actual del producto: cambiarla altera días ya cerrados
+    if "category_id" in update_data and update_data["category_id"] != product.category_id:
+        invalidate_sales_history(db)
+
+    previous_stock = product.stock or Decimal('0')
     for field, value in update_data.items():
         setattr(product, field, value)
 
+    # Sobrescribir el stock queda en el libro como ajuste por la diferencia
+    if "stock" in update_data:
+        new_stock = quantize_stock(product.stock or 0)
+        if product.stock is not None:
+            product.stock = new_stock
+        record_stock_movement(db, product.id, new_stock - previous_stock, StockMovementReason.ADJUSTMENT, stock_after=new_stock)
+
     # Validación: si alguno de los campos clave es None, evitamos cálculos peligrosos
     purchase_price = product.purchase_price or 0
     sale_price = product.sale_price
@@ -117,13 +173,15 @@ def patch_product(product_id: int, product_data: UpdateProduct, db: Session):
 
     db.commit()
     db.refresh(product)
+    category_cache.prime(db)
     return product
 
 
 
 
 def delete_product_by_id(product_id: int, db: Session):
-    product = db.get(Product, product_id)
+    # La categoría se carga antes de borrar: la respuesta la serializa con el objeto ya desligado
+    product = db.get(Product, product_id, options=PRODUCT_LOAD_OPTIONS)
     if not product:
         raise HTTPException(status_code=404, detail="Product not Found")
     db.delete(product)
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Optional
+import pytz
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.store.inventory.models import ProductStockLevel
+from app.models.store.orders.models import OrderItem
+from app.models.store.products.models import Product
+from app.models.store.sales.models import Sale
+from app.services.store.products.stock_movements import ensure_daily_snapshot
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0")
+CENTS = Decimal("0.01")
+VELOCITY_PRECISION = Decimal("0.001")
+
+
+def _now() -> datetime:
+    # Las fechas se guardan en hora de Colombia sin zona horaria
+    return datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None)
+
+
+def refresh_stock_levels(db: Session) -> int:
+    """
+    Recalcula velocidad de venta y punto de reorden de todos los productos.
+
+    velocidad = unidades vendidas en los últimos LOW_STOCK_VELOCITY_DAYS / días
+    punto de reorden = velocidad * (días de entrega + días de seguridad)
+    stock objetivo = punto de reorden + velocidad * LOW_STOCK_COVER_DAYS
+
+    Una sola consulta agregada sobre order_items y la tabla se reemplaza
+    completa en una transacción (delete + insert en lote).
+    """
+    now = _now()
+    days = settings.LOW_STOCK_VELOCITY_DAYS
+    sold = dict(
+        db.query(OrderItem.product_id, func.sum(OrderItem.quantity))
+        .select_from(Sale)
+        .join(OrderItem, OrderItem.order_id == Sale.order_id)
+        .filter(Sale.date >= now - timedelta(days=days))
+        .group_by(OrderItem.product_id)
+        .all()
+    )
+
+    lead_days = settings.LOW_STOCK_LEAD_TIME_DAYS + settings.LOW_STOCK_SAFETY_DAYS
+    rows = []
+    for (product_id,) in db.query(Product.id).all():
+        velocity = ((sold.get(product_id) or ZERO) / days).quantize(VELOCITY_PRECISION, rounding=ROUND_HALF_UP)
+        reorder_point = (velocity * lead_days).quantize(CENTS, rounding=ROUND_HALF_UP)
+        rows.append({
+            "product_id": product_id,
+            "daily_velocity": velocity,
+            "reorder_point": reorder_point,
+            "target_stock": (reorder_point + velocity * settings.LOW_STOCK_COVER_DAYS).quantize(CENTS, rounding=ROUND_HALF_UP),
+            "computed_at": now
+        })
+
+    db.execute(delete(ProductStockLevel))
+    if rows:
+        db.execute(insert(ProductStockLevel), rows)
+    db.commit()
+    logger.info("Niveles de reorden recalculados para %s productos", len(rows))
+    return len(rows)
+
+
+def stock_levels_age(db: Session) -> Optional[timedelta]:
+    computed_at = db.query(func.max(ProductStockLevel.computed_at)).scalar()
+    return _now() - computed_at if computed_at else None
+
+
+def low_stock_products(db: Session) -> List[dict]:
+    """
+    Productos activos con stock en o bajo su punto de reorden. Lee la tabla
+    precalculada unida al stock actual: no recorre el historial de ventas.
+    """
+    rows = (
+        db.query(
+            Product.id, Product.name, Product.category_id, Product.stock,
+            ProductStockLevel.daily_velocity, ProductStockLevel.reorder_point,
+            ProductStockLevel.target_stock, ProductStockLevel.computed_at
+        )
+        # outerjoin: un producto creado después del último cálculo aparece si ya está agotado
+        .outerjoin(ProductStockLevel, ProductStockLevel.product_id == Product.id)
+        .filter(
+            Product.state.is_(True),
+            func.coalesce(Product.stock, 0) <= func.coalesce(ProductStockLevel.reorder_point, 0)
+        )
+        .order_by(Product.name)
+        .all()
+    )
+
+    result = []
+    for row in rows:
+        stock = row.stock or ZERO
+        velocity = row.daily_velocity or ZERO
+        reorder_point = row.reorder_point or ZERO
+        result.append({
+            "product_id": row.id,
+            "name": row.name,
+            "category_id": row.category_id,
+            "stock": float(stock),
+            "daily_velocity": float(velocity),
+            "reorder_point": float(reorder_point),
+            "days_of_cover": round(float(stock / velocity), 1) if velocity > 0 else None,
+            "suggested_quantity": float(max((row.target_stock or ZERO) - stock, ZERO)),
+            "computed_at": row.computed_at.isoformat() if row.computed_at else None
+        })
+    # Primero los que se agotan antes
+    result.sort(key=lambda item: (item["days_of_cover"] is not None, item["days_of_cover"] or 0))
+    return result
+
+
+class StockLevelsJob:
+    """
+    Tarea asyncio que recalcula los niveles de reorden cada
+    LOW_STOCK_REFRESH_SECONDS y guarda el snapshot diario de stock del día
+    anterior. Corre en cada worker de uvicorn, pero antes de recalcular
+    revisa la antigüedad de la tabla: si otro worker ya lo hizo, espera al
+    siguiente ciclo (el snapshot tampoco se repite).
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self._refresh_if_stale)
+            except Exception as exc:
+                logger.error("No se pudieron recalcular los niveles de reorden: %s", exc)
+            try:
+                await run_in_threadpool(self._snapshot)
+            except Exception as exc:
+                logger.error("No se pudo guardar el snapshot diario de stock: %s", exc)
+            await asyncio.sleep(settings.LOW_STOCK_REFRESH_SECONDS)
+
+    @staticmethod
+    def _refresh_if_stale() -> None:
+        db = SessionLocal()
+        try:
+            age = stock_levels_age(db)
+            if age is None or age.total_seconds() >= settings.LOW_STOCK_REFRESH_SECONDS:
+                refresh_stock_levels(db)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _snapshot() -> None:
+        db = SessionLocal()
+        try:
+            ensure_daily_snapshot(db)
+        finally:
+            db.close()
+
+
+stock_levels_job = StockLevelsJob()
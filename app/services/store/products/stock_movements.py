@@ -0,0 +1,160 @@
+import logging
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Optional
+import pytz
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.store.inventory.models import StockMovement, StockMovementReason, StockSnapshot
+from app.models.store.products.models import Product
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0")
+# Escala de products.stock y del libro: lo que se registra es exactamente lo que guarda la BD
+STOCK_PRECISION = Decimal("0.001")
+
+
+def quantize_stock(value) -> Decimal:
+    # ROUND_HALF_UP redondea lejos de cero, igual que MySQL al guardar un DECIMAL
+    return Decimal(str(value)).quantize(STOCK_PRECISION, rounding=ROUND_HALF_UP)
+
+
+def _now() -> datetime:
+    # Las fechas se guardan en hora de Colombia sin zona horaria
+    return datetime.now(pytz.timezone('America/Bogota')).replace(tzinfo=None)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def record_stock_movement(
+    db: Session,
+    product_id: int,
+    quantity,
+    reason: StockMovementReason,
+    stock_after=None,
+    order_id: int = None
+) -> None:
+    """
+    Registra un movimiento en la sesión del llamador, sin commit: queda en
+    la misma transacción que el cambio de stock. Los movimientos en cero no
+    se guardan. Cantidad y stock resultante se llevan a la escala del stock.
+    """
+    quantity = quantize_stock(quantity)
+    if quantity == 0:
+        return
+    db.add(StockMovement(
+        product_id=product_id,
+        quantity=quantity,
+        stock_after=quantize_stock(stock_after) if stock_after is not None else None,
+        reason=reason,
+        order_id=order_id,
+        created_at=_now()
+    ))
+
+
+def _movements_sum(db: Session, product_id: int, since: datetime, until: Optional[datetime] = None) -> Decimal:
+    query = db.query(func.sum(StockMovement.quantity)).filter(
+        StockMovement.product_id == product_id,
+        StockMovement.created_at >= since
+    )
+    if until is not None:
+        query = query.filter(StockMovement.created_at < until)
+    return query.scalar() or ZERO
+
+
+def take_stock_snapshots(db: Session, day: date) -> int:
+    """
+    Guarda el stock de todos los productos al cierre de `day`: el stock
+    actual menos los movimientos posteriores a ese día (una consulta
+    agregada). Si otro worker ya lo guardó no hace nada.
+    """
+    if db.query(StockSnapshot.day).filter(StockSnapshot.day == day).first():
+        return 0
+
+    after = dict(
+        db.query(StockMovement.product_id, func.sum(StockMovement.quantity))
+        .filter(StockMovement.created_at >= _day_start(day + timedelta(days=1)))
+        .group_by(StockMovement.product_id)
+        .all()
+    )
+    rows = [
+        {"product_id": product_id, "day": day, "stock": (stock or ZERO) - (after.get(product_id) or ZERO)}
+        for product_id, stock in db.query(Product.id, Product.stock).all()
+    ]
+    if not rows:
+        return 0
+    try:
+        db.execute(insert(StockSnapshot), rows)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return 0
+    logger.info("Snapshot de stock del %s guardado para %s productos", day, len(rows))
+    return len(rows)
+
+
+def ensure_daily_snapshot(db: Session) -> int:
+    """Snapshot del día anterior (lo llama el job de inventario)."""
+    return take_stock_snapshots(db, _now().date() - timedelta(days=1))
+
+
+def stock_history(db: Session, product: Product, start_date: date, end_date: date) -> Dict[str, Any]:
+    """
+    Movimientos del rango con el stock resultante de cada uno. El stock
+    inicial parte del último snapshot anterior al rango y solo suma la cola
+    de movimientos desde ese snapshot, así que el costo no depende de cuánto
+    historial tenga el producto.
+    """
+    start = _day_start(start_date)
+    end = _day_start(end_date + timedelta(days=1))
+
+    snapshot = (
+        db.query(StockSnapshot)
+        .filter(StockSnapshot.product_id == product.id, StockSnapshot.day < start_date)
+        .order_by(StockSnapshot.day.desc())
+        .first()
+    )
+    if snapshot is not None:
+        opening = snapshot.stock + _movements_sum(db, product.id, _day_start(snapshot.day + timedelta(days=1)), start)
+    else:
+        # Sin snapshot previo se reconstruye hacia atrás desde el stock actual
+        opening = (product.stock or ZERO) - _movements_sum(db, product.id, start)
+
+    movements = (
+        db.query(StockMovement)
+        .filter(
+            StockMovement.product_id == product.id,
+            StockMovement.created_at >= start,
+            StockMovement.created_at < end
+        )
+        .order_by(StockMovement.created_at, StockMovement.id)
+        .all()
+    )
+
+    balance = opening
+    items = []
+    for movement in movements:
+        balance += movement.quantity
+        items.append({
+            "id": movement.id,
+            "date": movement.created_at.isoformat(),
+            "reason": movement.reason.value,
+            "quantity": float(movement.quantity),
+            "stock": float(balance),
+            "order_id": movement.order_id
+        })
+
+    return {
+        "product_id": product.id,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "snapshot_day": snapshot.day.isoformat() if snapshot is not None else None,
+        "opening_stock": float(opening),
+        "closing_stock": float(balance),
+        "current_stock": float(product.stock or ZERO),
+        "movements": items
+    }
@@ -0,0 +1,235 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional, Tuple
+import pytz
+from sqlalchemy import distinct, extract, func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.reference_data import bump_version, read_version
+from app.models.store.customers.models import Customer
+from app.models.store.orders.models import Order, OrderItem
+from app.models.store.products.models import Product
+from app.models.store.sales.models import Sale
+from app.models.users.users import User
+from app.services.store.products.categories import category_cache
+
+# Versión en reference_data_versions que invalida los agregados de días cerrados
+SALES_HISTORY = "sales_history"
+
+DIMENSIONS = ("hour", "category", "customer")
+WEEKDAYS = ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo")
+ZERO = Decimal("0")
+CENTS = Decimal("0.01")
+
+# Agregados de un día: dimensión -> (user_id, clave) -> [ingresos, cantidad, ventas]
+DayAggregates = Dict[str, Dict[Tuple[Optional[int], Optional[int]], list]]
+
+
+def _today() -> date:
+    return datetime.now(pytz.timezone('America/Bogota')).date()
+
+
+def _as_date(value) -> date:
+    # SQLite devuelve DATE() como texto
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def _days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+def _dimension_key(dimension: str):
+    if dimension == "hour":
+        return extract("hour", Sale.date)
+    if dimension == "category":
+        return Product.category_id
+    return Order.customer_id
+
+
+def _query_days(db: Session, start: date, end: date) -> Dict[date, DayAggregates]:
+    """
+    Una consulta agrupada por dimensión sobre order_items, por día y vendedor.
+    El ingreso se atribuye por línea (subtotal), no por el total de la venta.
+    """
+    day = func.date(Sale.date)
+    aggregates = {current: {dimension: {} for dimension in DIMENSIONS} for current in _days(start, end)}
+
+    for dimension in DIMENSIONS:
+        key = _dimension_key(dimension)
+        query = (
+            db.query(
+                day,
+                Order.user_id,
+                key,
+                func.sum(OrderItem.subtotal),
+                func.sum(OrderItem.quantity),
+                func.count(distinct(Sale.id))
+            )
+            .select_from(Sale)
+            .join(Order, Order.id == Sale.order_id)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+        )
+        if dimension == "category":
+            # outerjoin: las líneas de productos borrados cuentan como "sin categoría"
+            query = query.outerjoin(Product, Product.id == OrderItem.product_id)
+
+        # Rango sobre la columna (usa ix_sales_date) en lugar de comparar DATE(sales.date)
+        rows = query.filter(
+            Sale.date >= datetime.combine(start, time.min),
+            Sale.date < datetime.combine(end + timedelta(days=1), time.min)
+        ).group_by(day, Order.user_id, key).all()
+
+        for row_day, user_id, value, revenue, quantity, sales in rows:
+            value = int(value) if value is not None else None
+            aggregates[_as_date(row_day)][dimension][(user_id, value)] = [revenue or ZERO, quantity or ZERO, sales]
+
+    return aggregates
+
+
+class SalesAnalyticsCache:
+    """
+    Agregados de ventas por día, guardados en memoria solo para días cerrados
+    (anteriores a hoy en Colombia); el día en curso siempre se consulta.
+
+    Los cambios a ventas ya registradas llaman invalidate_sales_history(),
+    que incrementa la versión "sales_history": cada consulta lee esa versión
+    (una búsqueda por llave primaria) y descarta los días guardados si cambió,
+    así que todos los workers ven los cambios en la siguiente petición.
+    """
+
+    def __init__(self, max_days: int):
+        self.max_days = max_days
+        self._lock = threading.Lock()
+        self._days: "OrderedDict[date, DayAggregates]" = OrderedDict()
+        self._version: Optional[int] = None
+
+    def days(self, db: Session, start: date, end: date) -> Dict[date, DayAggregates]:
+        version = read_version(db, SALES_HISTORY)
+        today = _today()
+        result: Dict[date, DayAggregates] = {}
+
+        with self._lock:
+            if version != self._version:
+                self._days.clear()
+                self._version = version
+            for current in _days(start, end):
+                if current in self._days:
+                    self._days.move_to_end(current)
+                    result[current] = self._days[current]
+
+        missing = [current for current in _days(start, end) if current not in result]
+        if not missing:
+            return result
+
+        fetched = _query_days(db, missing[0], missing[-1])
+        with self._lock:
+            for current in missing:
+                result[current] = fetched[current]
+                # Si la versión cambió mientras se consultaba, estos datos pueden estar viejos
+                if current < today and self._version == version:
+                    self._days[current] = fetched[current]
+            while len(self._days) > self.max_days:
+                self._days.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._days.clear()
+            self._version = None
+
+
+sales_analytics_cache = SalesAnalyticsCache(settings.SALES_ANALYTICS_CACHE_DAYS)
+
+
+def invalidate_sales_history(db: Session, when: Optional[datetime] = None) -> None:
+    """
+    Invalida los agregados de días cerrados en todos los workers. Se llama
+    antes del commit de cualquier cambio sobre ventas ya registradas; si
+    `when` es de hoy (o posterior) no hace nada, porque ese día no se guarda.
+    """
+    if when is not None and when.date() >= _today():
+        return
+    bump_version(db, SALES_HISTORY)
+
+
+def _accumulate(target: Dict[Any, list], key, values: list) -> None:
+    entry = target.get(key)
+    if entry is None:
+        target[key] = [values[0], values[1], values[2]]
+    else:
+        entry[0] += values[0]
+        entry[1] += values[1]
+        entry[2] += values[2]
+
+
+def _money(value: Decimal) -> float:
+    return float(value.quantize(CENTS, rounding=ROUND_HALF_UP))
+
+
+def _metrics(values: list) -> Dict[str, Any]:
+    revenue, quantity, sales = values
+    return {
+        "revenue": _money(revenue),
+        "quantity": float(quantity),
+        "sales": sales,
+        "average_ticket": _money(revenue / sales) if sales else 0.0
+    }
+
+
+def _ranked(grouped: Dict[Any, list], id_field: str, names: Dict[Any, str]) -> List[Dict[str, Any]]:
+    rows = sorted(grouped.items(), key=lambda item: item[1][0], reverse=True)
+    return [{id_field: key, "name": names.get(key), **_metrics(values)} for key, values in rows]
+
+
+def sales_analytics(db: Session, start_date: date, end_date: date, user_id: int = None) -> Dict[str, Any]:
+    """Ventas del rango por vendedor, categoría, cliente, hora del día y día de la semana."""
+    days = sales_analytics_cache.days(db, start_date, end_date)
+
+    totals = [ZERO, ZERO, 0]
+    by_seller: Dict[Optional[int], list] = {}
+    by_hour: Dict[int, list] = {}
+    by_weekday: Dict[int, list] = {}
+    by_category: Dict[Optional[int], list] = {}
+    by_customer: Dict[Optional[int], list] = {}
+
+    for current, aggregates in days.items():
+        # Cada venta cae en una sola hora: la dimensión por hora da también los totales
+        for (seller, hour), values in aggregates["hour"].items():
+            if user_id is not None and seller != user_id:
+                continue
+            _accumulate(by_hour, hour, values)
+            _accumulate(by_seller, seller, values)
+            _accumulate(by_weekday, current.weekday(), values)
+            totals[0] += values[0]
+            totals[1] += values[1]
+            totals[2] += values[2]
+        for (seller, category_id), values in aggregates["category"].items():
+            if user_id is None or seller == user_id:
+                _accumulate(by_category, category_id, values)
+        for (seller, customer_id), values in aggregates["customer"].items():
+            if user_id is None or seller == user_id:
+                _accumulate(by_customer, customer_id, values)
+
+    # Nombres resueltos al armar la respuesta: los agregados guardados solo tienen ids
+    seller_ids = [seller for seller in by_seller if seller is not None]
+    sellers = dict(db.query(User.id, User.full_name).filter(User.id.in_(seller_ids)).all()) if seller_ids else {}
+    customer_ids = [customer for customer in by_customer if customer is not None]
+    customers = dict(db.query(Customer.id, Customer.name).filter(Customer.id.in_(customer_ids)).all()) if customer_ids else {}
+    categories = {category.id: category.name for category in category_cache.all(db)}
+
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "user_id": user_id,
+        "totals": _metrics(totals),
+        "by_seller": _ranked(by_seller, "user_id", sellers),
+        "by_category": _ranked(by_category, "category_id", categories),
+        "by_customer": _ranked(by_customer, "customer_id", customers),
+        "by_hour": [{"hour": hour, **_metrics(by_hour[hour])} for hour in sorted(by_hour)],
+        "by_weekday": [
+            {"weekday": weekday, "name": WEEKDAYS[weekday], **_metrics(by_weekday[weekday])}
+            for weekday in sorted(by_weekday)
+        ]
+    }
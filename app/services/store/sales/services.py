@@ -7,11 +7,30 @@ from fastapi import HTTPException
 from app.models.store.products.models import Product
 from app.models.store.sales.models import Sale
 from app.models.store.orders.models import Order,OrderItem
+from app.models.store.inventory.models import StockMovementReason
 from app.schemas.store.sales.schemas import SaleCreate
 from app.services.store.returns.services import get_total_returns_by_date
+from app.core.events import event_broker
+from app.services.store.orders.orders import ORDER_LOAD_OPTIONS
+from app.services.store.products.categories import category_cache
+from app.services.store.sales.analytics import invalidate_sales_history
+from app.services.store.products.stock_movements import record_stock_movement
 
 
-# Funciones auxiliares para cálculos
+# Datos mínimos de una venta para los eventos en tiempo real
+def _sale_event_data(sale: Sale, order: Order = None) -> dict:
+    return {
+        "id": sale.id,
+        "order_id": sale.order_id,
+        "total": float(sale.total or 0),
+        "balance": float(sale.balance or 0),
+        "user_id": order.user_id if order else None
+    }
+
+ZERO = Decimal("0.00")
+CENTS = Decimal("0.01")
+
+# Funciones auxiliares para cálculos (los montos llegan como Decimal desde columnas Numeric)
 def _calculate_earnings(order: Order, product_dict: Dict[int, Product]) -> list:
     earnings = []
     for item in order.items:
@@ -19,22 +38,22 @@ def _calculate_earnings(order: Order, product_dict: Dict[int, Product]) -> list:
         if not product:
             continue
 
-        quantity = Decimal(str(item.quantity or 0))
+        quantity = item.quantity or ZERO
         if quantity == 0:
             continue
 
-        purchase_price = Decimal(str(product.purchase_price))
-        expected_unit_price = Decimal(str(product.sale_price))
-        real_unit_price = Decimal(str(item.price_unit or 0))
+        purchase_price = product.purchase_price or ZERO
+        expected_unit_price = product.sale_price or ZERO
+        real_unit_price = item.price_unit or ZERO
 
         if real_unit_price == 0:
             loss_amount = purchase_price * quantity
-            actual_profit_per_unit = Decimal("0.00")
+            actual_profit_per_unit = ZERO
             expected_profit_per_unit = expected_unit_price - purchase_price
-            total_actual_profit = Decimal("0.00")
+            total_actual_profit = ZERO
             profit_difference_total = -expected_profit_per_unit * quantity
         else:
-            loss_amount = Decimal("0.00")
+            loss_amount = ZERO
             actual_profit_per_unit = real_unit_price - purchase_price
             expected_profit_per_unit = expected_unit_price - purchase_price
             total_actual_profit = actual_profit_per_unit * quantity
@@ -56,11 +75,21 @@ def _calculate_earnings(order: Order, product_dict: Dict[int, Product]) -> list:
     return earnings
 
 def _calculate_losses(earnings: list) -> Decimal:
-    return Decimal(sum(Decimal(str(e["loss_amount"])) for e in earnings))
+    return sum((e["loss_amount"] for e in earnings), ZERO)
 
 def _calculate_returns(db: Session, day: date) -> Decimal:
     returns = get_total_returns_by_date(db=db, return_date=day)
-    return Decimal(str(returns)) if returns is not None else Decimal("0.00")
+    return Decimal(returns) if returns is not None else ZERO
+
+def _round(value: Decimal) -> Decimal:
+    return value.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+def _money(value: Decimal) -> float:
+    return float(_round(value))
+
+def _as_float(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Los acumulados se mantienen en Decimal y solo se convierten al armar la respuesta
+    return {key: float(value) if isinstance(value, Decimal) else value for key, value in data.items()}
 
 def earnings_by_date_range(
     db: Session,
@@ -84,9 +113,9 @@ def earnings_by_date_range(
         
     earnings_by_product = {}
     daily_breakdown = {}
-    total_profit_period = Decimal("0.00")
-    total_losses_period = Decimal("0.00")
-    total_returns_period = Decimal("0.00")
+    total_profit_period = ZERO
+    total_losses_period = ZERO
+    total_returns_period = ZERO
 
     product_ids = {
         item.product_id
@@ -111,10 +140,10 @@ def earnings_by_date_range(
         if sale_date not in daily_breakdown:
             daily_breakdown[sale_date] = {
                 "earnings_by_product": {},
-                "total_profit_day": Decimal("0.00"),
-                "total_losses_day": Decimal("0.00"),
-                "total_returns_day": Decimal("0.00"),
-                "net_profit_day": Decimal("0.00")
+                "total_profit_day": ZERO,
+                "total_losses_day": ZERO,
+                "total_returns_day": ZERO,
+                "net_profit_day": ZERO
             }
         
         earnings = _calculate_earnings(order, product_dict)
@@ -125,29 +154,17 @@ def earnings_by_date_range(
             if pid not in daily_breakdown[sale_date]["earnings_by_product"]:
                 daily_breakdown[sale_date]["earnings_by_product"][pid] = {
                     "product_name": e["product_name"],
-                    "quantity_sold": float(e["quantity"]),
-                    "real_unit_price": float(e["real_unit_price"]),
-                    "expected_unit_price": float(e["expected_unit_price"]),
-                    "purchase_price": float(e["purchase_price"]),
-                    "total_actual_profit": float(
-                        e["total_actual_profit"].quantize(
-                            Decimal("0.01"), rounding=ROUND_HALF_UP
-                        )
-                    ),
-                    "loss": float(
-                        e["loss_amount"].quantize(
-                            Decimal("0.01"), rounding=ROUND_HALF_UP
-                        )
-                    )
+                    "quantity_sold": e["quantity"],
+                    "real_unit_price": e["real_unit_price"],
+                    "expected_unit_price": e["expected_unit_price"],
+                    "purchase_price": e["purchase_price"],
+                    "total_actual_profit": _round(e["total_actual_profit"]),
+                    "loss": _round(e["loss_amount"])
                 }
             else:
-                daily_breakdown[sale_date]["earnings_by_product"][pid]["quantity_sold"] += float(e["quantity"])
-                daily_breakdown[sale_date]["earnings_by_product"][pid]["total_actual_profit"] += float(
-                    e["total_actual_profit"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                )
-                daily_breakdown[sale_date]["earnings_by_product"][pid]["loss"] += float(
-                    e["loss_amount"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                )
+                daily_breakdown[sale_date]["earnings_by_product"][pid]["quantity_sold"] += e["quantity"]
+                daily_breakdown[sale_date]["earnings_by_product"][pid]["total_actual_profit"] += _round(e["total_actual_profit"])
+                daily_breakdown[sale_date]["earnings_by_product"][pid]["loss"] += _round(e["loss_amount"])
             
             daily_breakdown[sale_date]["total_profit_day"] += e["total_actual_profit"]
             daily_breakdown[sale_date]["total_losses_day"] += e["loss_amount"]
@@ -189,36 +206,26 @@ def earnings_by_date_range(
     return {
         "daily_breakdown": {
             str(day): {
-                "earnings_by_product": day_data["earnings_by_product"],
-                "total_profit_day": float(
-                    day_data["total_profit_day"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                ),
-                "total_losses_day": float(
-                    day_data["total_losses_day"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                ),
-                "total_returns_day": float(
-                    day_data["total_returns_day"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                ),
-                "net_profit_day": float(
-                    day_data["net_profit_day"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                )
+                "earnings_by_product": {
+                    pid: _as_float(product_data)
+                    for pid, product_data in day_data["earnings_by_product"].items()
+                },
+                "total_profit_day": _money(day_data["total_profit_day"]),
+                "total_losses_day": _money(day_data["total_losses_day"]),
+                "total_returns_day": _money(day_data["total_returns_day"]),
+                "net_profit_day": _money(day_data["net_profit_day"])
             }
             for day, day_data in sorted(daily_breakdown.items())
         },
         "summary": {
-            "earnings_by_product": earnings_by_product,
-            "total_profit_period": float(
-                total_profit_period.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-            ),
-            "total_losses_period": float(
-                total_losses_period.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-            ),
-            "total_returns_period": float(
-                total_returns_period.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-            ),
-            "net_profit_after_returns": float(
-                net_profit_after_returns.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-            ),
+            "earnings_by_product": {
+                pid: _as_float(product_data)
+                for pid, product_data in earnings_by_product.items()
+            },
+            "total_profit_period": _money(total_profit_period),
+            "total_losses_period": _money(total_losses_period),
+            "total_returns_period": _money(total_returns_period),
+            "net_profit_after_returns": _money(net_profit_after_returns),
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat(),
             "days_with_sales": len(daily_breakdown)
@@ -230,7 +237,7 @@ def earnings_per_day(day: date, db: Session) -> Dict[str, Any]:
         joinedload(Sale.order).joinedload(Order.items)
     ).filter(func.date(Sale.date) == day).all()
     earnings_by_product = {}
-    total_profit_day = Decimal("0.00")
+    total_profit_day = ZERO
 
     product_ids = {item.product_id for sale in sales for item in (sale.order.items if sale.order else [])}
     products = db.query(Product).filter(Product.id.in_(product_ids)).all() if product_ids else []
@@ -251,44 +258,45 @@ def earnings_per_day(day: date, db: Session) -> Dict[str, Any]:
         if pid not in earnings_by_product:
             earnings_by_product[pid] = {
                 "product_name": e["product_name"],
-                "quantity_sold": float(e["quantity"]),
-                "real_unit_price": float(e["real_unit_price"]),
-                "expected_unit_price": float(e["expected_unit_price"]),
-                "purchase_price": float(e["purchase_price"]),
-                "expected_profit_per_unit": float(e["expected_profit_per_unit"]),
-                "actual_profit_per_unit": float(e["actual_profit_per_unit"]),
-                "total_actual_profit": float(e["total_actual_profit"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
-                "profit_difference_total": float(e["profit_difference_total"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
-                "loss": float(e["loss_amount"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+                "quantity_sold": e["quantity"],
+                "real_unit_price": e["real_unit_price"],
+                "expected_unit_price": e["expected_unit_price"],
+                "purchase_price": e["purchase_price"],
+                "expected_profit_per_unit": e["expected_profit_per_unit"],
+                "actual_profit_per_unit": e["actual_profit_per_unit"],
+                "total_actual_profit": _round(e["total_actual_profit"]),
+                "profit_difference_total": _round(e["profit_difference_total"]),
+                "loss": _round(e["loss_amount"])
             }
         else:
-            earnings_by_product[pid]["quantity_sold"] += float(e["quantity"])
-            earnings_by_product[pid]["total_actual_profit"] += float(e["total_actual_profit"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-            earnings_by_product[pid]["profit_difference_total"] += float(e["profit_difference_total"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-            earnings_by_product[pid]["loss"] += float(e["loss_amount"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+            earnings_by_product[pid]["quantity_sold"] += e["quantity"]
+            earnings_by_product[pid]["total_actual_profit"] += _round(e["total_actual_profit"])
+            earnings_by_product[pid]["profit_difference_total"] += _round(e["profit_difference_total"])
+            earnings_by_product[pid]["loss"] += _round(e["loss_amount"])
 
         total_profit_day += e["total_actual_profit"]
 
     total_profit_day -= total_losses
     total_returns = _calculate_returns(db, day)
     net_profit_after_returns = total_profit_day - total_returns
+    products_out = {pid: _as_float(product_data) for pid, product_data in earnings_by_product.items()}
 
     return {
         "daily_breakdown": {
             day.isoformat(): {
-                "earnings_by_product": earnings_by_product,
-                "total_profit_day": float(total_profit_day.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
-                "total_losses_day": float(total_losses.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
-                "total_returns_day": float(total_returns.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
-                "net_profit_day": float(net_profit_after_returns.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+                "earnings_by_product": products_out,
+                "total_profit_day": _money(total_profit_day),
+                "total_losses_day": _money(total_losses),
+                "total_returns_day": _money(total_returns),
+                "net_profit_day": _money(net_profit_after_returns)
             }
         },
         "summary": {
-            "earnings_by_product": earnings_by_product,
-            "total_profit_period": float(total_profit_day.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
-            "total_losses_period": float(total_losses.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
-            "total_returns_period": float(total_returns.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
-            "net_profit_after_returns": float(net_profit_after_returns.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
+            "earnings_by_product": products_out,
+            "total_profit_period": _money(total_profit_day),
+            "total_losses_period": _money(total_losses),
+            "total_returns_period": _money(total_returns),
+            "net_profit_after_returns": _money(net_profit_after_returns),
             "start_date": day.isoformat(),
             "end_date": day.isoformat(),
             "days_with_sales": 1 if earnings_by_product else 0
@@ -296,7 +304,8 @@ def earnings_per_day(day: date, db: Session) -> Dict[str, Any]:
     }
 
 # Funciones CRUD para ventas (sin cambios)
-def create_sale(db: Session, sale_data: SaleCreate, user_id: int = None) -> Sale:
+def create_sale(db: Session, sale_data: SaleCreate, user_id: int = None, commit: bool = True) -> Sale:
+    """commit=False (run_idempotent) solo hace flush: el llamador confirma la transacción."""
     order = db.query(Order).filter(Order.id == sale_data.order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
@@ -319,50 +328,74 @@ def create_sale(db: Session, sale_data: SaleCreate, user_id: int = None) -> Sale
             
         # Solo reducir stock si hay suficiente (evitando negativos)
         if product.stock > 0:
+            previous_stock = product.stock
             product.stock = max(0, product.stock - item.quantity)  # Asegura que no sea negativo
             db.add(product)
+            record_stock_movement(
+                db, product.id, product.stock - previous_stock, StockMovementReason.SALE,
+                stock_after=product.stock, order_id=order.id
+            )
 
     # Lógica existente para calcular totales
-    total = sum(Decimal(str(item.subtotal)) for item in order.items) if order.items else Decimal("0.00")
-    transfer_payment = Decimal(str(sale_data.transfer_payment or 0))
+    total = sum((item.subtotal for item in order.items), ZERO)
+    transfer_payment = sale_data.transfer_payment or ZERO
     balance = total - transfer_payment
 
     # Crear la venta
     sale = Sale(
         order_id=order.id,
-        total=float(total),
-        transfer_payment=float(transfer_payment),
-        balance=float(balance)
+        total=total,
+        transfer_payment=transfer_payment,
+        balance=balance
     )
     
     db.add(sale)
     order.status = "completed"
-    db.commit()
+    if commit:
+        db.commit()
+    else:
+        db.flush()
     db.refresh(order)
     db.refresh(sale)
 
+    event_broker.publish_after_commit(db, "sale.created", _sale_event_data(sale, order))
+    event_broker.publish_after_commit(db, "order.completed", {
+        "id": order.id,
+        "status": order.status,
+        "customer_id": order.customer_id,
+        "user_id": order.user_id
+    })
+
     return sale
+# Relaciones que serializa SaleOut (el pedido completo con productos y categorías)
+SALE_LOAD_OPTIONS = (
+    joinedload(Sale.order).options(*ORDER_LOAD_OPTIONS),
+)
+
+def _sales_query(db: Session):
+    category_cache.prime(db)
+    return db.query(Sale).options(*SALE_LOAD_OPTIONS)
+
 def get_all_sales(db: Session):
-    return db.query(Sale).options(
-        joinedload(Sale.order)
-        .joinedload(Order.items)
-        .joinedload(OrderItem.product)
-    ).all()
+    return _sales_query(db).all()
 
 def get_sale_by_id(db: Session, sale_id: int) -> Sale:
-    sale = db.query(Sale).filter(Sale.id == sale_id).first()
+    sale = _sales_query(db).filter(Sale.id == sale_id).first()
     if not sale:
         raise HTTPException(status_code=404, detail="Venta no encontrada")
     return sale
 
-def get_sales_by_customer(db: Session, customer_id: int):
-    return (
-        db.query(Sale)
+def get_sales_by_customer(db: Session, customer_id: int, skip: int = 0, limit: int = None):
+    query = (
+        _sales_query(db)
         .join(Sale.order)
         .filter(Order.customer_id == customer_id)
         .order_by(Sale.date.desc())
-        .all()
+        .offset(skip)
     )
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
 
 def update_sale(db: Session, sale_id: int, sale_data: SaleCreate) -> Sale:
     sale = db.query(Sale).filter(Sale.id == sale_id).first()
@@ -370,12 +403,11 @@ def update_sale(db: Session, sale_id: int, sale_data: SaleCreate) -> Sale:
         raise HTTPException(status_code=404, detail="Venta no encontrada")
 
     # No permitimos cambiar el pedido asociado, solo los pagos
-    transfer_payment = Decimal(str(sale_data.transfer_payment or sale.transfer_payment))
-    total = Decimal(str(sale.total))
-    balance = total - transfer_payment
+    transfer_payment = sale_data.transfer_payment or sale.transfer_payment or ZERO
+    balance = sale.total - transfer_payment
 
-    sale.transfer_payment = float(transfer_payment)
-    sale.balance = float(balance)
+    sale.transfer_payment = transfer_payment
+    sale.balance = balance
 
     db.commit()
     db.refresh(sale)
@@ -395,17 +427,24 @@ def delete_sale(db: Session, sale_id: int) -> Sale:
             if product:
                 product.stock += item.quantity
                 db.add(product)
+                record_stock_movement(
+                    db, product.id, item.quantity, StockMovementReason.SALE_DELETED,
+                    stock_after=product.stock, order_id=order.id
+                )
 
+    event_data = _sale_event_data(sale, order)
+    invalidate_sales_history(db, sale.date)
     db.delete(sale)
     db.commit()
+    event_broker.publish("sale.deleted", event_data)
 
     return sale
 
 def sales_for_day(db: Session, day: date):
-    return db.query(Sale).filter(func.date(Sale.date) == day).all()
+    return _sales_query(db).filter(func.date(Sale.date) == day).all()
 
 def sales_between_dates(db: Session, start_date: date, end_date: date):
-    return db.query(Sale).filter(
+    return _sales_query(db).filter(
         func.date(Sale.date) >= start_date,
         func.date(Sale.date) <= end_date
     ).all()
\ No newline at end of file
@@ -1,23 +1,27 @@
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
+from app.core.reference_data import ReferenceData
 from app.models.store.services.models import Service
 from app.schemas.store.services.schemas import ServiceCreate, ServiceUpdate
 
+# Catálogo pequeño que casi no cambia: las lecturas se sirven desde memoria
+services_data = ReferenceData("services", Service)
+
 def create_service(db: Session, service: ServiceCreate):
     db_service = Service(**service.model_dump())
     db.add(db_service)
-    db.commit()
+    services_data.commit(db)
     db.refresh(db_service)
     return db_service
 
 def get_service(db: Session, service_id: int):
-    service = db.get(Service, service_id)
+    service = services_data.get(db, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Servicio no encontrado")
     return service
 
 def get_all_services(db: Session):
-    return db.query(Service).all()
+    return services_data.all(db)
 
 def update_service(db: Session, service_id: int, service: ServiceUpdate):
     db_service = db.get(Service, service_id)
@@ -28,7 +32,7 @@ def update_service(db: Session, service_id: int, service: ServiceUpdate):
     for key, value in update_data.items():
         setattr(db_service, key, value)
     
-    db.commit()
+    services_data.commit(db)
     db.refresh(db_service)
     return db_service
 
@@ -37,5 +41,5 @@ def delete_service(db: Session, service_id: int):
     if not service:
         raise HTTPException(status_code=404, detail="Servicio no encontrado")
     db.delete(service)
-    db.commit()
+    services_data.commit(db)
     return {"message": "Servicio eliminado"}
\ No newline at end of file
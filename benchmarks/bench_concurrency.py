@@ -0,0 +1,82 @@
+"""
+Actualizaciones de stock concurrentes sobre un mismo producto: el stock
+final debe ser exacto (sin actualizaciones perdidas) y el libro de
+movimientos debe cuadrar con él.
+
+En SQLite las escrituras se serializan con el bloqueo de la BD; para
+ejercitar el bloqueo de filas real usar --bench-url con un MySQL local.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import func
+
+from app.models.store.inventory.models import StockMovement
+from app.models.store.products.models import Product
+from app.services.store.products.products import add_to_stock, remove_from_stock
+
+THREADS = 8
+OPERATIONS_PER_THREAD = 25
+
+
+def _run(session_factory, fn):
+    db = session_factory()
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+
+def bench_concurrent_stock_updates_are_exact(session_factory):
+    product_id, initial = _run(session_factory, lambda db: db.query(Product.id, Product.stock).order_by(Product.id).first())
+    initial = initial or Decimal("0")
+    movements_before = _run(
+        session_factory,
+        lambda db: db.query(func.count(StockMovement.id)).filter(StockMovement.product_id == product_id).scalar()
+    )
+
+    def worker(n):
+        for i in range(OPERATIONS_PER_THREAD):
+            if (n + i) % 2:
+                _run(session_factory, lambda db: add_to_stock(db, product_id, 3))
+            else:
+                _run(session_factory, lambda db: remove_from_stock(db, product_id, 1, allow_negative=True))
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(pool.map(worker, range(THREADS)))
+
+    total = THREADS * OPERATIONS_PER_THREAD
+    adds = sum(1 for n in range(THREADS) for i in range(OPERATIONS_PER_THREAD) if (n + i) % 2)
+    expected = initial + Decimal(3 * adds - (total - adds))
+
+    final = _run(session_factory, lambda db: db.query(Product.stock).filter(Product.id == product_id).scalar())
+    assert final == expected
+
+    movements = _run(
+        session_factory,
+        lambda db: db.query(func.count(StockMovement.id)).filter(StockMovement.product_id == product_id).scalar()
+    )
+    assert movements - movements_before == total
+
+
+def bench_remove_stock_never_goes_negative(session_factory):
+    product_id = _run(session_factory, lambda db: db.query(Product.id).order_by(Product.id.desc()).first()[0])
+    stock = _run(session_factory, lambda db: db.query(Product.stock).filter(Product.id == product_id).scalar()) or Decimal("0")
+    available = int(stock)
+
+    def take(_):
+        try:
+            _run(session_factory, lambda db: remove_from_stock(db, product_id, 1))
+            return 1
+        except HTTPException as exc:
+            assert exc.status_code == 400
+            return 0
+
+    # Más intentos que unidades disponibles: solo deben aplicarse `available`
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        taken = sum(pool.map(take, range(available + THREADS * 2)))
+
+    final = _run(session_factory, lambda db: db.query(Product.stock).filter(Product.id == product_id).scalar())
+    assert taken == available
+    assert final == stock - available
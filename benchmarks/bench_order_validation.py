@@ -0,0 +1,36 @@
+"""
+Validaciones de la edición de pedidos: los errores de datos deben
+responder 4xx, no 500. Cada escenario corre en una transacción que se
+deshace al final, sin dejar filas en la BD compartida de los benchmarks.
+"""
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.store.orders.models import Order
+from app.models.store.products.models import Product
+from app.schemas.store.orders.schemas import OrderItemUpdate, OrderUpdate
+from app.services.store.orders.orders import patch_order
+
+
+def bench_new_item_without_price_is_rejected(session_factory):
+    db = session_factory()
+    try:
+        # Solo flush: el producto de prueba se deshace con el rollback y no
+        # queda en la BD compartida que usan los demás escenarios
+        product = Product(name="Producto sin precio", stock=Decimal("5"), sale_price=None)
+        db.add(product)
+        db.flush()
+        order = db.query(Order).filter(Order.status == "pending").order_by(Order.id).first()
+
+        with pytest.raises(HTTPException) as exc_info:
+            patch_order(db, order.id, OrderUpdate(items=[
+                OrderItemUpdate(product_id=product.id, quantity=Decimal("1"), price_unit=None)
+            ]))
+
+        assert exc_info.value.status_code == 400
+        assert "Producto sin precio" in exc_info.value.detail
+    finally:
+        db.rollback()
+        db.close()
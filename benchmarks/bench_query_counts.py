@@ -0,0 +1,26 @@
+"""
+Presupuesto de consultas SQL de los listados: debe ser constante sin
+importar cuántos productos, categorías o pedidos haya (sin cargas perezosas
+por fila). Falla si alguna relación serializada deja de cargarse por adelantado.
+"""
+from types import SimpleNamespace
+
+from app.api.store.orders.orders import get_orders
+from app.api.store.products.products import get_all_products_endpoint
+
+ADMIN = SimpleNamespace(id=1, rol="admin")
+
+
+def bench_products_listing_query_budget(count_queries):
+    count_queries(get_all_products_endpoint)  # Calienta el caché de categorías
+    # Productos + como máximo una carga de categorías
+    assert count_queries(get_all_products_endpoint) <= 2
+
+
+def bench_orders_listing_query_budget(count_queries):
+    def listing(db):
+        return get_orders(db=db, current_user=ADMIN)
+
+    count_queries(listing)
+    # Pedidos con items, productos, cliente y usuario en un JOIN + como máximo una carga de categorías
+    assert count_queries(listing) <= 2
@@ -0,0 +1,110 @@
+"""
+Costo de serializar listas de pedidos: camino de FastAPI (validación del
+response_model + dump a python + json.dumps) contra el camino rápido de
+app.core.serialization (TypeAdapter cacheado + dump_json de pydantic-core).
+
+Uso:
+    python -m benchmarks.bench_serialization --orders 1000 --items 8 --repeat 5
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+from pydantic import TypeAdapter  # noqa: E402
+from typing import List  # noqa: E402
+from app.core.serialization import list_adapter  # noqa: E402
+from app.schemas.store.orders.schemas import OrderOut  # noqa: E402
+
+
+def build_orders(count: int, items_per_order: int):
+    """Objetos con la misma forma que los modelos ORM cargados con joinedload."""
+    category = SimpleNamespace(id=1, name="Aseo", description="Productos de aseo")
+    products = [
+        SimpleNamespace(
+            id=i, name=f"Producto {i}", state=True, purchase_price=1000.0 + i,
+            stock=Decimal("25.00"), sale_price=1300.0 + i, profit_percentage=Decimal("30.00"),
+            image_url=None, category_id=1, category=category, unit="und"
+        )
+        for i in range(1, 51)
+    ]
+    customer = SimpleNamespace(
+        id=1, name="Cliente", cc=123456, alias="alias", phone="3000000000",
+        avatar=None, direction="Calle 1"
+    )
+    user = SimpleNamespace(
+        id=1, full_name="Vendedor", email="vendedor@example.com", phone="3000000000",
+        direction=None, image=None, rol="user"
+    )
+    start = datetime(2026, 1, 1, 8, 0)
+    orders = []
+    for n in range(count):
+        items = []
+        for i in range(items_per_order):
+            product = products[(n + i) % len(products)]
+            quantity = Decimal("2.000")
+            items.append(SimpleNamespace(
+                id=n * items_per_order + i, product_id=product.id, quantity=quantity,
+                price_unit=product.sale_price, subtotal=float(quantity) * product.sale_price,
+                product=product
+            ))
+        orders.append(SimpleNamespace(
+            id=n + 1, customer=customer, user=user, date=start + timedelta(minutes=n),
+            status="pending", items=items
+        ))
+    return orders
+
+
+# FastAPI también compila el response_model una sola vez al registrar la ruta
+RESPONSE_MODEL_ADAPTER = TypeAdapter(List[OrderOut])
+
+
+def fastapi_path(orders) -> bytes:
+    # Equivalente a lo que hace FastAPI con response_model=List[OrderOut]
+    validated = RESPONSE_MODEL_ADAPTER.validate_python(orders, from_attributes=True)
+    content = RESPONSE_MODEL_ADAPTER.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(orders) -> bytes:
+    adapter = list_adapter(OrderOut)
+    return adapter.dump_json(adapter.validate_python(orders, from_attributes=True))
+
+
+def measure(fn, orders, repeat: int) -> float:
+    fn(orders)  # calentamiento
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(orders)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    orders = build_orders(args.orders, args.items)
+    before = measure(fastapi_path, orders, args.repeat)
+    after = measure(fast_path, orders, args.repeat)
+    per_k = 1000 / args.orders
+
+    print(f"{args.orders} pedidos x {args.items} items (mediana de {args.repeat})")
+    print(f"  response_model + json.dumps : {before * per_k * 1000:8.1f} ms / 1k pedidos")
+    print(f"  TypeAdapter + dump_json     : {after * per_k * 1000:8.1f} ms / 1k pedidos")
+    print(f"  mejora                      : {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Escenarios de los endpoints y servicios más costosos de la tienda.
+Cada resultado incluye en extra_info las consultas SQL, el tiempo en BD y el
+pico de memoria de una ejecución (ver conftest.measure).
+
+Uso:
+    pip install -r benchmarks/requirements.txt
+    pytest benchmarks/ --bench-scale medium
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from app.api.store.products.products import get_all_products_endpoint
+from app.api.store.sales.api import get_sales_metrics_for_day
+from app.models.store.debt.models import Debt
+from app.models.store.orders.models import Order, OrderItem
+from app.models.store.products.models import Product
+from app.schemas.store.sales.schemas import SaleCreate
+from app.services.store.debt.debt_services import DebtService
+from app.services.store.orders.orders import get_orders_today
+from app.services.store.products.analytics import abc_classification, top_products
+from app.services.store.products.stock_levels import low_stock_products, refresh_stock_levels, stock_levels_age
+from app.services.store.sales.analytics import sales_analytics, sales_analytics_cache
+from app.services.store.sales.services import create_sale, earnings_by_date_range, earnings_per_day
+from benchmarks.datagen import today
+
+
+def _pending_order(db):
+    """Crea un pedido pendiente nuevo para que cada ronda de create_sale tenga uno propio."""
+    products = db.query(Product).order_by(Product.id).limit(8).all()
+    customer_id, user_id = db.query(Order.customer_id, Order.user_id).first()
+    order = Order(customer_id=customer_id, user_id=user_id, status="pending")
+    for product in products:
+        order.items.append(OrderItem(
+            product_id=product.id, quantity=Decimal("2"), price_unit=product.sale_price,
+            subtotal=product.sale_price * 2
+        ))
+    db.add(order)
+    db.commit()
+    return (SaleCreate(order_id=order.id, transfer_payment=Decimal("0")),)
+
+
+def bench_create_sale(measure):
+    measure(lambda db, sale_data: create_sale(db, sale_data, user_id=None), setup=_pending_order)
+
+
+def bench_earnings_by_date_range(measure):
+    end = today()
+    measure(lambda db: earnings_by_date_range(db, end - timedelta(days=6), end))
+
+
+def bench_earnings_per_day(measure):
+    measure(lambda db: earnings_per_day(today(), db))
+
+
+def bench_sales_day_metrics(measure):
+    measure(lambda db: get_sales_metrics_for_day(today(), db))
+
+
+def _cold_analytics_cache(db):
+    sales_analytics_cache.clear()
+    return ()
+
+
+def bench_sales_analytics_month_cold(measure):
+    end = today()
+    measure(lambda db: sales_analytics(db, end - timedelta(days=29), end), setup=_cold_analytics_cache)
+
+
+def bench_sales_analytics_month_warm(measure):
+    # Solo el día en curso se consulta; los días cerrados salen de la caché
+    end = today()
+    measure(lambda db: sales_analytics(db, end - timedelta(days=29), end))
+
+
+def bench_top_products_by_profit(measure):
+    end = today()
+    measure(lambda db: top_products(db, end - timedelta(days=29), end, by="profit", n=20))
+
+
+def bench_abc_classification(measure):
+    end = today()
+    measure(lambda db: abc_classification(db, end - timedelta(days=29), end))
+
+
+def bench_refresh_stock_levels(measure):
+    measure(refresh_stock_levels)
+
+
+def _stock_levels(db):
+    if stock_levels_age(db) is None:
+        refresh_stock_levels(db)
+    return ()
+
+
+def bench_low_stock_products(measure):
+    measure(low_stock_products, setup=_stock_levels)
+
+
+def bench_get_orders_today(measure):
+    measure(lambda db: get_orders_today(db))
+
+
+def bench_get_balance_history(measure):
+    def scenario(db):
+        customer_id = db.query(Debt.customer_id).order_by(Debt.id).first()[0]
+        return DebtService(db).get_balance_history(customer_id)
+    measure(scenario)
+
+
+def bench_get_all_products(measure):
+    # Se mide el endpoint completo: incluye la serialización con ProductOut
+    measure(lambda db: get_all_products_endpoint(db))
@@ -0,0 +1,123 @@
+"""
+Fixtures de los benchmarks: una BD SQLite temporal (o --bench-url) poblada
+una sola vez con benchmarks.datagen y el fixture `measure`, que además de la
+latencia de pytest-benchmark reporta consultas SQL y pico de memoria.
+
+Limitaciones de SQLite: with_for_update() se ignora (no hay bloqueo de filas)
+y func.date() compara texto; para medir contención o planes reales usar
+--bench-url con un MySQL local.
+"""
+import tracemalloc
+
+import pytest
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from app.core.metrics import RequestStats, current_request_stats, instrument_engine  # noqa: E402
+from benchmarks.datagen import SCALES, create_schema, populate  # noqa: E402
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("store-benchmarks")
+    group.addoption("--bench-scale", default="small", choices=sorted(SCALES), help="Escala de datos generados")
+    group.addoption("--bench-seed", type=int, default=42, help="Semilla del generador")
+    group.addoption(
+        "--bench-url", default=None,
+        help="URL de una BD vacía (ej: MySQL local); por defecto SQLite en un archivo temporal"
+    )
+
+
+@pytest.fixture(scope="session")
+def bench_engine(request, tmp_path_factory):
+    url = request.config.getoption("--bench-url")
+    if not url:
+        url = f"sqlite:///{tmp_path_factory.mktemp('bench') / 'store.db'}"
+    engine = create_engine(url)
+    create_schema(engine)
+    with Session(engine) as db:
+        populate(db, request.config.getoption("--bench-scale"), request.config.getoption("--bench-seed"))
+    # Se instrumenta después de poblar para que solo cuenten las consultas del escenario
+    instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(bench_engine):
+    def factory() -> Session:
+        # Igual que SessionLocal en la app: una sesión nueva por petición
+        return Session(bind=bench_engine, expire_on_commit=False)
+    return factory
+
+
+@pytest.fixture
+def count_queries(session_factory):
+    """count_queries(fn) -> consultas SQL que emite fn(db) con una sesión nueva."""
+    def _count(fn):
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        db = session_factory()
+        try:
+            fn(db)
+        finally:
+            db.close()
+            current_request_stats.reset(token)
+        return stats.query_count
+    return _count
+
+
+def _profile_once(fn, args, kwargs):
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        current_request_stats.reset(token)
+    return stats, peak
+
+
+@pytest.fixture
+def measure(benchmark, session_factory):
+    """
+    measure(fn, setup=None, rounds=20) ejecuta fn(db, *args) con una sesión
+    nueva por llamada. Antes de medir latencia hace una ejecución aparte para
+    contar consultas y el pico de memoria (tracemalloc distorsiona los tiempos).
+    setup(db) -> args se usa en escenarios que consumen datos (ej: create_sale).
+    """
+    def run(fn, *args):
+        db = session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    def _measure(fn, setup=None, rounds=20):
+        def prepare():
+            if setup is None:
+                return (), {}
+            db = session_factory()
+            try:
+                return tuple(setup(db)), {}
+            finally:
+                db.close()
+
+        args, kwargs = prepare()
+        stats, peak = _profile_once(run, (fn, *args), kwargs)
+        benchmark.extra_info["queries"] = stats.query_count
+        benchmark.extra_info["db_ms"] = round(stats.db_time * 1000, 2)
+        benchmark.extra_info["peak_memory_kb"] = round(peak / 1024, 1)
+
+        if setup is None:
+            return benchmark(run, fn)
+        return benchmark.pedantic(
+            lambda *setup_args: run(fn, *setup_args),
+            setup=prepare, rounds=rounds, iterations=1
+        )
+    return _measure
@@ -0,0 +1,265 @@
+"""
+Generador determinista de datos del dominio de la tienda para benchmarks.
+
+Con la misma semilla y escala produce siempre los mismos registros (las
+fechas se calculan hacia atrás desde reference_date, por defecto hoy en
+Colombia, para que "pedidos de hoy" y "ventas del día" tengan datos).
+
+Uso:
+    python -m benchmarks.datagen --scale medium --url sqlite:///bench.db
+"""
+import argparse
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+import pytz  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from app.core.database import Base  # noqa: E402
+import app.models  # noqa: E402,F401  (registra todas las tablas en Base.metadata)
+from app.models.store.customers.models import Customer  # noqa: E402
+from app.models.store.debt.models import Debt, DebtMovement, MovementType  # noqa: E402
+from app.models.store.orders.models import Order, OrderItem  # noqa: E402
+from app.models.store.products.models import Category, Product, UnidadMedidaEnum  # noqa: E402
+from app.models.store.returns.models import Return  # noqa: E402
+from app.models.store.sales.models import Sale  # noqa: E402
+from app.models.users.users import User  # noqa: E402
+
+CENTS = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class Scale:
+    categories: int
+    products: int
+    customers: int
+    users: int
+    days: int
+    orders_per_day: int
+    items_per_order: int
+    pending_orders: int
+    debt_ratio: float  # Fracción de clientes con deuda
+    movements_per_debt: int
+    returns_per_day: int
+
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale(
+        categories=5, products=50, customers=100, users=3, days=7, orders_per_day=20,
+        items_per_order=5, pending_orders=10, debt_ratio=0.2, movements_per_debt=10, returns_per_day=1
+    ),
+    "medium": Scale(
+        categories=12, products=400, customers=1500, users=8, days=30, orders_per_day=120,
+        items_per_order=8, pending_orders=60, debt_ratio=0.3, movements_per_debt=40, returns_per_day=3
+    ),
+    "large": Scale(
+        categories=25, products=2000, customers=10000, users=20, days=90, orders_per_day=400,
+        items_per_order=10, pending_orders=200, debt_ratio=0.3, movements_per_debt=120, returns_per_day=5
+    ),
+}
+
+
+def _money(value) -> Decimal:
+    return Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def today() -> date:
+    return datetime.now(pytz.timezone('America/Bogota')).date()
+
+
+class StoreDataGenerator:
+    def __init__(self, db: Session, scale: Scale, seed: int = 42, reference_date: Optional[date] = None):
+        self.db = db
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.reference_date = reference_date or today()
+        self.users: List[User] = []
+        self.products: List[Product] = []
+        self.customers: List[Customer] = []
+
+    def _at(self, day: date, minutes: int) -> datetime:
+        # Horario de la tienda: 7:00 a 19:00
+        return datetime.combine(day, time(7, 0)) + timedelta(minutes=minutes % (12 * 60))
+
+    def generate(self) -> "StoreDataGenerator":
+        self._users()
+        self._catalog()
+        self._customers()
+        self._orders_and_sales()
+        self._pending_orders()
+        self._returns()
+        self._debts()
+        self.db.commit()
+        return self
+
+    def _users(self):
+        self.users = [
+            User(
+                email=f"vendedor{i}@example.com", hashed_password="x", full_name=f"Vendedor {i}",
+                is_active=True, rol="admin" if i == 0 else "user"
+            )
+            for i in range(self.scale.users)
+        ]
+        self.db.add_all(self.users)
+        self.db.flush()
+
+    def _catalog(self):
+        categories = [
+            Category(name=f"Categoría {i}", description=f"Descripción {i}")
+            for i in range(self.scale.categories)
+        ]
+        self.db.add_all(categories)
+        self.db.flush()
+
+        units = list(UnidadMedidaEnum)
+        for i in range(self.scale.products):
+            purchase_price = _money(self.rng.randint(500, 50000))
+            profit = Decimal(self.rng.choice([20, 25, 30, 35, 40]))
+            self.products.append(Product(
+                name=f"Producto {i}",
+                state=True,
+                purchase_price=purchase_price,
+                sale_price=_money(purchase_price * (1 + profit / 100)),
+                profit_percentage=profit,
+                stock=Decimal(self.rng.randint(0, 500)),
+                category_id=categories[i % len(categories)].id,
+                unit=units[i % len(units)]
+            ))
+        self.db.add_all(self.products)
+        self.db.flush()
+
+    def _customers(self):
+        self.customers = [
+            Customer(
+                name=f"Cliente {i}", cc=10000000 + i, alias=f"alias{i}",
+                phone=f"300{i:07d}", direction=f"Calle {i % 200} # {i % 50}-{i % 90}"
+            )
+            for i in range(self.scale.customers)
+        ]
+        self.db.add_all(self.customers)
+        self.db.flush()
+
+    def _build_order(self, when: datetime, status: str) -> Order:
+        order = Order(
+            customer_id=self.rng.choice(self.customers).id,
+            user_id=self.rng.choice(self.users).id,
+            date=when,
+            updated_at=when,
+            status=status
+        )
+        for product in self.rng.sample(self.products, min(self.scale.items_per_order, len(self.products))):
+            quantity = Decimal(self.rng.randint(1, 12))
+            # Algunos precios se negocian por debajo del esperado para que haya pérdidas
+            price_unit = product.sale_price if self.rng.random() > 0.1 else _money(product.sale_price * Decimal("0.9"))
+            order.items.append(OrderItem(
+                product_id=product.id,
+                quantity=quantity,
+                price_unit=price_unit,
+                subtotal=_money(quantity * price_unit)
+            ))
+        return order
+
+    def _orders_and_sales(self):
+        for offset in range(self.scale.days):
+            day = self.reference_date - timedelta(days=offset)
+            orders = [
+                self._build_order(self._at(day, self.rng.randint(0, 12 * 60)), "completed")
+                for _ in range(self.scale.orders_per_day)
+            ]
+            self.db.add_all(orders)
+            self.db.flush()
+
+            sales = []
+            for order in orders:
+                total = sum((item.subtotal for item in order.items), Decimal("0"))
+                transfer = _money(total * Decimal(self.rng.choice([0, 0, 0.5, 1])))
+                sales.append(Sale(
+                    order_id=order.id, date=order.date + timedelta(minutes=5),
+                    total=total, transfer_payment=transfer, balance=total - transfer
+                ))
+            self.db.add_all(sales)
+            self.db.flush()
+            # Liberar memoria de la sesión entre días en escalas grandes
+            self.db.expunge_all()
+
+    def _pending_orders(self):
+        # Los productos y clientes quedaron desligados de la sesión, pero solo se leen sus atributos ya cargados
+        orders = [
+            self._build_order(self._at(self.reference_date, self.rng.randint(0, 12 * 60)), "pending")
+            for _ in range(self.scale.pending_orders)
+        ]
+        self.db.add_all(orders)
+        self.db.flush()
+
+    def _returns(self):
+        returns = []
+        for offset in range(self.scale.days):
+            day = self.reference_date - timedelta(days=offset)
+            for _ in range(self.scale.returns_per_day):
+                returns.append(Return(
+                    amount_returned=_money(self.rng.randint(1000, 30000)),
+                    return_date=self._at(day, self.rng.randint(0, 12 * 60))
+                ))
+        self.db.add_all(returns)
+        self.db.flush()
+
+    def _debts(self):
+        debtors = self.rng.sample(self.customers, int(len(self.customers) * self.scale.debt_ratio))
+        start = self.reference_date - timedelta(days=self.scale.days)
+        for customer in debtors:
+            debt = Debt(customer_id=customer.id, current_balance=Decimal("0"))
+            self.db.add(debt)
+            self.db.flush()
+
+            balance = Decimal("0")
+            movements = []
+            for n in range(self.scale.movements_per_debt):
+                if balance > 0 and self.rng.random() < 0.4:
+                    movement_type = MovementType.PAYMENT
+                    amount = _money(balance * Decimal(self.rng.choice([0.1, 0.25, 0.5])))
+                    balance -= amount
+                else:
+                    movement_type = MovementType.NEW_BALANCE
+                    amount = _money(self.rng.randint(5000, 80000))
+                    balance += amount
+                day = start + timedelta(days=n * self.scale.days // max(self.scale.movements_per_debt, 1))
+                movements.append(DebtMovement(
+                    debt_id=debt.id, movement_type=movement_type, amount=amount,
+                    movement_date=self._at(day, n * 37), description="Movimiento generado"
+                ))
+            debt.current_balance = balance
+            self.db.add_all(movements)
+        self.db.flush()
+
+
+def create_schema(engine) -> None:
+    Base.metadata.create_all(engine)
+
+
+def populate(db: Session, scale: str = "small", seed: int = 42, reference_date: Optional[date] = None) -> StoreDataGenerator:
+    return StoreDataGenerator(db, SCALES[scale], seed=seed, reference_date=reference_date).generate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", default="sqlite:///bench.db")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    create_schema(engine)
+    with Session(engine) as db:
+        populate(db, args.scale, args.seed)
+    print(f"Datos '{args.scale}' generados en {args.url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+
+# Valores mínimos para poder importar la configuración de la app sin .env
+APP_ENV_DEFAULTS = {
+    "SECRET_KEY": "bench", "MAIL_USERNAME": "bench", "MAIL_PASSWORD": "bench",
+    "MAIL_FROM": "bench@example.com", "MAIL_PORT": "587", "MAIL_SERVER": "localhost",
+    "MAIL_FROM_NAME": "bench", "SERVER_HOST": "http://localhost", "DATABASE_URL": "sqlite://",
+    "WEBHOOK_SECRET": "bench", "FRONTEND_URL": "http://localhost",
+    # Los benchmarks no deben medir el costo de escribir logs
+    "LOG_LEVEL": "WARNING", "SQL_ECHO": "false",
+    # Los listados se miden con el camino rápido (opt-in en producción)
+    "FAST_SERIALIZATION": "true",
+}
+
+
+def configure_environment() -> None:
+    """Debe llamarse antes de importar cualquier módulo de app."""
+    for key, value in APP_ENV_DEFAULTS.items():
+        os.environ.setdefault(key, value)